@@ -108,6 +108,18 @@ if RAILWAY_DATABASE_URL:
         ssl_require=True,  # Railway public proxy expects SSL
     )
 
+# Cache
+# Geofence zone invalidation and the latest-state store reach other processes (run_mqtt, other web
+# workers) through the default cache, so run a shared one when they are separate processes, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://localhost:6379/0
+# (checks drones.E001 / drones.W001 flag the process-local default)
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -144,6 +156,16 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # orjson-backed when installed, DRF's stdlib JSON otherwise (see DRONE_JSON_BACKEND)
+    "DEFAULT_RENDERER_CLASSES": (
+        "drones.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "drones.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -152,6 +174,38 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
 }
 
+# Danger classification (built once per process by drones.danger_strategies.classifier_registry)
+# DRONE_DANGER_RULES: comma-separated subset of height,speed,geofence
+DRONE_DANGER_RULES = [
+    r.strip() for r in config("DRONE_DANGER_RULES", default="height,speed,geofence").split(",") if r.strip()
+]
+DRONE_HEIGHT_THRESHOLD_M = config("DRONE_HEIGHT_THRESHOLD_M", default=500.0, cast=float)
+DRONE_SPEED_THRESHOLD_MPS = config("DRONE_SPEED_THRESHOLD_MPS", default=10.0, cast=float)
+
+# Telemetry partitioning on PostgreSQL (migration 0006 + manage_partitions command)
+# DRONE_TELEMETRY_PARTITION_INTERVAL: day or month
+DRONE_TELEMETRY_PARTITION_INTERVAL = config("DRONE_TELEMETRY_PARTITION_INTERVAL", default="month")
+DRONE_TELEMETRY_PARTITIONS_AHEAD = config("DRONE_TELEMETRY_PARTITIONS_AHEAD", default=3, cast=int)
+# migration 0006 creates partitions for at most this many past periods; older rows stay in DEFAULT
+DRONE_TELEMETRY_PARTITIONS_BACK = config("DRONE_TELEMETRY_PARTITIONS_BACK", default=12, cast=int)
+# 0 keeps every partition
+DRONE_TELEMETRY_RETENTION_DAYS = config("DRONE_TELEMETRY_RETENTION_DAYS", default=0, cast=int)
+
+# Batched ingest (MQTT batch mode, imports) writes telemetry with binary COPY on PostgreSQL
+DRONE_TELEMETRY_COPY = config("DRONE_TELEMETRY_COPY", default=False, cast=bool)
+# Max points accepted by one POST /api/telemetry/batch/ request
+DRONE_TELEMETRY_BATCH_MAX_ITEMS = config("DRONE_TELEMETRY_BATCH_MAX_ITEMS", default=10000, cast=int)
+# rollup_telemetry recomputes this many minutes behind the newest rollup on every run
+DRONE_ROLLUP_LAG_MINUTES = config("DRONE_ROLLUP_LAG_MINUTES", default=10, cast=float)
+# JSON library for MQTT payloads, imports, streaming and API responses: auto (orjson if installed) | json | orjson
+DRONE_JSON_BACKEND = config("DRONE_JSON_BACKEND", default="auto")
+# Serve the drone list/online/dangerous/nearby endpoints from the in-memory latest-state store
+# (drones.drone_state); share it between processes with a Redis/Memcached CACHES backend
+# (check drones.E001 rejects a process-local CACHES backend)
+DRONE_STATE_STORE = config("DRONE_STATE_STORE", default=False, cast=bool)
+# How often a process checks the shared cache for state written by other processes
+DRONE_STATE_CHECK_SECONDS = config("DRONE_STATE_CHECK_SECONDS", default=1.0, cast=float)
+
 
 # DEBUG should come from env in real deployments
 # Locally: DEBUG=True
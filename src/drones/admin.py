@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Drone, DroneTelemetry
+from .models import Drone, DroneTelemetry, TelemetryRollup, TelemetryRollupCursor
 
 # Register your models here.
 admin.site.register(Drone)
 admin.site.register(DroneTelemetry)
-
+admin.site.register(TelemetryRollup)
+admin.site.register(TelemetryRollupCursor)
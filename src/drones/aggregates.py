@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Avg, Count, Func, IntegerField, Max, Min
+
+#bucket name -> width in seconds
+BUCKETS = {
+    "1s": 1,
+    "10s": 10,
+    "1m": 60,
+    "10m": 600,
+    "1h": 3600,
+}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class EpochBucket(Func):
+    """Index of the fixed-width time bucket a timestamp falls in: floor(unix_seconds / seconds)."""
+
+    output_field = IntegerField()
+
+    def __init__(self, expression, seconds: int):
+        self.seconds = int(seconds)
+        super().__init__(expression)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        template = f"CAST(FLOOR(EXTRACT(EPOCH FROM %(expressions)s) / {self.seconds}) AS BIGINT)"
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        #'%%%%s' survives both the template and the backend's placeholder pass as strftime's '%s'
+        template = f"(CAST(strftime('%%%%s', %(expressions)s) AS INTEGER) / {self.seconds})"
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+def bucket_start(index: int, seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=index * seconds)
+
+
+def aggregate_telemetry(qs, seconds: int, limit: int) -> list[dict]:
+    """
+    Per-bucket stats for a telemetry queryset, oldest bucket first, at most `limit` buckets.
+
+    The GROUP BY runs in SQL (rows never reach Python); the last position of each bucket
+    is a second indexed lookup on the buckets' latest timestamps.
+    """
+    buckets = list(
+        qs.annotate(bucket=EpochBucket("timestamp", seconds))
+        .order_by()
+        .values("bucket")
+        .annotate(
+            count=Count("id"),
+            min_height_m=Min("height_m"),
+            max_height_m=Max("height_m"),
+            avg_height_m=Avg("height_m"),
+            min_speed_mps=Min("horizontal_speed_mps"),
+            max_speed_mps=Max("horizontal_speed_mps"),
+            avg_speed_mps=Avg("horizontal_speed_mps"),
+            last_timestamp=Max("timestamp"),
+        )
+        .order_by("bucket")[:limit]
+    )
+    if not buckets:
+        return []
+
+    #latest row per timestamp (highest id wins ties)
+    last = {}
+    for ts, lat, lng in (
+        qs.filter(timestamp__in=[b["last_timestamp"] for b in buckets])
+        .order_by("timestamp", "id")
+        .values_list("timestamp", "lat", "lng")
+    ):
+        last[ts] = (lat, lng)
+
+    results = []
+    for b in buckets:
+        lat, lng = last.get(b["last_timestamp"], (None, None))
+        results.append(
+            {
+                "bucket_start": bucket_start(b["bucket"], seconds),
+                "count": b["count"],
+                "min_height_m": b["min_height_m"],
+                "max_height_m": b["max_height_m"],
+                "avg_height_m": b["avg_height_m"],
+                "min_speed_mps": b["min_speed_mps"],
+                "max_speed_mps": b["max_speed_mps"],
+                "avg_speed_mps": b["avg_speed_mps"],
+                "last_timestamp": b["last_timestamp"],
+                "last_lat": lat,
+                "last_lng": lng,
+            }
+        )
+    return results
+
+
+
+def rollup_buckets(qs, limit: int) -> list[dict]:
+    """Same rows as aggregate_telemetry(), read from a TelemetryRollup queryset of one resolution."""
+    return [
+        {
+            "bucket_start": r.bucket_start,
+            "count": r.count,
+            "min_height_m": r.min_height_m,
+            "max_height_m": r.max_height_m,
+            "avg_height_m": r.avg_height_m,
+            "min_speed_mps": r.min_speed_mps,
+            "max_speed_mps": r.max_speed_mps,
+            "avg_speed_mps": r.avg_speed_mps,
+            "last_timestamp": r.last_timestamp,
+            "last_lat": r.last_lat,
+            "last_lng": r.last_lng,
+        }
+        for r in qs.order_by("bucket_start")[:limit]
+    ]
@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class DronesConfig(AppConfig):
     name = 'drones'
+
+    def ready(self):
+        from django.core import checks
+
+        # connect GeofenceZone cache invalidation
+        from . import signals  # noqa: F401
+        from .checks import check_geofence_cache, check_state_store_cache
+
+        checks.register(check_state_store_cache, checks.Tags.caches)
+        checks.register(check_geofence_cache, checks.Tags.caches)
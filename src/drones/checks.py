@@ -0,0 +1,57 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .drone_state import state_store_enabled
+
+SHARED_CACHE_HINT = (
+    "Point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached (see settings.CACHES), or silence {id} "
+    "if a single process both ingests telemetry and serves the API."
+)
+
+
+def process_local_cache() -> Optional[str]:
+    """Class name of the default cache when other processes can't see it (LocMemCache, DummyCache)."""
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    return type(backend).__name__ if isinstance(backend, (LocMemCache, DummyCache)) else None
+
+
+def check_state_store_cache(app_configs=None, **kwargs) -> list:
+    """
+    With a process-local cache, writes made by run_mqtt never reach the web workers and their
+    latest-state store stays stale without any sign of it.
+    """
+    local = process_local_cache()
+    if not state_store_enabled() or local is None:
+        return []
+    return [
+        checks.Error(
+            f"DRONE_STATE_STORE needs a cache shared between processes, but the default cache is {local}.",
+            hint=SHARED_CACHE_HINT.format(id="drones.E001"),
+            id="drones.E001",
+        )
+    ]
+
+
+def check_geofence_cache(app_configs=None, **kwargs) -> list:
+    """
+    Geofence zone edits reach other processes through a version counter in the default cache;
+    a process-local cache leaves them on the old zones until DRONE_GEOFENCE_CACHE_TTL expires.
+    A warning, not an error: one process (runserver, tests) is fine with LocMemCache.
+    """
+    local = process_local_cache()
+    if "geofence" not in getattr(settings, "DRONE_DANGER_RULES", ["geofence"]) or local is None:
+        return []
+    ttl = getattr(settings, "DRONE_GEOFENCE_CACHE_TTL", 300.0)
+    return [
+        checks.Warning(
+            f"Geofence zone changes reach other processes (run_mqtt, other web workers) only after "
+            f"DRONE_GEOFENCE_CACHE_TTL ({ttl:g}s): the default cache is {local}.",
+            hint=SHARED_CACHE_HINT.format(id="drones.W001"),
+            id="drones.W001",
+        )
+    ]
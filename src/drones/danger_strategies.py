@@ -1,10 +1,19 @@
 from __future__ import annotations
+import threading
+import time
 from dataclasses import dataclass
 from typing import Protocol, Optional
 from django.conf import settings
-from drones.utils import haversine_km
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from drones.geofence_index import GeofenceIndex
 from drones.models import GeofenceZone
 
+try:
+    import numpy as np
+except ImportError:  # optional: batch kernels fall back to plain Python loops
+    np = None
+
 
 class DangerRule(Protocol):
     def check(
@@ -16,26 +25,54 @@ class DangerRule(Protocol):
         """Return a reason string if dangerous, else None."""
         ...
 
+    # Rules may also provide a vectorized kernel, used by classify_batch():
+    #
+    #     reason: str
+    #     def check_batch(self, *, height_m, horizontal_speed_mps) -> Sequence[bool]
+    #
+    # Rules without one are evaluated row by row through check().
+
+
+def exceeds(values, threshold: float):
+    """Row-wise `value > threshold` for a column; None/NaN never exceed."""
+    if np is not None:
+        return np.asarray(values, dtype=float) > threshold
+    return [v is not None and v > threshold for v in values]
+
 
 @dataclass(frozen=True)
 class HeightRule:
     threshold_m: float = 500.0
 
+    @property
+    def reason(self) -> str:
+        return f"Altitude greater than {int(self.threshold_m)} meters"
+
     def check(self, *, height_m: Optional[float], horizontal_speed_mps: Optional[float]) -> Optional[str]:
         if height_m is not None and height_m > self.threshold_m:
-            return f"Altitude greater than {int(self.threshold_m)} meters"
+            return self.reason
         return None
 
+    def check_batch(self, *, height_m, horizontal_speed_mps):
+        return exceeds(height_m, self.threshold_m)
+
 
 @dataclass(frozen=True)
 class SpeedRule:
     threshold_mps: float = 10.0
 
+    @property
+    def reason(self) -> str:
+        return f"Horizontal speed greater than {int(self.threshold_mps)} m/s"
+
     def check(self, *, height_m: Optional[float], horizontal_speed_mps: Optional[float]) -> Optional[str]:
         if horizontal_speed_mps is not None and horizontal_speed_mps > self.threshold_mps:
-            return f"Horizontal speed greater than {int(self.threshold_mps)} m/s"
+            return self.reason
         return None
 
+    def check_batch(self, *, height_m, horizontal_speed_mps):
+        return exceeds(horizontal_speed_mps, self.threshold_mps)
+
 
 class DangerClassifier:
     """Strategy context that applies a set of rules."""
@@ -55,50 +92,234 @@ class DangerClassifier:
                 reasons.append(reason)
         return reasons
 
+    def classify_batch(self, *, height_m, horizontal_speed_mps) -> list[list[str]]:
+        """
+        classify() over columns (lists, array('d') or NumPy arrays of equal length).
+        Missing values are None (lists) or NaN (float arrays). Returns one reason list per row.
+        """
+        n = len(height_m)
+        reasons: list[list[str]] = [[] for _ in range(n)]
+        for rule in self.rules:
+            check_batch = getattr(rule, "check_batch", None)
+            if check_batch is None:
+                for i in range(n):
+                    reason = rule.check(height_m=height_m[i], horizontal_speed_mps=horizontal_speed_mps[i])
+                    if reason:
+                        reasons[i].append(reason)
+                continue
+
+            mask = check_batch(height_m=height_m, horizontal_speed_mps=horizontal_speed_mps)
+            hits = np.flatnonzero(mask).tolist() if np is not None else [i for i, hit in enumerate(mask) if hit]
+            reason = rule.reason
+            for i in hits:
+                reasons[i].append(reason)
+        return reasons
+
 
 class CombinedClassifier:
-    def __init__(self):
-        self.thresholds = DangerClassifier([HeightRule(), SpeedRule()])
-        self.geofence = GeofenceClassifier()
+    def __init__(
+        self,
+        thresholds: Optional[DangerClassifier] = None,
+        geofence: Optional[GeofenceClassifier] = None,
+        *,
+        use_geofence: bool = True,
+    ):
+        self.thresholds = thresholds or DangerClassifier([HeightRule(), SpeedRule()])
+        self.geofence = geofence or (GeofenceClassifier() if use_geofence else None)
 
     def classify(self, *, height_m=None, horizontal_speed_mps=None, lat=None, lng=None) -> list[str]:
         reasons = self.thresholds.classify(
             height_m=height_m,
             horizontal_speed_mps=horizontal_speed_mps,
         )
-        reasons += self.geofence.classify(lat=lat, lng=lng)
+        if self.geofence is not None:
+            reasons += self.geofence.classify(lat=lat, lng=lng)
         return reasons
 
+    def classify_batch(self, *, height_m, horizontal_speed_mps, lat, lng) -> list[list[str]]:
+        """Columnar classify(): one reason list per row, same order as classify() would give."""
+        reasons = self.thresholds.classify_batch(
+            height_m=height_m,
+            horizontal_speed_mps=horizontal_speed_mps,
+        )
+        if self.geofence is not None:
+            for row, zone_reasons in zip(reasons, self.geofence.classify_batch(lat=lat, lng=lng)):
+                row += zone_reasons
+        return reasons
 
-def default_classifier():
-    return CombinedClassifier()
 
+def default_classifier() -> CombinedClassifier:
+    """The process-wide classifier, built from settings (see ClassifierRegistry)."""
+    return classifier_registry.get()
 
-#data class is a Python decorator that automatically generates special methods like __init__ and __repr__ for classes that are primarily used to store data, 
-# making it easier to create classes that are simple containers for data without having to write boilerplate code for initialization and representation.
-@dataclass
-class GeofenceClassifier:
-    def classify(self, *, lat: float | None, lng: float | None) -> list[str]:
-        reasons: list[str] = []
 
-        if lat is None or lng is None:
-            return reasons
+#cache key holding a counter that is bumped whenever zones change; every process compares it
+#with the version it loaded, so edits made by REST workers reach MQTT workers too
+#(needs a shared CACHES backend such as Redis/Memcached; LocMemCache only covers one process)
+GEOFENCE_CACHE_VERSION_KEY = "drones:geofence_zones:version"
+
+
+class GeofenceZoneCache:
+    """
+    Process-local, spatially indexed copy of the geofence zones so classify() doesn't
+    SELECT (or scan every zone) on every message.
+
+    Reloaded when invalidate() is called (GeofenceZone post_save/post_delete, settings changes),
+    when the shared version counter in Django's cache moves, or after DRONE_GEOFENCE_CACHE_TTL
+    seconds as a safety net. The shared counter is checked at most every
+    DRONE_GEOFENCE_CACHE_CHECK_SECONDS. Zones are indexed on a DRONE_GEOFENCE_GRID_DEG grid.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Optional[GeofenceIndex] = None
+        self._version = None
+        self._generation = 0
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    def index(self) -> GeofenceIndex:
+        now = time.monotonic()
+        index = self._index
+        check_every = getattr(settings, "DRONE_GEOFENCE_CACHE_CHECK_SECONDS", 1.0)
+        ttl = getattr(settings, "DRONE_GEOFENCE_CACHE_TTL", 300.0)
+
+        if index is not None and now - self._checked_at < check_every and now - self._loaded_at < ttl:
+            return index
+
+        with self._lock:
+            version = cache.get(GEOFENCE_CACHE_VERSION_KEY)
+            if self._index is not None and version == self._version and now - self._loaded_at < ttl:
+                self._checked_at = now
+                return self._index
 
+            generation = self._generation
+            index = GeofenceIndex(
+                self._load(),
+                cell_deg=getattr(settings, "DRONE_GEOFENCE_GRID_DEG", 0.1),
+            )
+            #don't keep the result if invalidate() ran while we were reading
+            if generation == self._generation:
+                self._index = index
+                self._version = version
+                self._loaded_at = self._checked_at = now
+            return index
+
+    def invalidate(self, *, broadcast: bool = True) -> None:
+        """Drop the local copy and (by default) tell other processes to drop theirs."""
+        with self._lock:
+            self._index = None
+            self._generation += 1
+        if broadcast:
+            cache.add(GEOFENCE_CACHE_VERSION_KEY, 0, timeout=None)
+            try:
+                cache.incr(GEOFENCE_CACHE_VERSION_KEY)
+            except ValueError:
+                #key evicted between add() and incr(), or a backend that stores nothing
+                #(DummyCache): a cache problem must never fail the zone write itself
+                cache.set(GEOFENCE_CACHE_VERSION_KEY, 1, timeout=None)
+
+    @staticmethod
+    def _load() -> list[dict]:
         # 1) Try database-defined zones (RBAC-managed)
         zones_db = list(
-            GeofenceZone.objects.values("name", "lat", "lng", "radius_km")
+            GeofenceZone.objects.values("name", "shape", "lat", "lng", "radius_km", "polygon")
         )
 
         # 2) Fallback to settings if DB is empty
-        zones = zones_db or getattr(
+        return zones_db or list(getattr(
             settings,
             "DRONE_GEOFENCE_ZONES",
             getattr(settings, "NO_FLY_ZONES", []),
-        )
+        ))
+
+
+geofence_zone_cache = GeofenceZoneCache()
 
-        for zone in zones:
-            distance = haversine_km(lat, lng, zone["lat"], zone["lng"])
-            if distance <= zone["radius_km"]:
-                reasons.append(f'Entered no-fly zone: {zone["name"]}')
+
+#data class is a Python decorator that automatically generates special methods like __init__ and __repr__ for classes that are primarily used to store data, 
+# making it easier to create classes that are simple containers for data without having to write boilerplate code for initialization and representation.
+@dataclass
+class GeofenceClassifier:
+    def classify(self, *, lat: float | None, lng: float | None) -> list[str]:
+        reasons: list[str] = []
+
+        if lat is None or lng is None:
+            return reasons
+
+        # DB zones (or the settings fallback), cached + grid-indexed per process;
+        # exact haversine only runs for zones sharing the point's grid cell
+        for zone in geofence_zone_cache.index().matches(lat, lng):
+            reasons.append(f"Entered no-fly zone: {zone.name}")
 
         return reasons
+
+    def classify_batch(self, *, lat, lng) -> list[list[str]]:
+        """classify() over lat/lng columns; rows with missing coordinates get no reasons."""
+        return [
+            [f"Entered no-fly zone: {zone.name}" for zone in zones]
+            for zones in geofence_zone_cache.index().matches_batch(lat, lng)
+        ]
+
+
+#rule name (as used in settings.DRONE_DANGER_RULES) -> how to build it from the config
+RULE_BUILDERS = {
+    "height": lambda config: HeightRule(threshold_m=config["height_threshold_m"]),
+    "speed": lambda config: SpeedRule(threshold_mps=config["speed_threshold_mps"]),
+}
+
+
+def classifier_config() -> dict:
+    """Snapshot of the settings the classifier is built from."""
+    return {
+        "rules": tuple(getattr(settings, "DRONE_DANGER_RULES", ("height", "speed", "geofence"))),
+        "height_threshold_m": float(getattr(settings, "DRONE_HEIGHT_THRESHOLD_M", 500.0)),
+        "speed_threshold_mps": float(getattr(settings, "DRONE_SPEED_THRESHOLD_MPS", 10.0)),
+    }
+
+
+def build_classifier(config: dict) -> CombinedClassifier:
+    unknown = set(config["rules"]) - set(RULE_BUILDERS) - {"geofence"}
+    if unknown:
+        raise ImproperlyConfigured(f"Unknown DRONE_DANGER_RULES entries: {sorted(unknown)}")
+
+    rules = [RULE_BUILDERS[name](config) for name in config["rules"] if name in RULE_BUILDERS]
+    return CombinedClassifier(
+        DangerClassifier(rules),
+        use_geofence="geofence" in config["rules"],
+    )
+
+
+class ClassifierRegistry:
+    """
+    Holds one long-lived CombinedClassifier per process.
+
+    get() compares the current settings snapshot with the one the classifier was
+    built from and only rebuilds when it changed; reload() forces a rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config: Optional[dict] = None
+        self._classifier: Optional[CombinedClassifier] = None
+
+    def get(self) -> CombinedClassifier:
+        config = classifier_config()
+        classifier = self._classifier
+        if classifier is not None and config == self._config:
+            return classifier
+
+        with self._lock:
+            if self._classifier is None or config != self._config:
+                self._classifier = build_classifier(config)
+                self._config = config
+            return self._classifier
+
+    def reload(self) -> CombinedClassifier:
+        """Rebuild from settings now (e.g. after thresholds were changed at runtime)."""
+        with self._lock:
+            self._classifier = None
+        return self.get()
+
+
+classifier_registry = ClassifierRegistry()
@@ -0,0 +1,415 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Drone
+from .serializers import DroneSerializer
+from .utils import bounding_box, haversine_km, haversine_km_array
+
+try:
+    import numpy as np
+except ImportError:  # optional: nearby lookups fall back to a per-drone loop
+    np = None
+
+#shared copy of the store in Django's cache, so a write in one process (MQTT worker, REST worker)
+#reaches the others (needs a shared CACHES backend such as Redis/Memcached; LocMemCache only covers
+#one process, so check drones.E001 in drones.checks refuses it):
+#   drones:state:version        counter bumped after every write
+#   drones:state:slots          number of allocated slots (cache.incr keeps allocation atomic)
+#   drones:state:slot:<id>      slot of a drone id
+#   drones:state:<slot>         packed DroneState, or () once the drone is deleted
+#   drones:state:changes:<v>    slots written by the write that made version v, so readers that
+#                               are a few versions behind fetch only those
+STATE_VERSION_KEY = "drones:state:version"
+STATE_SLOTS_KEY = "drones:state:slots"
+STATE_SLOT_KEY = "drones:state:slot:%s"
+STATE_KEY = "drones:state:%s"
+STATE_CHANGES_KEY = "drones:state:changes:%s"
+#change lists outlive any sane DRONE_STATE_CHECK_SECONDS; readers further behind do a full read
+STATE_CHANGES_TIMEOUT = 600
+STATE_CHANGES_MAX = 1000
+#held by the one process rebuilding the shared copy from the database
+STATE_REBUILD_KEY = "drones:state:rebuilding"
+
+DRONE_STATE_FIELDS = ("id", "serial", "last_seen", "last_lat", "last_lng", "is_dangerous", "danger_reasons")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def state_store_enabled() -> bool:
+    return getattr(settings, "DRONE_STATE_STORE", False)
+
+
+def _is_older(last_seen, than) -> bool:
+    #publishers only move a drone forward; equal timestamps (mark-safe, admin edits) still win
+    return last_seen is not None and than is not None and last_seen < than
+
+
+class DroneState:
+    """
+    Latest state of one drone: the Drone columns the read endpoints return, nothing else.
+    `row` is the DroneSerializer representation, built on first use and reused afterwards.
+    """
+
+    __slots__ = DRONE_STATE_FIELDS + ("_row",)
+
+    def __init__(self, id, serial, last_seen, last_lat, last_lng, is_dangerous, danger_reasons):
+        self.id = id
+        self.serial = serial
+        self.last_seen = last_seen
+        self.last_lat = last_lat
+        self.last_lng = last_lng
+        self.is_dangerous = is_dangerous
+        self.danger_reasons = tuple(danger_reasons or ())
+        self._row = None
+
+    @classmethod
+    def from_drone(cls, drone: Drone) -> "DroneState":
+        return cls(*(getattr(drone, name) for name in DRONE_STATE_FIELDS))
+
+    def pack(self) -> tuple:
+        """Compact tuple for the shared cache; last_seen as integer microseconds since the epoch."""
+        last_seen = None
+        if self.last_seen is not None:
+            last_seen = (self.last_seen - _EPOCH) // timedelta(microseconds=1)
+        return (self.id, self.serial, last_seen, self.last_lat, self.last_lng, self.is_dangerous, self.danger_reasons)
+
+    @classmethod
+    def unpack(cls, packed: tuple) -> "DroneState":
+        id, serial, last_seen, last_lat, last_lng, is_dangerous, danger_reasons = packed
+        if last_seen is not None:
+            last_seen = _EPOCH + timedelta(microseconds=last_seen)
+        return cls(id, serial, last_seen, last_lat, last_lng, is_dangerous, danger_reasons)
+
+    @property
+    def row(self) -> dict:
+        if self._row is None:
+            self._row = {
+                name: None if getattr(self, name) is None else convert(getattr(self, name))
+                for name, convert in _row_converters()
+            }
+        return self._row
+
+
+_converters = None
+
+
+def _row_converters() -> list:
+    #(name, to_representation) per DroneSerializer field, built once per process
+    global _converters
+    if _converters is None:
+        fields = DroneSerializer().fields
+        _converters = [(name, fields[name].to_representation) for name in DroneSerializer.Meta.fields]
+    return _converters
+
+
+class DroneStateStore:
+    """
+    Process-local latest state of every drone, so the hot read endpoints (list, online,
+    dangerous, nearby) never query the Drone table.
+
+    Writers call publish() after their transaction commits (see publish_drone_states()): the
+    local copy is updated at once and the states are written to the shared copy in Django's
+    cache. Readers follow the shared copy's version counter, checking it at most every
+    DRONE_STATE_CHECK_SECONDS, and fetch only the slots written since their version (a full
+    read when the change lists are gone). An empty or incomplete shared copy (cold cache,
+    eviction) is rebuilt from the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: dict[int, DroneState] = {}
+        #slot -> drone id, to apply deletions (an emptied slot) from the change lists
+        self._slot_ids: dict[int, int] = {}
+        self._ordered: Optional[list[DroneState]] = None
+        self._positions = None
+        self._version = None
+        self._stalled = None
+        self._loaded = False
+        self._checked_at = 0.0
+
+    def reset(self) -> None:
+        """Forget the local copy; the next read reloads it."""
+        with self._lock:
+            self._states = {}
+            self._slot_ids = {}
+            self._changed()
+            self._version = None
+            self._loaded = False
+
+    # reads
+
+    def states(self) -> list[DroneState]:
+        """Every drone, ordered by id."""
+        self._refresh()
+        ordered = self._ordered
+        if ordered is None:
+            with self._lock:
+                if self._ordered is None:
+                    self._ordered = sorted(self._states.values(), key=lambda state: state.id)
+                ordered = self._ordered
+        return ordered
+
+    def online(self, cutoff: datetime) -> list[DroneState]:
+        return [state for state in self.states() if state.last_seen is not None and state.last_seen >= cutoff]
+
+    def dangerous(self) -> list[DroneState]:
+        return sorted((state for state in self.states() if state.is_dangerous), key=lambda state: state.serial)
+
+    def search(self, serial: str) -> list[DroneState]:
+        """Case-insensitive substring match on serial, like serial__icontains."""
+        needle = serial.lower()
+        return [state for state in self.states() if needle in state.serial.lower()]
+
+    def within(self, lat: float, lng: float, radius_km: float) -> list[tuple[float, DroneState]]:
+        """(distance_km, state) for drones within radius_km, nearest first (same order as nearby.drones_within)."""
+        found = [pair for pair in self._distances(lat, lng, radius_km) if pair[0] <= radius_km]
+        found.sort(key=lambda pair: (pair[0], pair[1].serial))
+        return found
+
+    def nearest(self, lat: float, lng: float, k: int, *, radius_km: Optional[float] = None) -> list[tuple[float, DroneState]]:
+        """The k closest drones, optionally no further than radius_km (same as nearby.nearest_drones)."""
+        found = self._distances(lat, lng, radius_km)
+        if radius_km is not None:
+            found = [pair for pair in found if pair[0] <= radius_km]
+        found.sort(key=lambda pair: (pair[0], pair[1].serial))
+        return found[:k]
+
+    def _distances(self, lat: float, lng: float, radius_km: Optional[float]) -> list[tuple[float, DroneState]]:
+        positioned, lats, lngs = self._position_arrays()
+        if not positioned:
+            return []
+
+        if np is not None:
+            distances = haversine_km_array(lat, lng, lats, lngs)
+            if radius_km is not None:
+                keep = np.flatnonzero(distances <= radius_km)
+                return [(float(distances[i]), positioned[i]) for i in keep.tolist()]
+            return list(zip(distances.tolist(), positioned))
+
+        #without NumPy, skip drones outside the bounding box before measuring
+        box = bounding_box(lat, lng, radius_km) if radius_km is not None else (None, None, None, None)
+        min_lat, max_lat = box[0], box[1]
+        found = []
+        for state in positioned:
+            if min_lat is not None and not min_lat <= state.last_lat <= max_lat:
+                continue
+            found.append((haversine_km(lat, lng, state.last_lat, state.last_lng), state))
+        return found
+
+    def _position_arrays(self):
+        states = self.states()
+        positions = self._positions
+        if positions is None or positions[0] is not states:
+            positioned = [state for state in states if state.last_lat is not None and state.last_lng is not None]
+            lats = [state.last_lat for state in positioned]
+            lngs = [state.last_lng for state in positioned]
+            if np is not None:
+                lats, lngs = np.array(lats, dtype=float), np.array(lngs, dtype=float)
+            positions = self._positions = (states, positioned, lats, lngs)
+        return positions[1:]
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < getattr(settings, "DRONE_STATE_CHECK_SECONDS", 1.0):
+            return
+
+        with self._lock:
+            version = cache.get(STATE_VERSION_KEY)
+            #no version yet (another process is rebuilding, or died doing it): keep asking
+            if self._loaded and version is not None and version == self._version:
+                self._checked_at = now
+                return
+
+            if self._loaded and self._version is not None and version is not None \
+                    and 0 < version - self._version <= STATE_CHANGES_MAX:
+                reached = self._apply_changes(version)
+                if reached is not None:
+                    self._version = reached
+                    self._checked_at = now
+                    return
+
+            by_slot = None if version is None else self._read_shared()
+            if by_slot is None:
+                by_slot, version = self._rebuild()
+
+            self._states = {state.id: state for state in by_slot.values()}
+            self._slot_ids = {slot: state.id for slot, state in by_slot.items()}
+            self._changed()
+            self._version = version
+            self._loaded = True
+            self._checked_at = now
+
+    def _apply_changes(self, version: int) -> Optional[int]:
+        """
+        Fetch the slots written between the local version and `version` and update only those
+        drones (the others keep their DroneState and cached row). Returns the version reached,
+        or None when a full read is needed.
+        """
+        keys = [STATE_CHANGES_KEY % v for v in range(self._version + 1, version + 1)]
+        changes = cache.get_many(keys)
+        reached = self._version
+        slots = set()
+        for key in keys:
+            if key not in changes:
+                break
+            slots.update(changes[key])
+            reached += 1
+        if reached < version:
+            #a writer records its changes right after bumping the version, so the newest lists
+            #may still be on their way; a hole before later lists, or the same gap on two checks
+            #in a row, means they expired or their writer died
+            if len(changes) > reached - self._version or self._stalled == reached:
+                return None
+            self._stalled = reached
+
+        state_keys = {STATE_KEY % slot: slot for slot in slots}
+        packed = cache.get_many(list(state_keys))
+        if len(packed) != len(state_keys):
+            return None
+        for key, value in packed.items():
+            slot = state_keys[key]
+            if value:
+                state = DroneState.unpack(value)
+                self._states[state.id] = state
+                self._slot_ids[slot] = state.id
+            else:
+                drone_id = self._slot_ids.pop(slot, None)
+                if drone_id is not None:
+                    self._states.pop(drone_id, None)
+        if packed:
+            self._changed()
+        return reached
+
+    @staticmethod
+    def _read_shared() -> Optional[dict[int, DroneState]]:
+        """Every state in the shared copy by slot, or None if any slot is missing (evicted / half written)."""
+        slots = cache.get(STATE_SLOTS_KEY)
+        if slots is None:
+            return None
+        keys = {STATE_KEY % slot: slot for slot in range(1, slots + 1)}
+        packed = cache.get_many(list(keys))
+        if len(packed) != len(keys):
+            return None
+        return {keys[key]: DroneState.unpack(value) for key, value in packed.items() if value}
+
+    @staticmethod
+    def _rebuild() -> tuple[dict[int, DroneState], Optional[int]]:
+        """Load every drone from the database and, unless another process is at it, share them."""
+        by_slot = {
+            slot: DroneState(*row)
+            for slot, row in enumerate(
+                Drone.objects.order_by("id").values_list(*DRONE_STATE_FIELDS).iterator(chunk_size=2000), start=1
+            )
+        }
+        if not cache.add(STATE_REBUILD_KEY, 1, timeout=60):
+            #no version: this copy serves reads until the next check, which loads again (from
+            #the shared copy once it exists, or by rebuilding once the lock expires)
+            return by_slot, None
+
+        try:
+            values = {}
+            for slot, state in by_slot.items():
+                values[STATE_SLOT_KEY % state.id] = slot
+                values[STATE_KEY % slot] = state.pack()
+            cache.set_many(values, timeout=None)
+            cache.set(STATE_SLOTS_KEY, len(by_slot), timeout=None)
+            cache.add(STATE_VERSION_KEY, 0, timeout=None)
+            return by_slot, cache.incr(STATE_VERSION_KEY)
+        finally:
+            cache.delete(STATE_REBUILD_KEY)
+
+    # writes
+
+    def publish(self, states: Iterable[DroneState]) -> None:
+        """Store new latest states locally and in the shared copy. Call only with committed data."""
+        states = list(states)
+        if not states:
+            return
+        with self._lock:
+            if self._loaded:
+                for state in states:
+                    current = self._states.get(state.id)
+                    if current is None or not _is_older(state.last_seen, current.last_seen):
+                        self._states[state.id] = state
+                self._changed()
+        self._share({STATE_SLOT_KEY % state.id: state.pack() for state in states})
+
+    def remove(self, drone_id: int) -> None:
+        with self._lock:
+            if self._states.pop(drone_id, None) is not None:
+                self._changed()
+        self._share({STATE_SLOT_KEY % drone_id: ()})
+
+    def _share(self, packed_by_slot_key: dict) -> None:
+        if cache.get(STATE_VERSION_KEY) is None:
+            #nothing shared yet: the first reader builds the copy from the (already committed) DB
+            return
+        try:
+            slots = cache.get_many(list(packed_by_slot_key))
+            #two commits can publish out of order: keep whichever state is newer
+            shared = cache.get_many([STATE_KEY % slot for slot in slots.values()])
+            values = {}
+            written = []
+            for key, packed in packed_by_slot_key.items():
+                slot = slots.get(key)
+                if slot is None:
+                    if not packed:
+                        continue
+                    slot = self._allocate(key)
+                elif packed and shared.get(STATE_KEY % slot) and _is_older(packed[2], shared[STATE_KEY % slot][2]):
+                    continue
+                values[STATE_KEY % slot] = packed
+                written.append(slot)
+            if not values:
+                return
+            cache.set_many(values, timeout=None)
+            version = cache.incr(STATE_VERSION_KEY)
+            cache.set(STATE_CHANGES_KEY % version, tuple(written), timeout=STATE_CHANGES_TIMEOUT)
+        except ValueError:
+            #a counter was evicted mid-write: drop the version so the next reader rebuilds
+            cache.delete(STATE_VERSION_KEY)
+
+    @staticmethod
+    def _allocate(slot_key: str) -> int:
+        slot = cache.incr(STATE_SLOTS_KEY)
+        if cache.add(slot_key, slot, timeout=None):
+            return slot
+        #another process gave this drone a slot first: leave ours empty and use theirs
+        cache.set(STATE_KEY % slot, (), timeout=None)
+        return cache.get(slot_key)
+
+    def _changed(self) -> None:
+        self._ordered = None
+        self._positions = None
+
+
+drone_state_store = DroneStateStore()
+
+
+def publish_drone_states(drones: Iterable[Drone], *, update_fields: Optional[Iterable[str]] = None) -> None:
+    """
+    Hand the latest state of saved drones to the store once the current transaction commits.
+    Writes that leave last_seen alone (mark-safe, reclassification) pass update_fields: their
+    rows are read back after the commit, since ingest may have moved the drone past the loaded
+    last_seen and the store would then drop the older state, flags included.
+    """
+    if not state_store_enabled():
+        return
+    if update_fields is not None and "last_seen" not in update_fields:
+        ids = [drone.id for drone in drones]
+        if ids:
+            transaction.on_commit(lambda: drone_state_store.publish(load_drone_states(ids)))
+        return
+    states = [DroneState.from_drone(drone) for drone in drones]
+    if states:
+        transaction.on_commit(lambda: drone_state_store.publish(states))
+
+
+def load_drone_states(ids: Iterable[int]) -> list[DroneState]:
+    return [DroneState(*row) for row in Drone.objects.filter(id__in=ids).values_list(*DRONE_STATE_FIELDS)]
@@ -0,0 +1,278 @@
+import logging
+import math
+import threading
+from array import array
+from collections import OrderedDict, defaultdict
+from typing import Optional, Union
+
+from drones.utils import bounding_box, haversine_km, haversine_km_array
+
+try:
+    import numpy as np
+except ImportError:  # optional: batch lookups fall back to the per-point path
+    np = None
+
+logger = logging.getLogger(__name__)
+
+#zones whose bounding box would cover more cells than this are kept in a small
+#always-checked list instead of being copied into every cell
+MAX_CELLS_PER_ZONE = 4096
+
+#per-cell candidate arrays kept by matches_batch(), least recently used evicted first
+#(a new index is built whenever the zones change, so entries never go stale)
+MAX_CACHED_CELLS = 4096
+
+
+def point_in_polygon(x: float, y: float, xs: array, ys: array) -> bool:
+    """
+    Crossing-number test for a closed ring given as parallel coordinate arrays.
+    x/xs are longitudes, y/ys latitudes; the ring may or may not repeat its first vertex.
+    """
+    inside = False
+    n = len(xs)
+    x1, y1 = xs[n - 1], ys[n - 1]
+    for i in range(n):
+        x2, y2 = xs[i], ys[i]
+        #edge straddles the horizontal ray through the point and crosses it to the right
+        if (y2 > y) != (y1 > y) and x < (x1 - x2) * (y - y2) / (y1 - y2) + x2:
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+
+class CircleZone:
+    __slots__ = ("name", "lat", "lng", "radius_km", "bbox")
+
+    def __init__(self, name: str, lat: float, lng: float, radius_km: float):
+        self.name = name
+        self.lat = lat
+        self.lng = lng
+        self.radius_km = radius_km
+
+        #near the poles or for huge zones the box wraps the globe: no usable bbox.
+        #Otherwise lng bounds may pass ±180; the grid wraps them.
+        bbox = bounding_box(lat, lng, radius_km)
+        self.bbox = None if bbox[2] is None else bbox
+
+    def contains(self, lat: float, lng: float) -> bool:
+        return haversine_km(lat, lng, self.lat, self.lng) <= self.radius_km
+
+    def contains_array(self, lat, lng):
+        """Vectorized contains() over NumPy arrays; returns a bool array."""
+        return haversine_km_array(lat, lng, self.lat, self.lng) <= self.radius_km
+
+
+class PolygonZone:
+    """
+    Polygon precompiled into flat coordinate arrays plus a bounding box.
+    Vertices are [lng, lat] pairs (GeoJSON order) and must not cross the antimeridian.
+    """
+
+    __slots__ = ("name", "xs", "ys", "bbox")
+
+    def __init__(self, name: str, vertices: list):
+        self.name = name
+        self.xs = array("d", (float(v[0]) for v in vertices))
+        self.ys = array("d", (float(v[1]) for v in vertices))
+        self.bbox = (min(self.ys), max(self.ys), min(self.xs), max(self.xs))
+
+    def contains(self, lat: float, lng: float) -> bool:
+        #cheap bbox reject before walking the edges
+        min_lat, max_lat, min_lng, max_lng = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+            return False
+        return point_in_polygon(lng, lat, self.xs, self.ys)
+
+    def contains_array(self, lat, lng):
+        """Vectorized contains(): bbox prefilter, then crossing number over all edges at once."""
+        min_lat, max_lat, min_lng, max_lng = self.bbox
+        result = np.zeros(lat.shape, dtype=bool)
+        in_box = np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng))
+        if not len(in_box):
+            return result
+
+        x, y = lng[in_box], lat[in_box]
+        inside = np.zeros(len(in_box), dtype=bool)
+        n = len(self.xs)
+        x1, y1 = self.xs[n - 1], self.ys[n - 1]
+        #horizontal edges divide by zero, but those edges never straddle the ray anyway
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i in range(n):
+                x2, y2 = self.xs[i], self.ys[i]
+                inside ^= ((y2 > y) != (y1 > y)) & (x < (x1 - x2) * (y - y2) / (y1 - y2) + x2)
+                x1, y1 = x2, y2
+
+        result[in_box] = inside
+        return result
+
+
+CompiledZone = Union[CircleZone, PolygonZone]
+
+
+def compile_zone(zone: dict) -> CompiledZone:
+    """
+    Turn a zone dict (DB values() row or settings entry) into its compiled form.
+    Raises ValueError for zones that can't be tested (missing center/radius, fewer than 3 vertices).
+    """
+    if zone.get("shape") == "polygon" or (zone.get("polygon") and zone.get("shape") is None):
+        vertices = zone.get("polygon") or []
+        if len(vertices) < 3:
+            raise ValueError("polygon needs at least 3 vertices")
+        return PolygonZone(zone["name"], vertices)
+
+    lat, lng, radius_km = zone.get("lat"), zone.get("lng"), zone.get("radius_km")
+    if lat is None or lng is None or radius_km is None:
+        raise ValueError("circle needs lat, lng and radius_km")
+    return CircleZone(zone["name"], float(lat), float(lng), float(radius_km))
+
+
+def compile_zones(zones: list[dict]) -> list[CompiledZone]:
+    """compile_zone() over many zones; invalid ones are logged and skipped so they can't break the rest."""
+    compiled = []
+    for zone in zones:
+        try:
+            compiled.append(compile_zone(zone))
+        except (KeyError, TypeError, ValueError, IndexError) as e:
+            logger.warning("Skipping invalid geofence zone %r: %s", zone.get("name"), e)
+    return compiled
+
+
+class GeofenceIndex:
+    """
+    Uniform lat/lng grid over compiled geofence zones (circles and polygons).
+
+    Each zone is registered in every cell its bounding box touches, so a lookup
+    only runs the exact test on zones sharing the point's cell. Cost per
+    point stays roughly constant no matter how many zones are loaded.
+    """
+
+    def __init__(self, zones: list[dict], cell_deg: float = 0.1):
+        self.zones: list[CompiledZone] = compile_zones(zones)
+        self.cell_deg = cell_deg
+        self._cols = math.ceil(360 / cell_deg)
+        self._cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self._oversized: list[int] = []
+
+        for i, zone in enumerate(self.zones):
+            self._insert(i, zone.bbox)
+
+        self._cells = dict(self._cells)
+        self._cell_cache: OrderedDict = OrderedDict()
+        #the index is shared by every thread of the process (geofence_zone_cache)
+        self._cell_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg) % self._cols
+
+    def _insert(self, i: int, bbox: Optional[tuple[float, float, float, float]]) -> None:
+        if bbox is None:
+            self._oversized.append(i)
+            return
+
+        lat_lo, lat_hi, lng_lo, lng_hi = bbox
+        row_lo = math.floor(lat_lo / self.cell_deg)
+        row_hi = math.floor(lat_hi / self.cell_deg)
+        col_lo = math.floor(lng_lo / self.cell_deg)
+        col_hi = math.floor(lng_hi / self.cell_deg)
+
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > MAX_CELLS_PER_ZONE:
+            self._oversized.append(i)
+            return
+
+        for row in range(row_lo, row_hi + 1):
+            for col in range(col_lo, col_hi + 1):
+                #modulo wraps boxes crossing the antimeridian
+                self._cells[(row, col % self._cols)].append(i)
+
+    def candidates(self, lat: float, lng: float) -> list[CompiledZone]:
+        """Zones whose bounding box may contain the point, in original zone order."""
+        found = self._cells.get(self._cell(lat, lng), [])
+        if self._oversized:
+            found = sorted(set(found).union(self._oversized))
+        return [self.zones[i] for i in found]
+
+    def matches(self, lat: float, lng: float) -> list[CompiledZone]:
+        """Zones that actually contain the point (exact test on candidates only)."""
+        return [zone for zone in self.candidates(lat, lng) if zone.contains(lat, lng)]
+
+    def matches_batch(self, lats, lngs) -> list[list[CompiledZone]]:
+        """
+        matches() for columns of points. Missing coordinates (None/NaN) match nothing.
+
+        With NumPy, points are grouped by grid cell and each candidate zone of a cell
+        is tested against all of that cell's points in one vectorized call.
+        """
+        if np is None:
+            return [
+                self.matches(lat, lng) if lat is not None and lng is not None and lat == lat and lng == lng else []
+                for lat, lng in zip(lats, lngs)
+            ]
+
+        lat = np.asarray(lats, dtype=float)
+        lng = np.asarray(lngs, dtype=float)
+        hits: list[list[int]] = [[] for _ in range(len(lat))]
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lng)))
+        if not self.zones or not len(valid):
+            return [[] for _ in hits]
+
+        rows = np.floor(lat[valid] / self.cell_deg).astype(np.int64)
+        cols = np.floor(lng[valid] / self.cell_deg).astype(np.int64) % self._cols
+        keys = rows * self._cols + cols
+
+        #sort once, then walk runs of equal cell keys
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], len(sorted_keys)]
+
+        for start, end in zip(starts, ends):
+            points = valid[order[start:end]]
+            circles, polygons = self._cell_arrays((int(rows[order[start]]), int(cols[order[start]])))
+            p_lat, p_lng = lat[points], lng[points]
+
+            #all circles of the cell against all its points as one (points x zones) matrix
+            if circles is not None:
+                zone_ids, z_lat, z_lng, z_radius = circles
+                inside = haversine_km_array(p_lat[:, None], p_lng[:, None], z_lat, z_lng) <= z_radius
+                point_pos, zone_pos = np.nonzero(inside)
+                for row, z in zip(points[point_pos].tolist(), zone_pos.tolist()):
+                    hits[row].append(zone_ids[z])
+
+            for i in polygons:
+                for row in points[self.zones[i].contains_array(p_lat, p_lng)].tolist():
+                    hits[row].append(i)
+
+        return [[self.zones[i] for i in sorted(row)] if row else [] for row in hits]
+
+    def _cell_arrays(self, cell: tuple[int, int]):
+        """Candidate zones of a cell split into stacked circle arrays and polygon indices (LRU-memoized)."""
+        with self._cell_lock:
+            cached = self._cell_cache.get(cell)
+            if cached is not None:
+                self._cell_cache.move_to_end(cell)
+                return cached
+
+        found = self._cells.get(cell, [])
+        if self._oversized:
+            found = sorted(set(found).union(self._oversized))
+
+        circle_ids = [i for i in found if isinstance(self.zones[i], CircleZone)]
+        polygons = [i for i in found if not isinstance(self.zones[i], CircleZone)]
+        circles = None
+        if circle_ids:
+            circles = (
+                circle_ids,
+                np.array([self.zones[i].lat for i in circle_ids]),
+                np.array([self.zones[i].lng for i in circle_ids]),
+                np.array([self.zones[i].radius_km for i in circle_ids]),
+            )
+
+        #built outside the lock: two threads missing the same cell just build it twice
+        with self._cell_lock:
+            self._cell_cache[cell] = (circles, polygons)
+            if len(self._cell_cache) > MAX_CACHED_CELLS:
+                self._cell_cache.popitem(last=False)
+        return circles, polygons
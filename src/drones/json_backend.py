@@ -0,0 +1,70 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import orjson
+except ImportError:  # optional: everything falls back to the stdlib json module
+    orjson = None
+
+
+class StdlibJSON:
+    """json module backend. Accepts bytes directly (json.loads detects UTF-8/16/32)."""
+
+    name = "json"
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+    def dumps(self, value: Any, default: Optional[Callable] = None) -> bytes:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=default).encode("utf-8")
+
+
+class OrjsonJSON:
+    """orjson backend: parses bytes without a str copy and encodes straight to bytes."""
+
+    name = "orjson"
+
+    def loads(self, data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, value: Any, default: Optional[Callable] = None) -> bytes:
+        #datetimes go through `default` so the caller controls their format (DRF uses "Z" for UTC);
+        #non-str keys are stringified like json.dumps does
+        return orjson.dumps(
+            value,
+            default=default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+BACKENDS = {"json": StdlibJSON, "orjson": OrjsonJSON}
+
+
+@lru_cache(maxsize=None)
+def _resolve(name: str):
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name not in BACKENDS:
+        raise ImproperlyConfigured(f"Unknown DRONE_JSON_BACKEND {name!r}; expected auto, json or orjson.")
+    if name == "orjson" and orjson is None:
+        raise ImproperlyConfigured("DRONE_JSON_BACKEND='orjson' but orjson is not installed.")
+    return BACKENDS[name]()
+
+
+def get_backend():
+    """The configured backend: DRONE_JSON_BACKEND = auto (orjson if installed) | json | orjson."""
+    return _resolve(getattr(settings, "DRONE_JSON_BACKEND", "auto"))
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode JSON from bytes (or str). Raises ValueError on malformed input with either backend."""
+    return get_backend().loads(data)
+
+
+def dumps(value: Any, default: Optional[Callable] = None) -> bytes:
+    """Compact UTF-8 JSON bytes (no spaces, non-ASCII kept as-is)."""
+    return get_backend().dumps(value, default=default)
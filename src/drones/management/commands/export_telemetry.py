@@ -0,0 +1,59 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from drones.models import DroneTelemetry
+from drones.pagination import parse_time_param
+from drones.telemetry_export import DEFAULT_EXPORT_CHUNK_SIZE, FORMATS, available_formats, default_format, export_chunks
+
+
+def _parse(value, name):
+    # same formats the telemetry endpoints accept for ?from= / ?to=
+    try:
+        return parse_time_param(value, name)
+    except ValueError:
+        raise CommandError(f"Invalid --{name} datetime: {value}")
+
+
+class Command(BaseCommand):
+    help = "Export telemetry to a columnar file (Parquet / Arrow IPC with pyarrow, dtel otherwise)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Output file ('-' writes to stdout).")
+        parser.add_argument("--serial", action="append", default=[], help="Only this drone (repeatable).")
+        parser.add_argument("--from", dest="start", default=None, help="Only points at/after this ISO-8601 datetime.")
+        parser.add_argument("--to", dest="end", default=None, help="Only points before this ISO-8601 datetime.")
+        parser.add_argument("--format", choices=FORMATS, default=None, help="Output format (default: parquet if pyarrow is installed, else dtel).")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_EXPORT_CHUNK_SIZE, help="Rows per read/write chunk.")
+
+    def handle(self, *args, **options):
+        fmt = options.get("format") or default_format()
+        if fmt not in available_formats():
+            raise CommandError(f"Format '{fmt}' needs pyarrow (pip install pyarrow).")
+
+        qs = DroneTelemetry.objects.all()
+        if options.get("serial"):
+            qs = qs.filter(drone__serial__in=options["serial"])
+        if options.get("start"):
+            qs = qs.filter(timestamp__gte=_parse(options["start"], "from"))
+        if options.get("end"):
+            qs = qs.filter(timestamp__lt=_parse(options["end"], "to"))
+
+        output = options["output"]
+        started = time.monotonic()
+        written = 0
+        sink = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            for data in export_chunks(qs, fmt, max(1, options["chunk_size"])):
+                sink.write(data)
+                written += len(data)
+        finally:
+            if sink is not sys.stdout.buffer:
+                sink.close()
+
+        if output != "-":
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                self.style.SUCCESS(f"Exported telemetry: format={fmt} bytes={written} to {output} in {elapsed:.1f}s")
+            )
@@ -0,0 +1,174 @@
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from drones import json_backend
+from drones.services import write_telemetry_batch
+from drones.telemetry_copy import copy_supported
+from drones.telemetry_validation import TelemetryValidationError, validate_telemetry
+
+FORMATS = ("ndjson", "csv")
+
+
+@contextmanager
+def open_text(path: str):
+    """
+    Lines of text from a file path or '-' (stdin); gzip is detected from the magic bytes, not the
+    name. Lines keep their line endings (what csv expects) and are decoded one at a time, so an
+    undecodable or truncated input is reported with its line number.
+    """
+    raw = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        buffered = raw if hasattr(raw, "peek") else io.BufferedReader(raw)
+        if buffered.peek(2)[:2] == b"\x1f\x8b":
+            buffered = gzip.GzipFile(fileobj=buffered)
+        try:
+            yield _decoded_lines(buffered, path)
+        finally:
+            #closing a GzipFile does not close the file it reads from (stdin stays open)
+            if buffered is not raw:
+                buffered.close()
+    finally:
+        if path != "-":
+            raw.close()
+
+
+def _decoded_lines(binary, path: str):
+    number = 0
+    try:
+        for number, line in enumerate(binary, start=1):
+            yield line.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise CommandError(f"{path} line {number}: not valid UTF-8 ({e})")
+    except (OSError, EOFError) as e:
+        #truncated or corrupt gzip stream, I/O error
+        raise CommandError(f"{path} line {number + 1}: cannot read input ({e})")
+
+
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    raise CommandError(f"Cannot tell the format of {path}; pass --format ndjson|csv.")
+
+
+def read_ndjson(stream, reject):
+    """(line_number, record) per non-blank line; lines that are not JSON go to reject()."""
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json_backend.loads(line)
+        except ValueError:
+            reject(number, {"non_field_errors": ["Invalid JSON."]})
+
+
+def read_csv(stream, reject):
+    """(line_number, record) per row; empty cells are left out so optional columns stay optional."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def validate_records(records, reject):
+    """Validated payloads; invalid rows go to reject(line_number, errors)."""
+    for number, record in records:
+        try:
+            yield validate_telemetry(record)
+        except TelemetryValidationError as e:
+            reject(number, e.errors)
+
+
+def batches(items, size: int):
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Bulk import historical telemetry from NDJSON or CSV files (optionally gzip-compressed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Files to import ('-' reads stdin).")
+        parser.add_argument("--format", choices=FORMATS, default=None, help="Input format (default: from the file name).")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk write.")
+        parser.add_argument(
+            "--writer",
+            choices=["auto", "copy", "orm"],
+            default="auto",
+            help="auto = binary COPY on PostgreSQL, bulk_create elsewhere; copy = COPY or fail.",
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=-1,
+            help="Abort once more than N rows are invalid (default: skip invalid rows and keep going).",
+        )
+        parser.add_argument("--progress-every", type=float, default=5.0, help="Seconds between progress lines.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; nothing is written.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        use_copy = {"auto": True, "copy": True, "orm": False}[options["writer"]]
+        if options["writer"] == "copy" and not copy_supported():
+            raise CommandError("--writer copy needs PostgreSQL; use --writer auto or orm.")
+        dry_run = options["dry_run"]
+        progress_every = options["progress_every"]
+
+        started = time.monotonic()
+        last_report = started
+        imported = 0
+        rejected = 0
+        samples: list = []
+
+        def reject(number, detail):
+            nonlocal rejected
+            rejected += 1
+            if len(samples) < 10:
+                samples.append((path, number, detail))
+            if 0 <= options["max_errors"] < rejected:
+                raise CommandError(f"Too many invalid rows (>{options['max_errors']}); last: {path} line {number}: {detail}")
+
+        for path in options["paths"]:
+            fmt = options["format"] or detect_format(path)
+            try:
+                with open_text(path) as stream:
+                    # read -> validate -> batch -> write, one batch in memory at a time
+                    records = read_csv(stream, reject) if fmt == "csv" else read_ndjson(stream, reject)
+                    for batch in batches(validate_records(records, reject), batch_size):
+                        imported += len(batch) if dry_run else write_telemetry_batch(batch, use_copy=use_copy)
+
+                        now = time.monotonic()
+                        if now - last_report >= progress_every:
+                            last_report = now
+                            self.stdout.write(
+                                f"{path}: rows={imported} rejected={rejected} "
+                                f"rows/s={imported / max(now - started, 1e-9):.0f}"
+                            )
+            except OSError as e:
+                #missing or unreadable file (errors while reading are reported with their line)
+                raise CommandError(f"Cannot read {path}: {e}")
+
+        for sample_path, number, detail in samples:
+            self.stderr.write(f"{sample_path} line {number}: {json.dumps(detail)}")
+        if rejected > len(samples):
+            self.stderr.write(f"... and {rejected - len(samples)} more invalid rows")
+
+        elapsed = time.monotonic() - started
+        verb = "Validated" if dry_run else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} telemetry: rows={imported} rejected={rejected} "
+                f"in {elapsed:.1f}s ({imported / max(elapsed, 1e-9):.0f} rows/s)"
+            )
+        )
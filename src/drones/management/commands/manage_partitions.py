@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from drones.partitions import (
+    create_partitions,
+    drop_partitions,
+    existing_partitions,
+    expired_partitions,
+    is_partitioned,
+    partition_interval,
+    planned_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "Pre-create upcoming DroneTelemetry partitions and drop partitions older than the retention window (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=None,
+            help="Future periods to keep created (default: DRONE_TELEMETRY_PARTITIONS_AHEAD).",
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=None,
+            help="Drop partitions entirely older than this many days (default: DRONE_TELEMETRY_RETENTION_DAYS, 0 = keep all).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only print what would be created/dropped.")
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("drones_dronetelemetry is not partitioned (PostgreSQL only, see migration 0006).")
+
+        try:
+            interval = partition_interval()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        ahead = options.get("ahead")
+        if ahead is None:
+            ahead = getattr(settings, "DRONE_TELEMETRY_PARTITIONS_AHEAD", 3)
+        retention_days = options.get("retention_days")
+        if retention_days is None:
+            retention_days = getattr(settings, "DRONE_TELEMETRY_RETENTION_DAYS", 0)
+        dry_run = options.get("dry_run")
+
+        now = timezone.now()
+        planned = planned_partitions(now.date(), ahead, interval)
+        existing = existing_partitions()
+        expired = expired_partitions(existing, now - timedelta(days=retention_days)) if retention_days > 0 else []
+
+        if dry_run:
+            missing = [name for name, _, _ in planned if name not in existing]
+            self.stdout.write(f"Would create: {', '.join(missing) or '-'}")
+            self.stdout.write(f"Would drop: {', '.join(expired) or '-'}")
+            return
+
+        with transaction.atomic():
+            created = create_partitions(planned)
+            drop_partitions(expired)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Partitions: created={len(created)} dropped={len(expired)} interval={interval}")
+        )
+        for name in expired:
+            self.stdout.write(f"Dropped {name}")
@@ -0,0 +1,70 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import F
+
+from drones.models import Drone
+from drones.pagination import parse_time_param
+from drones.services import reclassify_drones
+
+
+def _select_drones(since, serials, workers: int = 1, shard: int = 0):
+    drones = Drone.objects.all()
+    if since is not None:
+        drones = drones.filter(last_seen__gte=since)
+    if serials:
+        drones = drones.filter(serial__in=serials)
+    if workers > 1:
+        # each worker takes every N-th drone id
+        drones = drones.annotate(shard=F("id") % workers).filter(shard=shard)
+    return drones
+
+
+def _run_shard(args) -> tuple[int, int]:
+    since, serials, workers, shard, chunk_size = args
+    try:
+        return reclassify_drones(_select_drones(since, serials, workers, shard), chunk_size=chunk_size)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Re-run danger classification for stored drones from their latest telemetry (e.g. after rule/zone changes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", default=None, help="Only drones seen at/after this ISO-8601 datetime.")
+        parser.add_argument("--serial", action="append", default=[], help="Limit to this serial (repeatable).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--workers", type=int, default=1, help="Parallel processes, each handling a shard of drone ids.")
+
+    def handle(self, *args, **options):
+        since = options.get("since")
+        if since:
+            try:
+                since = parse_time_param(since, "since")
+            except ValueError:
+                raise CommandError(f"Invalid --since datetime: {since}")
+
+        serials = options.get("serial") or []
+        chunk_size = options.get("chunk_size") or 2000
+        workers = max(1, options.get("workers") or 1)
+
+        started = time.monotonic()
+
+        if workers == 1:
+            checked, updated = reclassify_drones(_select_drones(since, serials), chunk_size=chunk_size)
+        else:
+            # never hand an open DB socket to forked children
+            connections.close_all()
+            jobs = [(since, serials, workers, shard, chunk_size) for shard in range(workers)]
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.map(_run_shard, jobs)
+            checked = sum(r[0] for r in results)
+            updated = sum(r[1] for r in results)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Reclassified drones: checked={checked} updated={updated} in {elapsed:.1f}s")
+        )
@@ -0,0 +1,99 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+
+from drones.models import DroneTelemetry, TelemetryRollup
+from drones.pagination import parse_time_param
+from drones.rollups import (
+    DEFAULT_ROLLUP_LAG,
+    compact_rollups,
+    late_ranges,
+    rollup_cursor,
+    rollup_watermark,
+    save_rollup_cursor,
+)
+
+
+def _parse(value, name):
+    # same formats the telemetry endpoints accept for ?from= / ?to=
+    try:
+        return parse_time_param(value, name)
+    except ValueError:
+        raise CommandError(f"Invalid --{name} datetime: {value}")
+
+
+class Command(BaseCommand):
+    help = "Refresh the per-minute and per-hour telemetry rollup tables (run periodically, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            default=None,
+            help="Recompute buckets from this ISO-8601 datetime (default: resume from the newest rollup).",
+        )
+        parser.add_argument("--until", default=None, help="Stop at this ISO-8601 datetime (default: now).")
+        parser.add_argument(
+            "--resolution",
+            action="append",
+            choices=[TelemetryRollup.RESOLUTION_MINUTE, TelemetryRollup.RESOLUTION_HOUR],
+            default=[],
+            help="Only this resolution (repeatable; default: 1m then 1h).",
+        )
+        parser.add_argument(
+            "--lag-minutes",
+            type=float,
+            default=None,
+            help="Also recompute this many minutes behind the newest rollup, for late points "
+                 "(default: DRONE_ROLLUP_LAG_MINUTES, 10).",
+        )
+
+    def handle(self, *args, **options):
+        since = _parse(options["since"], "since") if options.get("since") else None
+        until = _parse(options["until"], "until") if options.get("until") else timezone.now()
+        # hours are built from minutes, so minutes always go first
+        resolutions = [
+            r for r in (TelemetryRollup.RESOLUTION_MINUTE, TelemetryRollup.RESOLUTION_HOUR)
+            if r in (options.get("resolution") or [TelemetryRollup.RESOLUTION_MINUTE, TelemetryRollup.RESOLUTION_HOUR])
+        ]
+
+        lag = options.get("lag_minutes")
+        lag = timedelta(minutes=lag) if lag is not None else timedelta(
+            minutes=getattr(settings, "DRONE_ROLLUP_LAG_MINUTES", DEFAULT_ROLLUP_LAG.total_seconds() / 60)
+        )
+
+        # everything up to this id is covered once the run finishes; read once so rows arriving
+        # during the minute pass are left for the next run of both resolutions
+        upto_id = DroneTelemetry.objects.aggregate(last=Max("id"))["last"]
+        for resolution in resolutions:
+            start = since
+            if start is None:
+                watermark = rollup_watermark(resolution)
+                start = None if watermark is None else min(watermark, until - lag)
+            if start is None:
+                # first run: start at the oldest telemetry
+                start = DroneTelemetry.objects.order_by("timestamp").values_list("timestamp", flat=True).first()
+            if start is None:
+                self.stdout.write(f"No telemetry to roll up ({resolution}).")
+                continue
+
+            started = time.monotonic()
+            written = compact_rollups(resolution, start, until)
+
+            # older buckets that received points since the last run (late MQTT data, imports)
+            cursor = rollup_cursor(resolution)
+            late = late_ranges(resolution, cursor, upto_id, start) if cursor is not None else []
+            for range_start, range_end in late:
+                written += compact_rollups(resolution, range_start, range_end)
+            save_rollup_cursor(resolution, upto_id)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rolled up telemetry: resolution={resolution} rows={written} "
+                    f"late_ranges={len(late)} in {elapsed:.1f}s"
+                )
+            )
@@ -1,17 +1,83 @@
-import json
 import logging
 import os
-import re
 
 import paho.mqtt.client as mqtt
 from django.core.management.base import BaseCommand
 
-from drones.telemetry_in_serializer import TelemetryInSerializer
-from drones.services import ingest_telemetry
+from drones import json_backend
+from drones.telemetry_validation import validate_telemetry
+from drones.services import ingest_telemetry, write_telemetry_batch
+from drones.telemetry_batcher import TelemetryBatcher
+from drones.telemetry_frames import decode_frame, is_frame
+from drones.telemetry_workers import TOPIC_SERIAL_RE, TelemetryWorkerPool
 
 logger = logging.getLogger(__name__)
 
-import os
+
+def decode_message(topic: str, payload: bytes) -> dict:
+    """Parse an MQTT payload into a telemetry dict (not yet validated)."""
+    # bytes go straight to the JSON backend: no intermediate str copy
+    data = json_backend.loads(payload)
+
+    # If publisher doesn't include serial in payload, extract from topic:
+    # thing/product/{serial}/osd
+    if "serial" not in data:
+        m = TOPIC_SERIAL_RE.match(topic)
+        if m:
+            data["serial"] = m.group("serial")
+    return data
+
+
+def decode_samples(topic: str, payload: bytes, content_type: str | None = None) -> list[dict]:
+    """
+    Parse an MQTT payload into one or more telemetry dicts (not yet validated).
+    Binary frames (topic ending in /bin or the frame content type) may carry many samples.
+    """
+    if is_frame(topic, content_type):
+        m = TOPIC_SERIAL_RE.match(topic)
+        return decode_frame(payload, m.group("serial") if m else None)
+    return [decode_message(topic, payload)]
+
+
+def message_content_type(msg) -> str | None:
+    """MQTT 5 content-type property of a message, if any (MQTT 3.1.1 messages have none)."""
+    properties = getattr(msg, "properties", None)
+    return getattr(properties, "ContentType", None) or None
+
+
+def ingest_mqtt_batch(messages: list[tuple]) -> tuple[int, int]:
+    """
+    Decode + validate queued (topic, payload[, content_type]) MQTT messages and bulk ingest the
+    valid samples. Returns (ingested, rejected) sample counts. Module-level so worker processes
+    can run it too.
+    """
+    valid = []
+    rejected = 0
+    for message in messages:
+        topic, payload = message[0], message[1]
+        content_type = message[2] if len(message) > 2 else None
+        try:
+            samples = decode_samples(topic, payload, content_type)
+        except Exception as e:
+            logger.exception("Failed to ingest message on topic %s: %s", topic, e)
+            rejected += 1
+            continue
+
+        for data in samples:
+            try:
+                valid.append(validate_telemetry(data))
+            except Exception as e:
+                logger.exception("Failed to ingest message on topic %s: %s", topic, e)
+                rejected += 1
+
+    if not valid:
+        return 0, rejected
+
+    written = write_telemetry_batch(valid)
+    logger.info("Ingested telemetry batch: rows=%s rejected=%s", written, rejected)
+    return written, rejected
+
+
 class Command(BaseCommand):
     help = "Run MQTT subscriber to ingest drone telemetry"
 
@@ -21,6 +87,45 @@ class Command(BaseCommand):
         parser.add_argument("--topic", default=os.getenv("MQTT_TOPIC", "thing/product/+/osd"))
         parser.add_argument("--username", default=os.getenv("MQTT_USERNAME") or None)
         parser.add_argument("--password", default=os.getenv("MQTT_PASSWORD") or None)
+        parser.add_argument(
+            "--protocol",
+            choices=["3.1.1", "5"],
+            default=os.getenv("MQTT_PROTOCOL", "3.1.1"),
+            help="MQTT protocol version; 5 is needed for content-type based payload selection.",
+        )
+
+        # Micro-batching: 0 keeps the original one-message-at-a-time behaviour
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=int(os.getenv("MQTT_BATCH_SIZE", "0")),
+            help="Queue messages and ingest them in batches of up to N (0 = ingest each message inline).",
+        )
+        parser.add_argument(
+            "--flush-interval-ms",
+            type=int,
+            default=int(os.getenv("MQTT_FLUSH_INTERVAL_MS", "200")),
+            help="Max time a queued message waits before its batch is flushed.",
+        )
+        parser.add_argument(
+            "--queue-size",
+            type=int,
+            default=int(os.getenv("MQTT_QUEUE_SIZE", "10000")),
+            help="Max messages held in memory in batch mode; extra messages are dropped.",
+        )
+
+        # Scaling out: worker processes sharded by serial, and/or a broker-side shared subscription
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=int(os.getenv("MQTT_WORKERS", "0")),
+            help="Ingest in N worker processes; messages are sharded by drone serial to keep per-drone order.",
+        )
+        parser.add_argument(
+            "--share-group",
+            default=os.getenv("MQTT_SHARE_GROUP") or None,
+            help="Subscribe via $share/<group>/<topic> so several run_mqtt instances split the load.",
+        )
 
     def handle(self, *args, **options):
         host = options["host"]
@@ -28,35 +133,42 @@ class Command(BaseCommand):
         topic = options["topic"]
         username = options["username"]
         password = options["password"]
+        batch_size = options.get("batch_size") or 0
+        flush_interval = (options.get("flush_interval_ms") or 200) / 1000
+        queue_size = options.get("queue_size") or 10000
+        workers = options.get("workers") or 0
+        share_group = options.get("share_group")
+        protocol = mqtt.MQTTv5 if options.get("protocol") == "5" else mqtt.MQTTv311
+
+        # Shared subscriptions (MQTT 5 / Mosquitto 2+) let the broker load-balance
+        # across every client in the group; per-drone order then depends on the broker.
+        subscription = f"$share/{share_group}/{topic}" if share_group else topic
 
-        client = mqtt.Client()
+        client = mqtt.Client(protocol=protocol)
 
         if username and password:
             client.username_pw_set(username, password)
 
-        def on_connect(client, userdata, flags, rc):
+        def on_connect(client, userdata, flags, rc, properties=None):
             self.stdout.write(self.style.SUCCESS(f"Connected to MQTT broker {host}:{port}, rc={rc}"))
-            client.subscribe(topic)
-            self.stdout.write(self.style.SUCCESS(f"Subscribed to topic: {topic}"))
+            client.subscribe(subscription)
+            self.stdout.write(self.style.SUCCESS(f"Subscribed to topic: {subscription}"))
 
         def on_message(client, userdata, msg):
-            try:
-                payload = msg.payload.decode("utf-8")
-                data = json.loads(payload)
+            content_type = message_content_type(msg)
+            if is_frame(msg.topic, content_type):
+                # a frame may hold many samples: write them together through the batch path
+                self.ingest_batch([(msg.topic, msg.payload, content_type)])
+                return
 
-                # If publisher doesn't include serial in payload, extract from topic:
-                # thing/product/{serial}/osd
-                if "serial" not in data:
-                    m = re.match(r"^thing/product/(?P<serial>[^/]+)/osd$", msg.topic)
-                    if m:
-                        data["serial"] = m.group("serial")
+            try:
+                data = decode_message(msg.topic, msg.payload)
 
-                # Validate exactly like HTTP endpoint
-                serializer = TelemetryInSerializer(data=data)
-                serializer.is_valid(raise_exception=True)
+                # Validate exactly like HTTP endpoint (same rules as TelemetryInSerializer, without its overhead)
+                validated_data = validate_telemetry(data)
 
                 # Reuse shared business logic
-                drone, telemetry = ingest_telemetry(serializer.validated_data)
+                drone, telemetry = ingest_telemetry(validated_data)
 
                 # Make success visible to testers in terminal
                 self.stdout.write(
@@ -73,9 +185,52 @@ class Command(BaseCommand):
             except Exception as e:
                 logger.exception("Failed to ingest message on topic %s: %s", msg.topic, e)
 
-        client.on_connect = on_connect
-        client.on_message = on_message
+        # Network thread only copies (topic, payload) onto a queue; decoding,
+        # validation and DB writes happen on the batcher thread / worker processes.
+        if workers > 0:
+            runner = TelemetryWorkerPool(
+                ingest_mqtt_batch,
+                workers=workers,
+                batch_size=max(1, batch_size),
+                flush_interval=flush_interval,
+                max_queue=queue_size,
+            )
+        elif batch_size > 0:
+            runner = TelemetryBatcher(
+                self.ingest_batch,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                max_queue=queue_size,
+            )
+        else:
+            runner = None
+
+        def on_message_queued(client, userdata, msg):
+            content_type = message_content_type(msg)
+            runner.submit((msg.topic, msg.payload) if content_type is None else (msg.topic, msg.payload, content_type))
 
-        self.stdout.write(self.style.WARNING("Starting MQTT loop... (Ctrl+C to stop)"))
-        client.connect(host, port, keepalive=60)
-        client.loop_forever()
\ No newline at end of file
+        client.on_connect = on_connect
+        client.on_message = on_message if runner is None else on_message_queued
+
+        if runner is None:
+            self.stdout.write(self.style.WARNING("Starting MQTT loop... (Ctrl+C to stop)"))
+            client.connect(host, port, keepalive=60)
+            client.loop_forever()
+            return
+
+        # start workers before paho spawns any threads
+        runner.start()
+        try:
+            self.stdout.write(self.style.WARNING("Starting MQTT loop... (Ctrl+C to stop)"))
+            client.connect(host, port, keepalive=60)
+            client.loop_forever()
+        finally:
+            # flush what is still queued before exiting
+            runner.stop()
+
+    def ingest_batch(self, messages: list[tuple]) -> None:
+        ingested, rejected = ingest_mqtt_batch(messages)
+        if ingested:
+            self.stdout.write(
+                self.style.SUCCESS(f"Ingested telemetry batch: rows={ingested} rejected={rejected}")
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0002_geofencezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geofencezone',
+            name='polygon',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='geofencezone',
+            name='shape',
+            field=models.CharField(choices=[('circle', 'Circle'), ('polygon', 'Polygon')], default='circle', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='geofencezone',
+            name='lat',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='geofencezone',
+            name='lng',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0003_geofencezone_polygon'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(fields=['last_lat', 'last_lng'], name='drones_dron_last_la_6def48_idx'),
+        ),
+    ]
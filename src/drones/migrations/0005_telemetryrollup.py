@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-17 03:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0004_drone_last_lat_last_lng_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', 'Minute'), ('1h', 'Hour')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('height_count', models.PositiveIntegerField(default=0)),
+                ('height_sum', models.FloatField(default=0.0)),
+                ('min_height_m', models.FloatField(blank=True, null=True)),
+                ('max_height_m', models.FloatField(blank=True, null=True)),
+                ('speed_count', models.PositiveIntegerField(default=0)),
+                ('speed_sum', models.FloatField(default=0.0)),
+                ('min_speed_mps', models.FloatField(blank=True, null=True)),
+                ('max_speed_mps', models.FloatField(blank=True, null=True)),
+                ('last_timestamp', models.DateTimeField()),
+                ('last_lat', models.FloatField()),
+                ('last_lng', models.FloatField()),
+                ('drone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='drones.drone')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'constraints': [models.UniqueConstraint(fields=('drone', 'resolution', 'bucket_start'), name='uniq_telemetry_rollup_bucket')],
+            },
+        ),
+    ]
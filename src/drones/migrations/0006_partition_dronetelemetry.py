@@ -0,0 +1,146 @@
+# Range-partitions drones_dronetelemetry by timestamp on PostgreSQL. Other databases are left alone.
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import migrations
+
+TABLE = "drones_dronetelemetry"
+LEGACY = "drones_dronetelemetry_unpartitioned"
+COLUMNS = '"id", "timestamp", "lat", "lng", "height_m", "horizontal_speed_mps", "drone_id"'
+#defaults for DRONE_TELEMETRY_PARTITIONS_AHEAD (periods created up front after the current one,
+#manage_partitions extends them later) and DRONE_TELEMETRY_PARTITIONS_BACK (periods kept before the
+#current one when older rows exist; anything older, e.g. a device with its clock at 1970, stays in
+#the DEFAULT partition instead of getting a table per period)
+AHEAD = 3
+BACK = 12
+
+
+def _next(start, interval):
+    if interval == "day":
+        return start + timedelta(days=1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def _back(start, periods, interval):
+    if interval == "day":
+        return start - timedelta(days=periods)
+    months = start.year * 12 + start.month - 1 - periods
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def first_period(oldest, today, interval, back=BACK):
+    """Start of the first partition: the oldest row's period, but no more than `back` periods ago."""
+    current = today if interval == "day" else today.replace(day=1)
+    if oldest is None:
+        return current
+    oldest = oldest if interval == "day" else oldest.replace(day=1)
+    return max(oldest, _back(current, back, interval))
+
+
+def _name(start, interval):
+    return f"{TABLE}_p" + start.strftime("%Y_%m_%d" if interval == "day" else "%Y_%m")
+
+
+def _index_defs(cursor, table):
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s",
+        [table, "%_pkey"],
+    )
+    return cursor.fetchall()
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    interval = getattr(settings, "DRONE_TELEMETRY_PARTITION_INTERVAL", "month")
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes = _index_defs(cursor, TABLE)
+        cursor.execute(f'SELECT MIN("timestamp")::date, COALESCE(MAX("id"), 0) FROM "{TABLE}"')
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY}"')
+        cursor.execute(
+            f"""
+            CREATE TABLE "{TABLE}" (
+                "id" bigint NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                "lat" double precision NOT NULL,
+                "lng" double precision NOT NULL,
+                "height_m" double precision NULL,
+                "horizontal_speed_mps" double precision NULL,
+                "drone_id" bigint NOT NULL
+                    REFERENCES "drones_drone" ("id") DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY ("id", "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+            """
+        )
+
+        # one partition per period from the oldest row (at most BACK periods ago) through AHEAD
+        # periods past today; older rows land in the DEFAULT partition
+        today = date.today()
+        start = first_period(oldest, today, interval, getattr(settings, "DRONE_TELEMETRY_PARTITIONS_BACK", BACK))
+        last = today
+        for _ in range(getattr(settings, "DRONE_TELEMETRY_PARTITIONS_AHEAD", AHEAD)):
+            last = _next(last if interval == "day" else last.replace(day=1), interval)
+        while start <= last:
+            end = _next(start, interval)
+            cursor.execute(
+                f'CREATE TABLE "{_name(start, interval)}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            start = end
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" ({COLUMNS}) SELECT {COLUMNS} FROM "{LEGACY}"')
+        # dropping the old table frees its index and identity sequence names for the new ones
+        cursor.execute(f'DROP TABLE "{LEGACY}"')
+
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" START WITH {max_id + 1} OWNED BY "{TABLE}"."id"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN "id" SET DEFAULT nextval(\'"{TABLE}_id_seq"\')')
+        for _, indexdef in indexes:
+            cursor.execute(indexdef)
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes = _index_defs(cursor, TABLE)
+        cursor.execute(f'SELECT COALESCE(MAX("id"), 0) FROM "{TABLE}"')
+        (max_id,) = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY}"')
+        cursor.execute(
+            f"""
+            CREATE TABLE "{TABLE}" (
+                "id" bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+                "timestamp" timestamp with time zone NOT NULL,
+                "lat" double precision NOT NULL,
+                "lng" double precision NOT NULL,
+                "height_m" double precision NULL,
+                "horizontal_speed_mps" double precision NULL,
+                "drone_id" bigint NOT NULL
+                    REFERENCES "drones_drone" ("id") DEFERRABLE INITIALLY DEFERRED
+            )
+            """
+        )
+        cursor.execute(f'INSERT INTO "{TABLE}" ({COLUMNS}) SELECT {COLUMNS} FROM "{LEGACY}"')
+        # drops every partition and the sequence owned by the partitioned id column
+        cursor.execute(f'DROP TABLE "{LEGACY}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN "id" RESTART WITH {max_id + 1}')
+        for _, indexdef in indexes:
+            cursor.execute(indexdef)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0005_telemetryrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
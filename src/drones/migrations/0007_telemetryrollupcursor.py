@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-17 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0006_partition_dronetelemetry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryRollupCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', 'Minute'), ('1h', 'Hour')], max_length=4, unique=True)),
+                ('last_telemetry_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
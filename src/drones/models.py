@@ -26,6 +26,12 @@ class Drone(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            #bounding-box prefilter for nearby queries
+            models.Index(fields=["last_lat", "last_lng"]),
+        ]
+
     def __str__(self) -> str:
         return self.serial
 
@@ -54,11 +60,82 @@ class DroneTelemetry(models.Model):
         ordering = ["timestamp"]
     
 
+class TelemetryRollup(models.Model):
+    #precomputed per-drone stats for one minute or one hour of telemetry,
+    #written by the rollup_telemetry command (see drones.rollups)
+    RESOLUTION_MINUTE = "1m"
+    RESOLUTION_HOUR = "1h"
+    RESOLUTION_CHOICES = [
+        (RESOLUTION_MINUTE, "Minute"),
+        (RESOLUTION_HOUR, "Hour"),
+    ]
+
+    drone = models.ForeignKey(Drone, on_delete=models.CASCADE, related_name="rollups")
+    resolution = models.CharField(max_length=4, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+
+    count = models.PositiveIntegerField(default=0)
+
+    #sums + non-null counts so averages stay exact when rolling minutes up into hours
+    height_count = models.PositiveIntegerField(default=0)
+    height_sum = models.FloatField(default=0.0)
+    min_height_m = models.FloatField(null=True, blank=True)
+    max_height_m = models.FloatField(null=True, blank=True)
+
+    speed_count = models.PositiveIntegerField(default=0)
+    speed_sum = models.FloatField(default=0.0)
+    min_speed_mps = models.FloatField(null=True, blank=True)
+    max_speed_mps = models.FloatField(null=True, blank=True)
+
+    #latest point in the bucket
+    last_timestamp = models.DateTimeField()
+    last_lat = models.FloatField()
+    last_lng = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["drone", "resolution", "bucket_start"], name="uniq_telemetry_rollup_bucket"),
+        ]
+        ordering = ["bucket_start"]
+
+    @property
+    def avg_height_m(self):
+        return self.height_sum / self.height_count if self.height_count else None
+
+    @property
+    def avg_speed_mps(self):
+        return self.speed_sum / self.speed_count if self.speed_count else None
+
+
+class TelemetryRollupCursor(models.Model):
+    #highest DroneTelemetry id already rolled up per resolution; newer ids whose timestamps fall
+    #behind the watermark (late MQTT data, import_telemetry backfills) mark buckets to recompute
+    resolution = models.CharField(max_length=4, choices=TelemetryRollup.RESOLUTION_CHOICES, unique=True)
+    last_telemetry_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.resolution} @ {self.last_telemetry_id}"
+
+
 class GeofenceZone(models.Model):
+    SHAPE_CIRCLE = "circle"
+    SHAPE_POLYGON = "polygon"
+    SHAPE_CHOICES = [
+        (SHAPE_CIRCLE, "Circle"),
+        (SHAPE_POLYGON, "Polygon"),
+    ]
+
     name = models.CharField(max_length=100, unique=True)
-    lat = models.FloatField()
-    lng = models.FloatField()
+    shape = models.CharField(max_length=16, choices=SHAPE_CHOICES, default=SHAPE_CIRCLE)
+
+    #circle zones: center + radius
+    lat = models.FloatField(null=True, blank=True)
+    lng = models.FloatField(null=True, blank=True)
     radius_km = models.FloatField(default=1.0)
 
+    #polygon zones: ring of [lng, lat] pairs (GeoJSON order)
+    polygon = models.JSONField(default=list, blank=True)
+
     def __str__(self):
         return self.name
\ No newline at end of file
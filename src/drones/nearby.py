@@ -0,0 +1,66 @@
+from typing import Optional
+
+from django.db.models import Q
+
+from .models import Drone
+from .utils import bounding_box, haversine_km
+
+#half of Earth's circumference: no two points are further apart than this
+MAX_DISTANCE_KM = 20016.0
+
+#first search radius for k-nearest queries; grown 4x per round until k drones are found
+KNN_INITIAL_RADIUS_KM = 2.0
+
+
+def bounding_box_q(lat: float, lng: float, radius_km: float) -> Q:
+    """Q filter on Drone.last_lat/last_lng for the box around a circle (antimeridian-aware)."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    q = Q(last_lat__gte=min_lat, last_lat__lte=max_lat)
+
+    if min_lng is None:
+        # box wraps the globe (near a pole): latitude band only
+        return q
+    if min_lng < -180:
+        return q & (Q(last_lng__gte=min_lng + 360) | Q(last_lng__lte=max_lng))
+    if max_lng > 180:
+        return q & (Q(last_lng__gte=min_lng) | Q(last_lng__lte=max_lng - 360))
+    return q & Q(last_lng__gte=min_lng, last_lng__lte=max_lng)
+
+
+def drones_within(lat: float, lng: float, radius_km: float) -> list[tuple[float, Drone]]:
+    """
+    (distance_km, drone) for drones within radius_km, nearest first.
+    The bounding box runs in SQL on the (last_lat, last_lng) index; haversine only on candidates.
+    """
+    candidates = (
+        Drone.objects.exclude(last_lat__isnull=True)
+        .exclude(last_lng__isnull=True)
+        .filter(bounding_box_q(lat, lng, radius_km))
+    )
+
+    found = []
+    for drone in candidates:
+        distance = haversine_km(lat, lng, drone.last_lat, drone.last_lng)
+        if distance <= radius_km:
+            found.append((distance, drone))
+
+    found.sort(key=lambda pair: (pair[0], pair[1].serial))
+    return found
+
+
+def nearest_drones(lat: float, lng: float, k: int, *, radius_km: Optional[float] = None) -> list[tuple[float, Drone]]:
+    """
+    The k drones closest to (lat, lng), optionally no further than radius_km.
+
+    Searches an expanding circle through drones_within(): once a circle of radius r holds
+    at least k drones, every closer drone is inside it too, so the first k are exact.
+    Dense areas finish after one small indexed query instead of measuring every drone.
+    """
+    limit = MAX_DISTANCE_KM if radius_km is None else radius_km
+    search = min(KNN_INITIAL_RADIUS_KM, limit)
+
+    while True:
+        found = drones_within(lat, lng, search)
+        if len(found) >= k or search >= limit:
+            return found[:k]
+        search = min(search * 4, limit)
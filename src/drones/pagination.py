@@ -0,0 +1,69 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+
+def encode_cursor(timestamp: datetime, pk: int) -> str:
+    """Opaque cursor for the row (timestamp, id) a page ended on."""
+    raw = f"{timestamp.isoformat()}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor(); raises ValueError for anything it did not produce."""
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        parsed = parse_datetime(timestamp)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor.")
+    if parsed is None:
+        raise ValueError("Invalid cursor.")
+    return parsed, pk
+
+
+def parse_time_param(value: str | None, name: str) -> datetime | None:
+    """ISO-8601 query param -> aware datetime (naive values use the current time zone)."""
+    if value is None:
+        return None
+    # '+' in an unencoded query string arrives as a space
+    parsed = parse_datetime(value.replace(" ", "+"))
+    if parsed is None:
+        raise ValueError(f"Query parameter '{name}' must be an ISO-8601 datetime.")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def parse_page_size(value: str | None) -> int:
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Query parameter 'limit' must be a positive integer.")
+    if size < 1:
+        raise ValueError("Query parameter 'limit' must be a positive integer.")
+    return min(size, MAX_PAGE_SIZE)
+
+
+def after_cursor(qs: QuerySet, cursor: str | None) -> QuerySet:
+    """
+    Rows strictly after the cursor in (timestamp, id) order.
+    Seeks on the (drone, timestamp) index instead of OFFSET, so page N costs the same as page 1.
+    """
+    if not cursor:
+        return qs
+    timestamp, pk = decode_cursor(cursor)
+    return qs.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk))
+
+
+def next_page_link(request, last_row) -> str:
+    """Absolute URL of the next page, keeping every other query param (from/to/limit)."""
+    url = request.build_absolute_uri()
+    return replace_query_param(url, "cursor", encode_cursor(last_row.timestamp, last_row.id))
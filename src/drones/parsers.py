@@ -0,0 +1,66 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from . import json_backend
+
+
+class MalformedLine:
+    """Placeholder for an NDJSON line that is not valid JSON, so it can be reported per item."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON body -> list of decoded lines (blank lines skipped).
+    Lines end at "\n" (optionally preceded by "\r") and nowhere else: U+2028, U+0085 and friends
+    are legal unescaped inside JSON strings, so str.splitlines() would cut records in two.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", "utf-8")
+        body = stream.read()
+        if encoding.lower().replace("-", "") == "utf8":
+            #"\n" never occurs inside a multi-byte UTF-8 sequence, and both backends take bytes
+            lines = body.split(b"\n")
+        else:
+            try:
+                lines = body.decode(encoding).split("\n")
+            except UnicodeDecodeError as e:
+                raise ParseError(f"NDJSON parse error - {e}")
+
+        items = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json_backend.loads(line))
+            except ValueError as e:
+                items.append(MalformedLine(f"Invalid JSON: {e}"))
+        return items
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that hands the raw UTF-8 body to the configured JSON backend (orjson when installed).
+    Other charsets, and the stdlib backend, take DRF's own path.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", "utf-8")
+        backend = json_backend.get_backend()
+        if backend.name == "json" or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return backend.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,154 @@
+"""
+Range partitioning of drones_dronetelemetry by timestamp (PostgreSQL only).
+
+Migration 0006 turns the table into a partitioned parent with one child per day or month
+(DRONE_TELEMETRY_PARTITION_INTERVAL) plus a DEFAULT partition for stray timestamps.
+The manage_partitions command keeps future partitions created ahead of time and applies
+retention by dropping whole partitions, which is instant compared to DELETE + VACUUM.
+"""
+import re
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+
+TABLE = "drones_dronetelemetry"
+DEFAULT_PARTITION = f"{TABLE}_default"
+COLUMNS = '"id", "timestamp", "lat", "lng", "height_m", "horizontal_speed_mps", "drone_id"'
+INTERVALS = ("day", "month")
+
+PARTITION_RE = re.compile(rf"^{TABLE}_p(?P<year>\d{{4}})_(?P<month>\d{{2}})(?:_(?P<day>\d{{2}}))?$")
+
+
+def partition_interval() -> str:
+    interval = getattr(settings, "DRONE_TELEMETRY_PARTITION_INTERVAL", "month")
+    if interval not in INTERVALS:
+        raise ValueError(f"DRONE_TELEMETRY_PARTITION_INTERVAL must be one of {INTERVALS}, got {interval!r}")
+    return interval
+
+
+def period_start(day: date, interval: str) -> date:
+    return day if interval == "day" else day.replace(day=1)
+
+
+def next_period(start: date, interval: str) -> date:
+    if interval == "day":
+        return start + timedelta(days=1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(start: date, interval: str) -> str:
+    suffix = start.strftime("%Y_%m_%d" if interval == "day" else "%Y_%m")
+    return f"{TABLE}_p{suffix}"
+
+
+def parse_partition_name(name: str):
+    """(start, end) dates covered by a partition created here, or None for anything else."""
+    m = PARTITION_RE.match(name)
+    if not m:
+        return None
+    year, month = int(m.group("year")), int(m.group("month"))
+    if m.group("day"):
+        start = date(year, month, int(m.group("day")))
+        return start, next_period(start, "day")
+    start = date(year, month, 1)
+    return start, next_period(start, "month")
+
+
+def planned_partitions(today: date, ahead: int, interval: str) -> list[tuple[str, date, date]]:
+    """The current period plus `ahead` future ones as (name, start, end)."""
+    start = period_start(today, interval)
+    planned = []
+    for _ in range(ahead + 1):
+        end = next_period(start, interval)
+        planned.append((partition_name(start, interval), start, end))
+        start = end
+    return planned
+
+
+def expired_partitions(names: list[str], cutoff: datetime) -> list[str]:
+    """Partitions whose whole range lies before cutoff (never the DEFAULT partition)."""
+    expired = []
+    for name in names:
+        bounds = parse_partition_name(name)
+        if bounds is not None and bounds[1] <= cutoff.date():
+            expired.append(name)
+    return sorted(expired)
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def existing_partitions() -> list[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [TABLE],
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def create_partitions(planned: list[tuple[str, date, date]]) -> list[str]:
+    """
+    CREATE TABLE ... PARTITION OF for every planned partition that does not exist yet.
+    Rows already sitting in the DEFAULT partition for a new range are moved into it (PostgreSQL
+    refuses to create the partition otherwise). Call inside a transaction.
+    """
+    existing = set(existing_partitions())
+    missing = [(name, start, end) for name, start, end in planned if name not in existing]
+    if not missing:
+        return []
+
+    with connection.cursor() as cursor:
+        stray = []
+        if DEFAULT_PARTITION in existing:
+            stray = [(name, start, end) for name, start, end in missing if _default_has_rows(cursor, start, end)]
+        if stray:
+            #the DEFAULT partition is detached while the rows move, so it can't hold the new ranges
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{DEFAULT_PARTITION}"')
+
+        for name, start, end in missing:
+            # bounds are dates we generated, and DDL cannot take bind parameters
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+
+        if stray:
+            for name, start, end in stray:
+                cursor.execute(
+                    f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= %s AND "timestamp" < %s '
+                    f'RETURNING {COLUMNS}) INSERT INTO "{name}" ({COLUMNS}) SELECT {COLUMNS} FROM moved',
+                    [start, end],
+                )
+            cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT')
+    return [name for name, _, _ in missing]
+
+
+def _default_has_rows(cursor, start: date, end: date) -> bool:
+    cursor.execute(
+        f'SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= %s AND "timestamp" < %s LIMIT 1',
+        [start, end],
+    )
+    return cursor.fetchone() is not None
+
+
+def drop_partitions(names: list[str]) -> None:
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
@@ -0,0 +1,29 @@
+from rest_framework.renderers import JSONRenderer
+
+from . import json_backend
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding through the configured JSON backend (orjson when installed).
+
+    Output matches DRF's compact renderer: values orjson can't encode natively (Decimal,
+    datetime, lazy strings, sets...) go through DRF's own encoder; NaN/Infinity become null
+    instead of raising. Indented responses
+    (e.g. `Accept: application/json; indent=2`) and the stdlib backend use DRF's path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        backend = json_backend.get_backend()
+        renderer_context = renderer_context or {}
+        if backend.name == "json" or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = backend.dumps(data, default=self.encoder_class().default)
+        #same as DRF: escape the two line separators that are valid JSON but not valid JavaScript
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
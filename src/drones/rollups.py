@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+
+from .aggregates import EPOCH, EpochBucket, bucket_start
+from .models import DroneTelemetry, TelemetryRollup, TelemetryRollupCursor
+
+ROLLUP_SECONDS = {
+    TelemetryRollup.RESOLUTION_MINUTE: 60,
+    TelemetryRollup.RESOLUTION_HOUR: 3600,
+}
+
+#time window recomputed per pass; bounds the GROUP BY result held in memory
+ROLLUP_SLICE = {
+    TelemetryRollup.RESOLUTION_MINUTE: timedelta(hours=1),
+    TelemetryRollup.RESOLUTION_HOUR: timedelta(days=1),
+}
+
+#how far behind the watermark every incremental run recomputes, for points that arrive a little late
+DEFAULT_ROLLUP_LAG = timedelta(minutes=10)
+
+#max values in one "timestamp IN (...)" lookup (SQLite caps query parameters)
+LOOKUP_CHUNK = 500
+
+UPDATE_FIELDS = [
+    "count",
+    "height_count", "height_sum", "min_height_m", "max_height_m",
+    "speed_count", "speed_sum", "min_speed_mps", "max_speed_mps",
+    "last_timestamp", "last_lat", "last_lng",
+]
+
+
+def floor_time(value: datetime, seconds: int) -> datetime:
+    return bucket_start(int((value - EPOCH).total_seconds() // seconds), seconds)
+
+
+def _minute_groups(start: datetime, end: datetime):
+    """Raw telemetry -> one stats row per (drone, minute)."""
+    source = DroneTelemetry.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    groups = (
+        source.annotate(bucket=EpochBucket("timestamp", 60))
+        .order_by()
+        .values("drone_id", "bucket")
+        .annotate(
+            count=Count("id"),
+            height_count=Count("height_m"),
+            height_sum=Sum("height_m"),
+            min_height_m=Min("height_m"),
+            max_height_m=Max("height_m"),
+            speed_count=Count("horizontal_speed_mps"),
+            speed_sum=Sum("horizontal_speed_mps"),
+            min_speed_mps=Min("horizontal_speed_mps"),
+            max_speed_mps=Max("horizontal_speed_mps"),
+            last_timestamp=Max("timestamp"),
+        )
+    )
+    return groups, source, ("timestamp", "lat", "lng")
+
+
+def _hour_groups(start: datetime, end: datetime):
+    """Minute rollups -> one stats row per (drone, hour); never touches raw telemetry."""
+    source = TelemetryRollup.objects.filter(
+        resolution=TelemetryRollup.RESOLUTION_MINUTE, bucket_start__gte=start, bucket_start__lt=end
+    )
+    groups = (
+        source.annotate(bucket=EpochBucket("bucket_start", 3600))
+        .order_by()
+        .values("drone_id", "bucket")
+        .annotate(
+            count=Sum("count"),
+            height_count=Sum("height_count"),
+            height_sum=Sum("height_sum"),
+            min_height_m=Min("min_height_m"),
+            max_height_m=Max("max_height_m"),
+            speed_count=Sum("speed_count"),
+            speed_sum=Sum("speed_sum"),
+            min_speed_mps=Min("min_speed_mps"),
+            max_speed_mps=Max("max_speed_mps"),
+            last_timestamp=Max("last_timestamp"),
+        )
+    )
+    return groups, source, ("last_timestamp", "last_lat", "last_lng")
+
+
+def _last_positions(source, fields, groups) -> dict:
+    """(drone_id, timestamp) -> (lat, lng) of each group's latest row (highest id wins ties)."""
+    time_field = fields[0]
+    timestamps = sorted({g["last_timestamp"] for g in groups})
+    positions = {}
+    for i in range(0, len(timestamps), LOOKUP_CHUNK):
+        rows = (
+            source.filter(**{f"{time_field}__in": timestamps[i:i + LOOKUP_CHUNK]})
+            .order_by(time_field, "id")
+            .values_list("drone_id", *fields)
+        )
+        for drone_id, ts, lat, lng in rows:
+            positions[(drone_id, ts)] = (lat, lng)
+    return positions
+
+
+def rollup_window(resolution: str, start: datetime, end: datetime) -> int:
+    """
+    Recompute every `resolution` bucket in [start, end) and upsert it. Returns rows written.
+    start/end should sit on bucket boundaries; recomputing is idempotent, so overlapping runs are safe.
+    """
+    seconds = ROLLUP_SECONDS[resolution]
+    build = _minute_groups if resolution == TelemetryRollup.RESOLUTION_MINUTE else _hour_groups
+    groups, source, fields = build(start, end)
+    groups = list(groups)
+    if not groups:
+        return 0
+
+    positions = _last_positions(source, fields, groups)
+    rows = [
+        TelemetryRollup(
+            drone_id=g["drone_id"],
+            resolution=resolution,
+            bucket_start=bucket_start(g["bucket"], seconds),
+            count=g["count"],
+            height_count=g["height_count"] or 0,
+            height_sum=g["height_sum"] or 0.0,
+            min_height_m=g["min_height_m"],
+            max_height_m=g["max_height_m"],
+            speed_count=g["speed_count"] or 0,
+            speed_sum=g["speed_sum"] or 0.0,
+            min_speed_mps=g["min_speed_mps"],
+            max_speed_mps=g["max_speed_mps"],
+            last_timestamp=g["last_timestamp"],
+            last_lat=positions[(g["drone_id"], g["last_timestamp"])][0],
+            last_lng=positions[(g["drone_id"], g["last_timestamp"])][1],
+        )
+        for g in groups
+    ]
+
+    with transaction.atomic():
+        TelemetryRollup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["drone", "resolution", "bucket_start"],
+            update_fields=UPDATE_FIELDS,
+        )
+    return len(rows)
+
+
+def rollup_watermark(resolution: str):
+    """Where an incremental run resumes: the newest bucket already written (it may still be filling up)."""
+    return (
+        TelemetryRollup.objects.filter(resolution=resolution)
+        .order_by("-bucket_start")
+        .values_list("bucket_start", flat=True)
+        .first()
+    )
+
+
+def compact_rollups(resolution: str, start: datetime, end: datetime) -> int:
+    """rollup_window() over [start, end) in slices, widened to whole buckets. Returns rows written."""
+    seconds = ROLLUP_SECONDS[resolution]
+    step = ROLLUP_SLICE[resolution]
+    current = floor_time(start, seconds)
+    written = 0
+    while current < end:
+        written += rollup_window(resolution, current, current + step)
+        current += step
+    return written
+
+
+def rollup_cursor(resolution: str):
+    """Highest telemetry id covered by the last run (None before the first tracked run)."""
+    return (
+        TelemetryRollupCursor.objects.filter(resolution=resolution)
+        .values_list("last_telemetry_id", flat=True)
+        .first()
+    )
+
+
+def save_rollup_cursor(resolution: str, last_telemetry_id: int) -> None:
+    TelemetryRollupCursor.objects.update_or_create(
+        resolution=resolution, defaults={"last_telemetry_id": last_telemetry_id}
+    )
+
+
+def late_ranges(resolution: str, after_id: int, upto_id: int, before: datetime) -> list[tuple[datetime, datetime]]:
+    """
+    [start, end) runs of consecutive buckets older than `before` that received telemetry with
+    after_id < id <= upto_id since the last run (late MQTT data, backfills).
+    """
+    seconds = ROLLUP_SECONDS[resolution]
+    buckets = (
+        DroneTelemetry.objects.filter(id__gt=after_id, id__lte=upto_id, timestamp__lt=before)
+        .annotate(bucket=EpochBucket("timestamp", seconds))
+        .order_by("bucket")
+        .values_list("bucket", flat=True)
+        .distinct()
+    )
+
+    ranges: list[list[int]] = []
+    for bucket in buckets:
+        bucket = int(bucket)
+        if ranges and bucket == ranges[-1][1]:
+            ranges[-1][1] = bucket + 1
+        else:
+            ranges.append([bucket, bucket + 1])
+    return [(bucket_start(lo, seconds), bucket_start(hi, seconds)) for lo, hi in ranges]
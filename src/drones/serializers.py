@@ -29,7 +29,59 @@ class DroneSerializer(serializers.ModelSerializer):
         ]
 
 
+class NearbyDroneSerializer(DroneSerializer):
+    # set on each instance by NearbyDroneListView
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(DroneSerializer.Meta):
+        fields = DroneSerializer.Meta.fields + ["distance_km"]
+
+
 class GeofenceZoneSerializer(serializers.ModelSerializer):
+    # explicitly tell OpenAPI it's an array of [lng, lat] pairs
+    polygon = serializers.ListField(
+        child=serializers.ListField(child=serializers.FloatField(), min_length=2, max_length=2),
+        required=False,
+        allow_empty=True,
+    )
+
     class Meta:
         model = GeofenceZone
-        fields = ["id", "name", "lat", "lng", "radius_km"]
\ No newline at end of file
+        fields = ["id", "name", "shape", "lat", "lng", "radius_km", "polygon"]
+
+    def validate(self, attrs):
+        # on PUT/PATCH fall back to the stored values for anything not sent
+        def value(field):
+            if field in attrs:
+                return attrs[field]
+            return getattr(self.instance, field, None)
+
+        shape = value("shape") or GeofenceZone.SHAPE_CIRCLE
+
+        if shape == GeofenceZone.SHAPE_POLYGON:
+            polygon = value("polygon") or []
+            if len(polygon) < 3:
+                raise serializers.ValidationError({"polygon": "A polygon zone needs at least 3 [lng, lat] vertices."})
+            for lng, lat in polygon:
+                if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+                    raise serializers.ValidationError({"polygon": "Vertices must be [lng, lat] within valid ranges."})
+        else:
+            errors = {f: "This field is required for circle zones." for f in ("lat", "lng") if value(f) is None}
+            if errors:
+                raise serializers.ValidationError(errors)
+
+        return attrs
+
+class TelemetryBucketSerializer(serializers.Serializer):
+    # one time bucket of aggregated telemetry (see drones.aggregates)
+    bucket_start = serializers.DateTimeField()
+    count = serializers.IntegerField()
+    min_height_m = serializers.FloatField(allow_null=True)
+    max_height_m = serializers.FloatField(allow_null=True)
+    avg_height_m = serializers.FloatField(allow_null=True)
+    min_speed_mps = serializers.FloatField(allow_null=True)
+    max_speed_mps = serializers.FloatField(allow_null=True)
+    avg_speed_mps = serializers.FloatField(allow_null=True)
+    last_timestamp = serializers.DateTimeField()
+    last_lat = serializers.FloatField(allow_null=True)
+    last_lng = serializers.FloatField(allow_null=True)
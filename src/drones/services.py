@@ -1,6 +1,19 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
 from .models import Drone, DroneTelemetry
 from .danger_strategies import default_classifier
+from .drone_state import DRONE_STATE_FIELDS, publish_drone_states, state_store_enabled
+from .telemetry_copy import copy_supported, copy_telemetry_batch, use_copy_writer
+
+#fields written when a drone's latest state is refreshed from telemetry
+LATEST_STATE_FIELDS = [
+    "last_seen",
+    "last_lat",
+    "last_lng",
+    "is_dangerous",
+    "danger_reasons",
+]
 
 #what this does: takes validated telemetry data (already validated by TelemetryInSerializer), writes DroneTelemetry, 
 #updates Drone latest state + danger classification, and returns (drone, telemetry).
@@ -61,14 +74,175 @@ def ingest_telemetry(validated_data: dict) -> tuple[Drone, DroneTelemetry]:
     drone.last_lat = validated_data["lat"]
     drone.last_lng = validated_data["lng"]
 
-    drone.save(
-        update_fields=[
-            "last_seen",
-            "last_lat",
-            "last_lng",
-            "is_dangerous",
-            "danger_reasons",
-        ]
+    drone.save(update_fields=LATEST_STATE_FIELDS)
+
+    return drone, telemetry
+
+def ingest_telemetry_batch(validated_items: list[dict]) -> list[tuple[Drone, DroneTelemetry]]:
+    """
+    Bulk version of ingest_telemetry() for many validated telemetry payloads.
+
+    Resolves every serial in one query, bulk-creates missing drones and all
+    telemetry rows, and folds each drone's newest point into a single
+    bulk_update (skipped for drones whose stored latest state is newer).
+    Returns (drone, telemetry) pairs in the same order as the input.
+    """
+    if not validated_items:
+        return []
+
+    now = timezone.now()
+    serials = {item["serial"] for item in validated_items}
+
+    with transaction.atomic():
+        #one SELECT for every drone in the batch instead of one get_or_create per message
+        drones = Drone.objects.in_bulk(serials, field_name="serial")
+
+        missing = serials - drones.keys()
+        if missing:
+            #ignore_conflicts so a concurrent writer creating the same serial doesn't fail the batch,
+            #then re-read the missing serials to get their primary keys
+            Drone.objects.bulk_create([Drone(serial=s) for s in missing], ignore_conflicts=True)
+            drones.update(Drone.objects.in_bulk(missing, field_name="serial"))
+
+        #build the classifier once for the whole batch
+        classifier = default_classifier()
+
+        telemetry_rows: list[DroneTelemetry] = []
+        latest: dict[str, tuple] = {}
+
+        for item in validated_items:
+            drone = drones[item["serial"]]
+            timestamp = item.get("timestamp") or now
+
+            telemetry_rows.append(
+                DroneTelemetry(
+                    drone=drone,
+                    timestamp=timestamp,
+                    lat=item["lat"],
+                    lng=item["lng"],
+                    height_m=item.get("height_m"),
+                    horizontal_speed_mps=item.get("horizontal_speed_mps"),
+                )
+            )
+
+            #keep only the newest point per drone; on equal timestamps the later message wins,
+            #which matches what sequential ingest_telemetry() calls would leave behind
+            previous = latest.get(drone.serial)
+            if previous is None or timestamp >= previous[0]:
+                latest[drone.serial] = (timestamp, item)
+
+        DroneTelemetry.objects.bulk_create(telemetry_rows)
+
+        #historical points (imports, replays) never move a drone backwards: like the COPY writer's
+        #upsert, the latest state only changes when the batch's newest point is at least as new
+        latest = {
+            serial: (timestamp, item)
+            for serial, (timestamp, item) in latest.items()
+            if drones[serial].last_seen is None or timestamp >= drones[serial].last_seen
+        }
+
+        #danger classification for every drone's newest point in one columnar call
+        newest = [item for _, item in latest.values()]
+        batch_reasons = classifier.classify_batch(
+            height_m=[item.get("height_m") for item in newest],
+            horizontal_speed_mps=[item.get("horizontal_speed_mps") for item in newest],
+            lat=[item["lat"] for item in newest],
+            lng=[item["lng"] for item in newest],
+        )
+
+        #latest state, one UPDATE statement for the whole batch
+        changed: list[Drone] = []
+        for (serial, (timestamp, item)), reasons in zip(latest.items(), batch_reasons):
+            drone = drones[serial]
+            drone.is_dangerous = len(reasons) > 0
+            drone.danger_reasons = reasons
+            drone.last_seen = timestamp
+            drone.last_lat = item["lat"]
+            drone.last_lng = item["lng"]
+            changed.append(drone)
+
+        if changed:
+            Drone.objects.bulk_update(changed, LATEST_STATE_FIELDS)
+            publish_drone_states(changed)
+
+    return [(row.drone, row) for row in telemetry_rows]
+
+
+
+def write_telemetry_batch(validated_items: list[dict], *, use_copy: bool | None = None) -> int:
+    """
+    Store a batch of validated telemetry and return how many rows were written.
+    Uses the binary COPY writer on PostgreSQL when DRONE_TELEMETRY_COPY is on (or use_copy=True),
+    ingest_telemetry_batch() otherwise.
+    """
+    if use_copy_writer() if use_copy is None else (use_copy and copy_supported()):
+        written = copy_telemetry_batch(validated_items)
+        #the COPY writer reconciles drones in SQL: read back what it left behind
+        if state_store_enabled():
+            serials = {item["serial"] for item in validated_items}
+            publish_drone_states(Drone.objects.filter(serial__in=serials).only(*DRONE_STATE_FIELDS))
+        return written
+    return len(ingest_telemetry_batch(validated_items))
+
+
+def reclassify_drones(drones=None, *, chunk_size: int = 2000) -> tuple[int, int]:
+    """
+    Re-run danger classification for drones from their latest stored telemetry point,
+    e.g. after thresholds or geofence zones changed. Returns (checked, updated).
+
+    `drones` is an optional Drone queryset to restrict the run (serial, last_seen, ...).
+    Drones are streamed with .iterator() (a server-side cursor on PostgreSQL), their
+    latest telemetry ids come from a per-drone subquery on the (drone, timestamp)
+    index, and each chunk is classified in one classify_batch() call and written with
+    a single bulk_update of the drones whose flags actually changed.
+    """
+    drones = Drone.objects.all() if drones is None else drones
+    latest_id = (
+        DroneTelemetry.objects.filter(drone=OuterRef("pk"))
+        .order_by("-timestamp", "-id")
+        .values("id")[:1]
+    )
+    rows = (
+        drones.annotate(latest_telemetry_id=Subquery(latest_id))
+        .filter(latest_telemetry_id__isnull=False)
+        .order_by("id")
+        .only("id", "is_dangerous", "danger_reasons")
+        .iterator(chunk_size=chunk_size)
     )
 
-    return drone, telemetry
\ No newline at end of file
+    classifier = default_classifier()
+    checked = updated = 0
+    chunk: list[Drone] = []
+
+    def flush(chunk: list[Drone]) -> int:
+        points = DroneTelemetry.objects.in_bulk([d.latest_telemetry_id for d in chunk])
+        latest = [points[d.latest_telemetry_id] for d in chunk]
+        batch_reasons = classifier.classify_batch(
+            height_m=[t.height_m for t in latest],
+            horizontal_speed_mps=[t.horizontal_speed_mps for t in latest],
+            lat=[t.lat for t in latest],
+            lng=[t.lng for t in latest],
+        )
+
+        changed = []
+        for drone, reasons in zip(chunk, batch_reasons):
+            if drone.danger_reasons != reasons or drone.is_dangerous != bool(reasons):
+                drone.is_dangerous = bool(reasons)
+                drone.danger_reasons = reasons
+                changed.append(drone)
+        Drone.objects.bulk_update(changed, ["is_dangerous", "danger_reasons"])
+        publish_drone_states(changed, update_fields=["is_dangerous", "danger_reasons"])
+        return len(changed)
+
+    for drone in rows:
+        chunk.append(drone)
+        if len(chunk) >= chunk_size:
+            checked += len(chunk)
+            updated += flush(chunk)
+            chunk = []
+
+    if chunk:
+        checked += len(chunk)
+        updated += flush(chunk)
+
+    return checked, updated
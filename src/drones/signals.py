@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from drones.danger_strategies import geofence_zone_cache
+from drones.drone_state import STATE_VERSION_KEY, drone_state_store, publish_drone_states, state_store_enabled
+from drones.models import Drone, GeofenceZone
+
+
+@receiver(post_save, sender=GeofenceZone)
+@receiver(post_delete, sender=GeofenceZone)
+def invalidate_geofence_zones(sender, **kwargs):
+    # drop now so this process sees its own write, and again once committed so
+    # other processes can't have re-cached the pre-commit rows in between
+    geofence_zone_cache.invalidate()
+    transaction.on_commit(geofence_zone_cache.invalidate)
+
+
+@receiver(setting_changed)
+def invalidate_geofence_zones_on_settings(sender, setting, **kwargs):
+    # settings fallback zones (mostly override_settings in tests)
+    if setting in ("DRONE_GEOFENCE_ZONES", "NO_FLY_ZONES"):
+        geofence_zone_cache.invalidate(broadcast=False)
+
+
+@receiver(post_save, sender=Drone)
+def publish_drone_state(sender, instance, using, update_fields=None, **kwargs):
+    # ingest_telemetry, MarkDroneSafeView, admin edits...; bulk writers publish themselves
+    if using == DEFAULT_DB_ALIAS:
+        publish_drone_states([instance], update_fields=update_fields)
+
+
+@receiver(post_delete, sender=Drone)
+def remove_drone_state(sender, instance, using, **kwargs):
+    if using == DEFAULT_DB_ALIAS and state_store_enabled():
+        drone_id = instance.id
+        transaction.on_commit(lambda: drone_state_store.remove(drone_id))
+
+
+@receiver(setting_changed)
+def reset_drone_state_on_settings(sender, setting, **kwargs):
+    # mostly override_settings in tests: start again from the database
+    if setting == "DRONE_STATE_STORE":
+        drone_state_store.reset()
+        cache.delete(STATE_VERSION_KEY)
@@ -0,0 +1,85 @@
+import heapq
+import math
+from typing import Optional, Sequence
+
+from drones.utils import KM_PER_DEG
+
+try:
+    import numpy as np
+except ImportError:  # optional: simplification falls back to pure Python
+    np = None
+
+M_PER_DEG = KM_PER_DEG * 1000
+
+
+def _project(coordinates: Sequence[Sequence[float]]):
+    """[lng, lat] pairs -> local equirectangular x/y in metres (plenty accurate over a flight's extent)."""
+    lat0 = sum(c[1] for c in coordinates) / len(coordinates)
+    kx = M_PER_DEG * math.cos(math.radians(lat0))
+    if np is not None:
+        pts = np.asarray(coordinates, dtype=float)
+        return pts[:, 0] * kx, pts[:, 1] * M_PER_DEG
+    return [c[0] * kx for c in coordinates], [c[1] * M_PER_DEG for c in coordinates]
+
+
+def _farthest(xs, ys, first: int, last: int) -> tuple[float, int]:
+    """(distance, index) of the point between first and last farthest from the segment first-last."""
+    ax, ay, bx, by = xs[first], ys[first], xs[last], ys[last]
+    dx, dy = bx - ax, by - ay
+    seg2 = dx * dx + dy * dy
+
+    if np is not None:
+        px = xs[first + 1:last] - ax
+        py = ys[first + 1:last] - ay
+        t = np.clip((px * dx + py * dy) / seg2, 0.0, 1.0) if seg2 else 0.0
+        d2 = (px - t * dx) ** 2 + (py - t * dy) ** 2
+        i = int(np.argmax(d2))
+        return math.sqrt(float(d2[i])), first + 1 + i
+
+    best, best_i = -1.0, first + 1
+    for i in range(first + 1, last):
+        px, py = xs[i] - ax, ys[i] - ay
+        t = min(1.0, max(0.0, (px * dx + py * dy) / seg2)) if seg2 else 0.0
+        d2 = (px - t * dx) ** 2 + (py - t * dy) ** 2
+        if d2 > best:
+            best, best_i = d2, i
+    return math.sqrt(best), best_i
+
+
+def simplify_path(
+    coordinates: Sequence[Sequence[float]],
+    *,
+    tolerance_m: Optional[float] = None,
+    max_points: Optional[int] = None,
+) -> list:
+    """
+    Douglas-Peucker simplification of a [lng, lat] line.
+
+    Segments are refined in order of their largest deviation (a heap), so the loop stops as soon as
+    every remaining deviation is within tolerance_m or max_points vertices are kept; only the
+    points that end up in the result are ever split on. Endpoints are always kept.
+    """
+    n = len(coordinates)
+    limit = n if max_points is None else max(2, max_points)
+    tolerance = 0.0 if tolerance_m is None else tolerance_m
+    if n <= 2 or (tolerance_m is None and limit >= n):
+        return list(coordinates)
+
+    xs, ys = _project(coordinates)
+    keep = {0, n - 1}
+    heap = []
+
+    def push(first: int, last: int) -> None:
+        if last - first > 1:
+            distance, index = _farthest(xs, ys, first, last)
+            if distance > tolerance:
+                heapq.heappush(heap, (-distance, first, last, index))
+
+    push(0, n - 1)
+    while heap and len(keep) < limit:
+        _, first, last, index = heapq.heappop(heap)
+        keep.add(index)
+        push(first, index)
+        push(index, last)
+
+    return [coordinates[i] for i in sorted(keep)]
@@ -0,0 +1,83 @@
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from . import json_backend
+from .telemetry_out_serializer import DroneTelemetrySerializer
+
+#rows pulled from the DB cursor per round trip, and rows joined into one chunk written to the socket
+DEFAULT_STREAM_CHUNK_SIZE = 2000
+
+
+def stream_chunk_size() -> int:
+    return getattr(settings, "DRONE_STREAM_CHUNK_SIZE", DEFAULT_STREAM_CHUNK_SIZE)
+
+
+def wants_stream(request) -> bool:
+    return request.query_params.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def json_array_chunks(items: Iterable, chunk_size: int) -> Iterator[bytes]:
+    """Encode an iterable as a JSON array, yielding one bytes chunk per chunk_size items."""
+    dumps = json_backend.get_backend().dumps
+    yield b"["
+    buffer = []
+    first = True
+    for item in items:
+        buffer.append(dumps(item))
+        if len(buffer) >= chunk_size:
+            yield (b"" if first else b",") + b",".join(buffer)
+            first = False
+            buffer = []
+    if buffer:
+        yield (b"" if first else b",") + b",".join(buffer)
+    yield b"]"
+
+
+def telemetry_rows(qs, chunk_size: int) -> Iterator[dict]:
+    """
+    Telemetry rows formatted exactly like DroneTelemetrySerializer, without building model instances.
+    The queryset is read with .iterator() so only one chunk is held in memory.
+    """
+    fields = DroneTelemetrySerializer().fields
+    names = DroneTelemetrySerializer.Meta.fields
+    converters = [fields[name].to_representation for name in names]
+
+    for row in qs.values_list(*names).iterator(chunk_size=chunk_size):
+        yield {
+            name: None if value is None else convert(value)
+            for name, convert, value in zip(names, converters, row)
+        }
+
+
+def stream_telemetry(qs) -> StreamingHttpResponse:
+    chunk_size = stream_chunk_size()
+    return StreamingHttpResponse(
+        json_array_chunks(telemetry_rows(qs, chunk_size), chunk_size),
+        content_type="application/json",
+    )
+
+
+def path_geojson_chunks(serial: str, coordinates: Iterable, chunk_size: int) -> Iterator[bytes]:
+    """GeoJSON LineString Feature written incrementally; the point count goes last, once it is known."""
+    yield b'{"type":"Feature","geometry":{"type":"LineString","coordinates":'
+    count = 0
+
+    def counted():
+        nonlocal count
+        for point in coordinates:
+            count += 1
+            yield point
+
+    yield from json_array_chunks(counted(), chunk_size)
+    yield b'},"properties":' + json_backend.dumps({"serial": serial, "count": count}) + b"}"
+
+
+def stream_path(serial: str, qs) -> StreamingHttpResponse:
+    """qs must be a values_list("lng", "lat") queryset."""
+    chunk_size = stream_chunk_size()
+    return StreamingHttpResponse(
+        path_geojson_chunks(serial, qs.iterator(chunk_size=chunk_size), chunk_size),
+        content_type="application/geo+json",
+    )
@@ -0,0 +1,102 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class _Stop:
+    """Queue sentinel telling the worker to flush and exit (a class so it survives pickling)."""
+
+
+_STOP = _Stop()
+
+
+class TelemetryBatcher:
+    """
+    Bounded in-memory queue drained by a background worker thread.
+
+    Producers (e.g. the paho network thread) call submit() which never blocks.
+    The worker collects items and calls flush(batch) once batch_size items are
+    waiting or flush_interval seconds have passed since the first item of the batch.
+
+    Pass a multiprocessing.Queue as `source` and call run() to drain it from
+    another process instead of a thread.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list[Any]], None],
+        *,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_queue: int = 10000,
+        source=None,
+    ):
+        self.flush = flush
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = source if source is not None else queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self.run, name="telemetry-batcher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, item: Any) -> bool:
+        #never block the caller: if the worker can't keep up we drop and count,
+        #instead of stalling the MQTT socket
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Telemetry queue full, dropped %s messages so far", self.dropped)
+            return False
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Flush whatever is queued and wait for the worker to exit."""
+        self._queue.put(_STOP)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def run(self) -> None:
+        """Drain the queue in the calling thread until stop() is requested."""
+        batch: list[Any] = []
+        deadline = 0.0
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _Stop):
+                self._flush(batch)
+                return
+
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+
+    def _flush(self, batch: list[Any]) -> None:
+        if not batch:
+            return
+        #the worker is a long-lived thread with its own DB connection, so drop it
+        #if it went stale (CONN_MAX_AGE / server restarts) before writing
+        close_old_connections()
+        try:
+            self.flush(batch)
+        except Exception:
+            logger.exception("Failed to flush telemetry batch of %s messages", len(batch))
@@ -0,0 +1,111 @@
+import json
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .danger_strategies import default_classifier
+from .models import Drone, DroneTelemetry
+
+COPY_COLUMNS = ("drone_id", "timestamp", "lat", "lng", "height_m", "horizontal_speed_mps")
+COPY_TYPES = ("int8", "timestamptz", "float8", "float8", "float8", "float8")
+
+#one statement for every drone in the batch: insert unknown serials, refresh the latest state of
+#known ones unless the stored point is newer (replays of old data never move a drone backwards).
+#Every row is touched so RETURNING hands back the id of each serial.
+LATEST_STATE_UPSERT = """
+INSERT INTO {drone} (serial, last_seen, last_lat, last_lng, is_dangerous, danger_reasons, created_at, updated_at)
+SELECT s.serial, s.last_seen, s.last_lat, s.last_lng, s.is_dangerous, s.danger_reasons::jsonb, %s, %s
+FROM unnest(%s::text[], %s::timestamptz[], %s::float8[], %s::float8[], %s::bool[], %s::text[])
+    AS s(serial, last_seen, last_lat, last_lng, is_dangerous, danger_reasons)
+ON CONFLICT (serial) DO UPDATE SET
+    last_seen = CASE WHEN {newer} THEN EXCLUDED.last_seen ELSE {drone}.last_seen END,
+    last_lat = CASE WHEN {newer} THEN EXCLUDED.last_lat ELSE {drone}.last_lat END,
+    last_lng = CASE WHEN {newer} THEN EXCLUDED.last_lng ELSE {drone}.last_lng END,
+    is_dangerous = CASE WHEN {newer} THEN EXCLUDED.is_dangerous ELSE {drone}.is_dangerous END,
+    danger_reasons = CASE WHEN {newer} THEN EXCLUDED.danger_reasons ELSE {drone}.danger_reasons END,
+    updated_at = EXCLUDED.updated_at
+RETURNING id, serial
+"""
+
+
+def copy_supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def use_copy_writer() -> bool:
+    return copy_supported() and getattr(settings, "DRONE_TELEMETRY_COPY", False)
+
+
+def _newest_per_drone(validated_items: list[dict], now) -> dict[str, tuple]:
+    #same rule as ingest_telemetry_batch(): on equal timestamps the later message wins
+    latest: dict[str, tuple] = {}
+    for item in validated_items:
+        timestamp = item.get("timestamp") or now
+        previous = latest.get(item["serial"])
+        if previous is None or timestamp >= previous[0]:
+            latest[item["serial"]] = (timestamp, item)
+    return latest
+
+
+def _upsert_latest_state(cursor, latest: dict[str, tuple], now) -> dict[str, int]:
+    newest = [item for _, item in latest.values()]
+    batch_reasons = default_classifier().classify_batch(
+        height_m=[item.get("height_m") for item in newest],
+        horizontal_speed_mps=[item.get("horizontal_speed_mps") for item in newest],
+        lat=[item["lat"] for item in newest],
+        lng=[item["lng"] for item in newest],
+    )
+
+    drone = connection.ops.quote_name(Drone._meta.db_table)
+    sql = LATEST_STATE_UPSERT.format(drone=drone, newer=f"{drone}.last_seen IS NULL OR EXCLUDED.last_seen >= {drone}.last_seen")
+    cursor.execute(
+        sql,
+        [
+            now,
+            now,
+            list(latest),
+            [timestamp for timestamp, _ in latest.values()],
+            [item["lat"] for item in newest],
+            [item["lng"] for item in newest],
+            [len(reasons) > 0 for reasons in batch_reasons],
+            [json.dumps(reasons) for reasons in batch_reasons],
+        ],
+    )
+    return {serial: pk for pk, serial in cursor.fetchall()}
+
+
+def copy_telemetry_batch(validated_items: list[dict]) -> int:
+    """
+    PostgreSQL fast path for bulk telemetry: one UPSERT for the drones' latest state, then every
+    row streamed through binary COPY FROM STDIN (no per-row INSERT parsing or planning).
+    Returns the number of telemetry rows written. Use ingest_telemetry_batch() when the created
+    objects are needed; COPY does not return ids.
+    """
+    if not validated_items:
+        return 0
+
+    now = timezone.now()
+    latest = _newest_per_drone(validated_items, now)
+    table = connection.ops.quote_name(DroneTelemetry._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(c) for c in COPY_COLUMNS)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        drone_ids = _upsert_latest_state(cursor, latest, now)
+
+        #CursorWrapper.cursor is the psycopg 3 cursor
+        with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN (FORMAT BINARY)") as copy:
+            copy.set_types(COPY_TYPES)
+            for item in validated_items:
+                copy.write_row(
+                    (
+                        drone_ids[item["serial"]],
+                        item.get("timestamp") or now,
+                        item["lat"],
+                        item["lng"],
+                        item.get("height_m"),
+                        item.get("horizontal_speed_mps"),
+                    )
+                )
+
+    return len(validated_items)
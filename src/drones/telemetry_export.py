@@ -0,0 +1,198 @@
+"""
+Columnar telemetry export (management command export_telemetry and /api/telemetry/export/).
+
+Formats:
+  parquet - Apache Parquet, one row group per chunk (needs pyarrow)
+  arrow   - Arrow IPC stream, one record batch per chunk (needs pyarrow)
+  dtel    - built-in fallback, no dependencies; layout below
+
+dtel layout (all integers/floats little-endian):
+  header   b"DTEL" + uint8 version (1)
+  block*   uint32 rows (n > 0), then the columns of those n rows:
+             uint32 dictionary size d, then d serials as (uint16 byte length + UTF-8 bytes)
+             uint32[n]  serial    index into this block's dictionary
+             int64[n]   timestamp microseconds since the Unix epoch, UTC
+             float64[n] lat
+             float64[n] lng
+             float64[n] height_m              NaN = missing
+             float64[n] horizontal_speed_mps  NaN = missing
+  trailer  uint32 0
+"""
+import io
+import struct
+import sys
+from array import array
+from datetime import datetime, timezone as dt_timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only the dtel format is available
+    pa = pq = None
+
+FORMATS = ("parquet", "arrow", "dtel")
+CONTENT_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "dtel": "application/octet-stream",
+}
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrows", "dtel": "dtel"}
+
+DTEL_MAGIC = b"DTEL"
+DTEL_VERSION = 1
+DEFAULT_EXPORT_CHUNK_SIZE = 50000
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+FLOAT_COLUMNS = ("lat", "lng", "height_m", "horizontal_speed_mps")
+VALUES = ("drone__serial", "timestamp", "lat", "lng", "height_m", "horizontal_speed_mps")
+NAN = float("nan")
+
+
+def available_formats() -> tuple[str, ...]:
+    return FORMATS if pa is not None else ("dtel",)
+
+
+def default_format() -> str:
+    return "parquet" if pa is not None else "dtel"
+
+
+def _micros(value: datetime) -> int:
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def column_chunks(qs, chunk_size: int):
+    """
+    Telemetry as dicts of column lists, chunk_size rows at a time.
+    Read with .iterator() (server-side cursor on PostgreSQL), so only one chunk is in memory.
+    """
+    chunk = {"serial": [], "timestamp": [], "lat": [], "lng": [], "height_m": [], "horizontal_speed_mps": []}
+    serial, timestamp, lat, lng, height, speed = chunk.values()
+
+    for row in qs.order_by("drone_id", "timestamp", "id").values_list(*VALUES).iterator(chunk_size=chunk_size):
+        serial.append(row[0])
+        timestamp.append(_micros(row[1]))
+        lat.append(row[2])
+        lng.append(row[3])
+        height.append(row[4])
+        speed.append(row[5])
+        if len(serial) >= chunk_size:
+            yield chunk
+            chunk = {name: [] for name in chunk}
+            serial, timestamp, lat, lng, height, speed = chunk.values()
+
+    if serial:
+        yield chunk
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def dtel_block(chunk: dict) -> bytes:
+    dictionary: dict[str, int] = {}
+    codes = array("I", (dictionary.setdefault(s, len(dictionary)) for s in chunk["serial"]))
+
+    parts = [struct.pack("<II", len(codes), len(dictionary))]
+    for serial in dictionary:
+        encoded = serial.encode("utf-8")
+        parts.append(struct.pack("<H", len(encoded)) + encoded)
+    parts.append(_little_endian(codes))
+    parts.append(_little_endian(array("q", chunk["timestamp"])))
+    for name in FLOAT_COLUMNS:
+        parts.append(_little_endian(array("d", (NAN if v is None else v for v in chunk[name]))))
+    return b"".join(parts)
+
+
+def read_dtel(stream) -> dict:
+    """Decode a whole dtel stream into column lists (NaN -> None); mainly for tests and small files."""
+    if stream.read(5) != DTEL_MAGIC + bytes([DTEL_VERSION]):
+        raise ValueError("Not a dtel v1 stream.")
+
+    columns = {"serial": [], "timestamp": [], "lat": [], "lng": [], "height_m": [], "horizontal_speed_mps": []}
+    while True:
+        (n,) = struct.unpack("<I", stream.read(4))
+        if n == 0:
+            return columns
+        (d,) = struct.unpack("<I", stream.read(4))
+        dictionary = []
+        for _ in range(d):
+            (length,) = struct.unpack("<H", stream.read(2))
+            dictionary.append(stream.read(length).decode("utf-8"))
+
+        def read(typecode):
+            values = array(typecode)
+            values.frombytes(stream.read(n * values.itemsize))
+            if sys.byteorder != "little":
+                values.byteswap()
+            return values
+
+        columns["serial"] += [dictionary[i] for i in read("I")]
+        columns["timestamp"] += list(read("q"))
+        for name in FLOAT_COLUMNS:
+            columns[name] += [None if v != v else v for v in read("d")]
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file object whose bytes are drained after each chunk, for streaming pyarrow writers."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_schema():
+    return pa.schema(
+        [
+            ("serial", pa.dictionary(pa.int32(), pa.string())),
+            ("timestamp", pa.timestamp("us", tz="UTC")),
+            ("lat", pa.float64()),
+            ("lng", pa.float64()),
+            ("height_m", pa.float64()),
+            ("horizontal_speed_mps", pa.float64()),
+        ]
+    )
+
+
+def export_chunks(qs, fmt: str, chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE):
+    """Encoded output of `fmt` as a generator of bytes, one piece per chunk of rows."""
+    if fmt not in available_formats():
+        raise ValueError(f"Format '{fmt}' is not available (choose from: {', '.join(available_formats())}).")
+
+    if fmt == "dtel":
+        yield DTEL_MAGIC + bytes([DTEL_VERSION])
+        for chunk in column_chunks(qs, chunk_size):
+            yield dtel_block(chunk)
+        yield struct.pack("<I", 0)
+        return
+
+    schema = _arrow_schema()
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema) if fmt == "parquet" else pa.ipc.new_stream(sink, schema)
+    try:
+        for chunk in column_chunks(qs, chunk_size):
+            writer.write_batch(pa.RecordBatch.from_pydict(chunk, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
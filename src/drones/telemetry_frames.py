@@ -0,0 +1,129 @@
+"""
+Compact binary telemetry frames for MQTT ("DT" frames, version 1).
+
+A frame carries one or more samples of a single drone. All integers are little-endian.
+
+    header   15 bytes  "<2sBBqHB"
+             magic b"DT", version (1), flags, base time (int64 unix ms),
+             sample count (uint16), serial length (uint8)
+    serial   serial length bytes of UTF-8 (0 = take the serial from the topic)
+    samples  count x 20 bytes "<Iiiff"
+             time offset from the base (uint32 ms), lat / lng (int32, 1e-7 degrees),
+             height_m / horizontal_speed_mps (float32, NaN = not reported)
+
+Flag FLAG_NO_TIMESTAMP means the samples carry no time and the server time is used (time
+offsets are ignored). Coordinates as 1e-7 degree integers are the MAVLink convention (~1 cm).
+
+A single JSON sample is ~100-150 bytes; a frame costs 15 + serial bytes once, then 20 bytes per
+sample, and is decoded with one struct.iter_unpack() call.
+"""
+import math
+import struct
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterable, Optional
+
+MAGIC = b"DT"
+VERSION = 1
+FLAG_NO_TIMESTAMP = 0x01
+
+#topics ending in this suffix (thing/product/{serial}/osd/bin), or messages with this MQTT 5
+#content type, are decoded as frames instead of JSON
+TOPIC_SUFFIX = "/bin"
+CONTENT_TYPE = "application/vnd.drone-telemetry-frame"
+
+HEADER = struct.Struct("<2sBBqHB")
+SAMPLE = struct.Struct("<Iiiff")
+COORD_SCALE = 10_000_000
+MAX_SAMPLES = 0xFFFF
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class FrameError(ValueError):
+    """Payload is not a well-formed telemetry frame."""
+
+
+def is_frame(topic: str, content_type: Optional[str] = None) -> bool:
+    if content_type:
+        return content_type.split(";", 1)[0].strip().lower() == CONTENT_TYPE
+    return topic.endswith(TOPIC_SUFFIX)
+
+
+def decode_frame(payload: bytes, serial: Optional[str] = None) -> list[dict]:
+    """
+    Frame bytes -> telemetry dicts (same keys as the JSON payload, not yet validated).
+    `serial` is used when the frame does not carry one (e.g. taken from the topic).
+    """
+    if len(payload) < HEADER.size:
+        raise FrameError(f"Frame too short: {len(payload)} bytes")
+    magic, version, flags, base_ms, count, serial_len = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise FrameError("Not a telemetry frame (bad magic)")
+    if version != VERSION:
+        raise FrameError(f"Unsupported frame version {version}")
+
+    offset = HEADER.size + serial_len
+    if len(payload) != offset + count * SAMPLE.size:
+        raise FrameError(f"Frame length {len(payload)} does not match {count} samples")
+    if serial_len:
+        try:
+            serial = payload[HEADER.size:offset].decode("utf-8")
+        except UnicodeDecodeError:
+            raise FrameError("Serial is not valid UTF-8")
+
+    with_time = not flags & FLAG_NO_TIMESTAMP
+    base = _EPOCH + timedelta(milliseconds=base_ms)
+    samples = []
+    for dt_ms, lat, lng, height, speed in SAMPLE.iter_unpack(memoryview(payload)[offset:]):
+        data = {"lat": lat / COORD_SCALE, "lng": lng / COORD_SCALE}
+        if serial is not None:
+            data["serial"] = serial
+        if with_time:
+            data["timestamp"] = base + timedelta(milliseconds=dt_ms)
+        #NaN != NaN: unreported values are left out, like a JSON payload omitting them
+        if height == height:
+            data["height_m"] = height
+        if speed == speed:
+            data["horizontal_speed_mps"] = speed
+        samples.append(data)
+    return samples
+
+
+def encode_frame(samples: Iterable[dict], serial: str = "") -> bytes:
+    """
+    Build a frame from telemetry dicts (lat, lng, optional height_m, horizontal_speed_mps, timestamp).
+    Timestamps must be all present (aware datetimes within ~49 days of each other) or all absent.
+    Pass serial="" to leave it out and let the server take it from the topic.
+    """
+    samples = list(samples)
+    if not 0 < len(samples) <= MAX_SAMPLES:
+        raise FrameError(f"A frame holds 1..{MAX_SAMPLES} samples, got {len(samples)}")
+
+    times = [sample.get("timestamp") for sample in samples]
+    if all(t is None for t in times):
+        flags, base_ms, offsets = FLAG_NO_TIMESTAMP, 0, [0] * len(samples)
+    elif any(t is None for t in times):
+        raise FrameError("Either every sample or none has a timestamp")
+    else:
+        millis = [round((t - _EPOCH).total_seconds() * 1000) for t in times]
+        flags, base_ms = 0, min(millis)
+        offsets = [ms - base_ms for ms in millis]
+
+    serial_bytes = serial.encode("utf-8")
+    if len(serial_bytes) > 0xFF:
+        raise FrameError("Serial is longer than 255 bytes")
+    parts = [HEADER.pack(MAGIC, VERSION, flags, base_ms, len(samples), len(serial_bytes)), serial_bytes]
+    for sample, dt_ms in zip(samples, offsets):
+        height = sample.get("height_m")
+        speed = sample.get("horizontal_speed_mps")
+        try:
+            parts.append(SAMPLE.pack(
+                dt_ms,
+                round(sample["lat"] * COORD_SCALE),
+                round(sample["lng"] * COORD_SCALE),
+                math.nan if height is None else height,
+                math.nan if speed is None else speed,
+            ))
+        except struct.error as e:
+            raise FrameError(f"Sample does not fit the frame layout: {e}")
+    return b"".join(parts)
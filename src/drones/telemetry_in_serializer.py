@@ -23,11 +23,20 @@ class TelemetryInSerializer(serializers.Serializer):
     speed = serializers.FloatField(required=False, write_only=True)
 
     def validate(self, attrs):
-        # Map legacy keys -> canonical keys if canonical not provided
-        if "height_m" not in attrs and "height" in attrs:
-            attrs["height_m"] = attrs["height"]
+        return apply_legacy_aliases(attrs)
 
-        if "horizontal_speed_mps" not in attrs and "speed" in attrs:
-            attrs["horizontal_speed_mps"] = attrs["speed"]
 
-        return attrs
+# Legacy key -> canonical key; also used by drones.telemetry_validation, whose fast
+# validator is compiled from this serializer's fields so the two cannot drift
+LEGACY_ALIASES = {
+    "height": "height_m",
+    "speed": "horizontal_speed_mps",
+}
+
+
+def apply_legacy_aliases(attrs):
+    # Map legacy keys -> canonical keys if canonical not provided
+    for legacy, canonical in LEGACY_ALIASES.items():
+        if canonical not in attrs and legacy in attrs:
+            attrs[canonical] = attrs[legacy]
+    return attrs
@@ -9,4 +9,16 @@ from rest_framework import serializers
 class TelemetryIngestResponseSerializer(serializers.Serializer):
     detail = serializers.CharField()
     drone_id = serializers.IntegerField()
-    telemetry_id = serializers.IntegerField()
\ No newline at end of file
+    telemetry_id = serializers.IntegerField()
+
+
+#response of the batch endpoint: counts plus one entry per rejected item
+class TelemetryBatchErrorSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    errors = serializers.DictField(child=serializers.ListField(child=serializers.CharField()))
+
+
+class TelemetryBatchResponseSerializer(serializers.Serializer):
+    accepted = serializers.IntegerField()
+    rejected = serializers.IntegerField()
+    errors = TelemetryBatchErrorSerializer(many=True)
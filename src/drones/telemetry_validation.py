@@ -0,0 +1,169 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import fields as drf_fields
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.timezone import valid_datetime
+
+from .telemetry_in_serializer import TelemetryInSerializer, apply_legacy_aliases
+
+ISO_8601_HINT = "YYYY-MM-DDThh:mm[:ss[.uuuuuu]][+HH:MM|-HH:MM|Z]"
+NOT_A_DICT = "Invalid data. Expected a dictionary, but got {datatype}."
+
+
+class TelemetryValidationError(ValueError):
+    """Raised by validate_telemetry(); `errors` has the same shape as serializer.errors."""
+
+    def __init__(self, errors: dict):
+        super().__init__(errors)
+        self.errors = errors
+
+
+#parser builders per DRF field type: a lean copy of the field's to_internal_value(); messages
+#(lazy, translated when raised) come from the bound serializer field, and the field's own
+#validators (max_length, null characters, min/max value, ...) still run afterwards
+def _char_parser(field):
+    messages = field.error_messages
+
+    def parse(value):
+        # same as CharField.run_validation(): whitespace only counts as blank when it's trimmed
+        if value == "" or (field.trim_whitespace and str(value).strip() == ""):
+            if field.allow_blank:
+                return ""
+            raise ValueError(str(messages["blank"]))
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(str(messages["invalid"]))
+        value = str(value)
+        return value.strip() if field.trim_whitespace else value
+
+    return parse
+
+
+def _float_parser(field):
+    messages = field.error_messages
+    max_string_length = field.MAX_STRING_LENGTH
+
+    def parse(value):
+        if type(value) is not float:
+            if isinstance(value, str) and len(value) > max_string_length:
+                raise ValueError(str(messages["max_string_length"]))
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(str(messages["invalid"]))
+            except OverflowError:
+                raise ValueError(str(messages["overflow"]))
+        return value
+
+    return parse
+
+
+def _datetime_parser(field):
+    messages = field.error_messages
+    if list(getattr(field, "input_formats", None) or api_settings.DATETIME_INPUT_FORMATS) != [drf_fields.ISO_8601]:
+        raise ImproperlyConfigured("Fast telemetry validation only supports ISO-8601 datetime input.")
+
+    def parse(value):
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            try:
+                parsed = parse_datetime(value)
+            except (TypeError, ValueError):
+                parsed = None
+            if parsed is None:
+                raise ValueError(str(messages["invalid"]).format(format=ISO_8601_HINT))
+        # same as DateTimeField.enforce_timezone() with USE_TZ on
+        tz = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        if tz is None:
+            return timezone.make_naive(parsed, dt_timezone.utc) if timezone.is_aware(parsed) else parsed
+        if timezone.is_aware(parsed):
+            try:
+                return parsed.astimezone(tz)
+            except OverflowError:
+                #e.g. 0001-01-01T00:00:00+05:00 falls before datetime.min in UTC
+                raise ValueError(str(messages["overflow"]))
+        aware = timezone.make_aware(parsed, tz)
+        if not valid_datetime(aware):
+            raise ValueError(str(messages["make_aware"]).format(timezone=tz))
+        return aware
+
+    return parse
+
+
+PARSER_BUILDERS = [
+    (drf_fields.DateTimeField, _datetime_parser),
+    (drf_fields.FloatField, _float_parser),
+    (drf_fields.CharField, _char_parser),
+]
+
+
+def compile_fields(serializer_class=TelemetryInSerializer) -> tuple:
+    """
+    (name, parser, validators, required, allow_null, messages) per writable serializer field, in declaration order.
+    Fails loudly for field types or options the fast path does not reproduce.
+    """
+    compiled = []
+    for name, field in serializer_class().fields.items():
+        if field.read_only:
+            continue
+        builder = next((build for cls, build in PARSER_BUILDERS if type(field) is cls), None)
+        if builder is None or field.source != name:
+            raise ImproperlyConfigured(f"Fast telemetry validation does not support field '{name}' ({type(field).__name__}).")
+        validators = field.run_validators if field.validators else None
+        compiled.append((name, builder(field), validators, field.required, field.allow_null, field.error_messages))
+    return tuple(compiled)
+
+
+_compiled = None
+
+
+def validate_telemetry(data) -> dict:
+    """
+    Validate one telemetry payload without building a DRF serializer.
+
+    Returns the same dict as TelemetryInSerializer(data=data).validated_data and raises
+    TelemetryValidationError carrying the same field -> [messages] errors. The field rules
+    are compiled once from TelemetryInSerializer, so changing the serializer changes both.
+    """
+    global _compiled
+    if _compiled is None:
+        _compiled = compile_fields()
+
+    if not isinstance(data, dict):
+        raise TelemetryValidationError({"non_field_errors": [NOT_A_DICT.format(datatype=type(data).__name__)]})
+
+    validated = {}
+    errors = None
+    for name, parse, run_validators, required, allow_null, messages in _compiled:
+        if name not in data:
+            if required:
+                errors = errors or {}
+                errors[name] = [str(messages["required"])]
+            continue
+        value = data[name]
+        if value is None:
+            if allow_null:
+                validated[name] = None
+            else:
+                errors = errors or {}
+                errors[name] = [str(messages["null"])]
+            continue
+        try:
+            value = parse(value)
+            if run_validators is not None:
+                run_validators(value)
+            validated[name] = value
+        except ValueError as e:
+            errors = errors or {}
+            errors[name] = [str(e)]
+        except ValidationError as e:
+            errors = errors or {}
+            errors[name] = list(e.detail)
+
+    if errors:
+        raise TelemetryValidationError(errors)
+    return apply_legacy_aliases(validated)
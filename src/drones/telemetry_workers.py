@@ -0,0 +1,117 @@
+import logging
+import multiprocessing
+import queue
+import re
+import signal
+import zlib
+from typing import Any, Callable
+
+from django.db import connections
+
+from drones.telemetry_batcher import TelemetryBatcher, _STOP
+
+logger = logging.getLogger(__name__)
+
+#thing/product/{serial}/osd (JSON) or thing/product/{serial}/osd/bin (binary frames)
+TOPIC_SERIAL_RE = re.compile(r"^thing/product/(?P<serial>[^/]+)/osd(?:/bin)?$")
+
+
+def shard_for(topic: str, workers: int) -> int:
+    """
+    Pick the worker for a message so every message of a drone lands on the same process.
+
+    Uses the serial from thing/product/{serial}/osd (or the whole topic for other
+    layouts). crc32 instead of hash() so the mapping is stable across processes/restarts.
+    """
+    m = TOPIC_SERIAL_RE.match(topic)
+    key = m.group("serial") if m else topic
+    return zlib.crc32(key.encode("utf-8")) % workers
+
+
+def _worker_main(index: int, source, flush: Callable[[list[Any]], None], batch_size: int, flush_interval: float) -> None:
+    # spawn-started children need Django configured; with fork this is a no-op
+    import django
+    django.setup()
+
+    # Ctrl+C reaches the whole process group; let the parent shut us down
+    # through the queue so nothing buffered is lost.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    logger.info("Telemetry worker %s started", index)
+    TelemetryBatcher(
+        flush,
+        batch_size=batch_size,
+        flush_interval=flush_interval,
+        source=source,
+    ).run()
+    logger.info("Telemetry worker %s stopped", index)
+
+
+class TelemetryWorkerPool:
+    """
+    N ingestion processes fed by the MQTT network thread, sharded by drone serial.
+
+    Each worker owns a bounded queue and its own DB connection, so ingestion scales
+    across cores while per-drone ordering is preserved.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list[Any]], None],
+        *,
+        workers: int,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_queue: int = 10000,
+    ):
+        self.flush = flush
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queues = [multiprocessing.Queue(maxsize=max_queue) for _ in range(workers)]
+        self._processes: list[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        # never hand an open DB socket to forked children
+        connections.close_all()
+
+        for index, source in enumerate(self._queues):
+            process = multiprocessing.Process(
+                target=_worker_main,
+                args=(index, source, self.flush, self.batch_size, self.flush_interval),
+                name=f"telemetry-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def submit(self, item: tuple) -> bool:
+        """Queue a (topic, payload[, content_type]) message on the worker that owns its drone; never blocks."""
+        try:
+            self._queues[shard_for(item[0], self.workers)].put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Telemetry worker queue full, dropped %s messages so far", self.dropped)
+            return False
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Ask every worker to flush and exit, then wait for them; stragglers are terminated."""
+        for source, process in zip(self._queues, self._processes):
+            if not process.is_alive():
+                logger.warning("Telemetry worker %s already exited (code %s)", process.name, process.exitcode)
+                continue
+            # a worker stuck or dead behind a full queue must not hang shutdown
+            try:
+                source.put(_STOP, timeout=min(timeout, 5.0))
+            except queue.Full:
+                logger.warning("Telemetry worker %s queue is full, it will be terminated", process.name)
+
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning("Telemetry worker %s did not stop in time, terminating", process.name)
+                process.terminate()
+                process.join(1.0)
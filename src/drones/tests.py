@@ -1,21 +1,25 @@
 # Create your tests here.
 
-from datetime import timedelta
-from django.test import SimpleTestCase, TestCase
+from datetime import timedelta, timezone as dt_timezone
+from urllib.parse import urlencode
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 
-from drones.danger_strategies import default_classifier
+from drones.danger_strategies import default_classifier, geofence_zone_cache
 from drones.models import Drone, DroneTelemetry, GeofenceZone
 from drones.utils import haversine_km
 from django.test import override_settings
+from django.db import connection
 
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from unittest import skipUnless
 from unittest.mock import MagicMock, patch
+import math
 import os
 
 
@@ -831,4 +835,1937 @@ class MQTTIngestionTests(TestCase):
         on_message(mock_client, None, Msg())
 
         self.assertFalse(Drone.objects.filter(serial="DR-MISSING").exists())
-        self.assertEqual(DroneTelemetry.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(DroneTelemetry.objects.count(), 0)
+
+class IngestTelemetryBatchServiceTests(TestCase):
+    """Bulk ingest path used by high-throughput consumers."""
+
+    def test_batch_creates_missing_drones_and_all_rows(self):
+        from drones.services import ingest_telemetry_batch
+
+        Drone.objects.create(serial="BATCH-EXISTING")
+        items = [
+            {"serial": "BATCH-EXISTING", "lat": 31.0, "lng": 35.0},
+            {"serial": "BATCH-NEW", "lat": 31.1, "lng": 35.1},
+            {"serial": "BATCH-NEW", "lat": 31.2, "lng": 35.2},
+        ]
+
+        results = ingest_telemetry_batch(items)
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(Drone.objects.filter(serial__startswith="BATCH-").count(), 2)
+        self.assertEqual(DroneTelemetry.objects.count(), 3)
+        self.assertTrue(all(telemetry.id for _, telemetry in results))
+        self.assertEqual([drone.serial for drone, _ in results], [i["serial"] for i in items])
+
+    def test_batch_folds_latest_state_per_drone(self):
+        from drones.services import ingest_telemetry_batch
+
+        t1 = timezone.now() - timedelta(seconds=10)
+        t2 = timezone.now()
+        ingest_telemetry_batch([
+            {"serial": "FOLD1", "lat": 31.2, "lng": 35.2, "timestamp": t2, "height_m": 600},
+            {"serial": "FOLD1", "lat": 31.1, "lng": 35.1, "timestamp": t1, "height_m": 10},
+        ])
+
+        drone = Drone.objects.get(serial="FOLD1")
+        self.assertEqual(drone.last_seen, t2)
+        self.assertEqual(drone.last_lat, 31.2)
+        self.assertTrue(drone.is_dangerous)
+        self.assertIn("Altitude greater than 500 meters", drone.danger_reasons)
+
+    def test_batch_query_count_does_not_grow_with_rows(self):
+        from drones.services import ingest_telemetry_batch
+
+        Drone.objects.create(serial="QC1")
+        items = [{"serial": "QC1", "lat": 31.0, "lng": 35.0} for _ in range(50)]
+        # warm the geofence zone cache so it isn't counted
+        default_classifier().classify(lat=31.0, lng=35.0)
+
+        # savepoint + drone lookup + telemetry insert + drone update + release
+        with self.assertNumQueries(5):
+            ingest_telemetry_batch(items)
+
+    def test_empty_batch_is_noop(self):
+        from drones.services import ingest_telemetry_batch
+
+        with self.assertNumQueries(0):
+            self.assertEqual(ingest_telemetry_batch([]), [])
+
+
+class TelemetryBatcherUnitTests(SimpleTestCase):
+    def test_flushes_when_batch_size_reached(self):
+        from drones.telemetry_batcher import TelemetryBatcher
+
+        flushed = []
+        batcher = TelemetryBatcher(flushed.append, batch_size=3, flush_interval=60)
+        batcher.start()
+        for i in range(7):
+            batcher.submit(i)
+        batcher.stop(timeout=5)
+
+        self.assertEqual(flushed, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_flushes_partial_batch_after_interval(self):
+        from drones.telemetry_batcher import TelemetryBatcher
+        import threading
+
+        done = threading.Event()
+        flushed = []
+
+        def flush(batch):
+            flushed.append(batch)
+            done.set()
+
+        batcher = TelemetryBatcher(flush, batch_size=100, flush_interval=0.01)
+        batcher.start()
+        batcher.submit("a")
+        self.assertTrue(done.wait(timeout=5))
+        batcher.stop(timeout=5)
+
+        self.assertEqual(flushed, [["a"]])
+
+    def test_submit_drops_when_queue_full(self):
+        from drones.telemetry_batcher import TelemetryBatcher
+
+        # not started, so nothing drains the queue
+        batcher = TelemetryBatcher(lambda batch: None, max_queue=2)
+        self.assertTrue(batcher.submit(1))
+        self.assertTrue(batcher.submit(2))
+        self.assertFalse(batcher.submit(3))
+        self.assertEqual(batcher.dropped, 1)
+
+
+class MQTTBatchIngestionTests(TransactionTestCase):
+    """Batch mode runs DB writes on the batcher thread, so use real transactions."""
+
+    @patch("drones.management.commands.run_mqtt.mqtt.Client")
+    def test_batch_mode_ingests_queued_messages_on_shutdown(self, MockClient):
+        mock_client = MagicMock()
+        MockClient.return_value = mock_client
+
+        class Msg:
+            def __init__(self, topic, payload):
+                self.topic = topic
+                self.payload = payload
+
+        def deliver_then_stop():
+            on_message = mock_client.on_message
+            on_message(mock_client, None, Msg("thing/product/DR-B1/osd", b'{"lat":31.0,"lng":35.0}'))
+            on_message(mock_client, None, Msg("thing/product/DR-B2/osd", b'{"lat":31.1,"lng":35.1}'))
+            on_message(mock_client, None, Msg("thing/product/DR-B3/osd", b"not-a-json"))
+            raise SystemExit
+
+        mock_client.loop_forever.side_effect = deliver_then_stop
+
+        from drones.management.commands.run_mqtt import Command as RunMQTTCommand
+        cmd = RunMQTTCommand()
+
+        with self.assertRaises(SystemExit):
+            cmd.handle(
+                host="mosquitto",
+                port=1883,
+                topic="thing/product/+/osd",
+                username=None,
+                password=None,
+                batch_size=100,
+                flush_interval_ms=60000,
+            )
+
+        self.assertEqual(
+            sorted(Drone.objects.values_list("serial", flat=True)), ["DR-B1", "DR-B2"]
+        )
+        self.assertEqual(DroneTelemetry.objects.count(), 2)
+
+
+class MQTTWorkerShardingTests(SimpleTestCase):
+    def test_shard_is_stable_per_serial_and_in_range(self):
+        from drones.telemetry_workers import shard_for
+
+        first = shard_for("thing/product/DR-42/osd", 4)
+        self.assertIn(first, range(4))
+        for _ in range(5):
+            self.assertEqual(shard_for("thing/product/DR-42/osd", 4), first)
+
+    def test_shard_spreads_serials_across_workers(self):
+        from drones.telemetry_workers import shard_for
+
+        shards = {shard_for(f"thing/product/DR-{i}/osd", 4) for i in range(100)}
+        self.assertEqual(shards, {0, 1, 2, 3})
+
+    @patch("drones.management.commands.run_mqtt.TelemetryWorkerPool")
+    @patch("drones.management.commands.run_mqtt.mqtt.Client")
+    def test_workers_option_dispatches_to_pool_and_stops_it(self, MockClient, MockPool):
+        mock_client = MagicMock()
+        MockClient.return_value = mock_client
+        pool = MockPool.return_value
+
+        class Msg:
+            topic = "thing/product/DR-W1/osd"
+            payload = b'{"lat":31.0,"lng":35.0}'
+
+        def deliver_then_stop():
+            mock_client.on_message(mock_client, None, Msg())
+            raise SystemExit
+
+        mock_client.loop_forever.side_effect = deliver_then_stop
+
+        from drones.management.commands.run_mqtt import Command as RunMQTTCommand
+
+        with self.assertRaises(SystemExit):
+            RunMQTTCommand().handle(
+                host="mosquitto",
+                port=1883,
+                topic="thing/product/+/osd",
+                username=None,
+                password=None,
+                workers=3,
+                share_group="ingest",
+            )
+
+        self.assertEqual(MockPool.call_args.kwargs["workers"], 3)
+        pool.start.assert_called_once()
+        pool.submit.assert_called_once_with((Msg.topic, Msg.payload))
+        pool.stop.assert_called_once()
+
+        mock_client.on_connect(mock_client, None, {}, 0)
+        mock_client.subscribe.assert_called_once_with("$share/ingest/thing/product/+/osd")
+
+
+class GeofenceZoneCacheTests(TestCase):
+    def tearDown(self):
+        # rolled-back test rows don't fire post_delete
+        geofence_zone_cache.invalidate()
+        super().tearDown()
+
+    def test_zones_are_not_queried_per_message(self):
+        GeofenceZone.objects.create(name="CacheZone", lat=31.95, lng=35.91, radius_km=1.0)
+        classifier = default_classifier()
+        classifier.classify(lat=31.9502, lng=35.9102)
+
+        with self.assertNumQueries(0):
+            reasons = classifier.classify(lat=31.9502, lng=35.9102)
+        self.assertIn("Entered no-fly zone: CacheZone", reasons)
+
+    def test_save_and_delete_invalidate_cache(self):
+        classifier = default_classifier()
+        self.assertEqual(classifier.classify(lat=31.9502, lng=35.9102), [])
+
+        zone = GeofenceZone.objects.create(name="NewZone", lat=31.95, lng=35.91, radius_km=1.0)
+        self.assertIn("Entered no-fly zone: NewZone", classifier.classify(lat=31.9502, lng=35.9102))
+
+        zone.delete()
+        self.assertEqual(classifier.classify(lat=31.9502, lng=35.9102), [])
+
+    @override_settings(DRONE_GEOFENCE_CACHE_CHECK_SECONDS=0)
+    def test_shared_version_bump_from_other_process_reloads(self):
+        from django.core.cache import cache
+        from drones.danger_strategies import GEOFENCE_CACHE_VERSION_KEY
+
+        classifier = default_classifier()
+        classifier.classify(lat=31.9502, lng=35.9102)
+
+        # simulate another process editing zones: row appears without a local signal
+        GeofenceZone.objects.bulk_create([GeofenceZone(name="Remote", lat=31.95, lng=35.91, radius_km=1.0)])
+        self.assertEqual(classifier.classify(lat=31.9502, lng=35.9102), [])
+
+        cache.add(GEOFENCE_CACHE_VERSION_KEY, 0, timeout=None)
+        cache.incr(GEOFENCE_CACHE_VERSION_KEY)
+        self.assertIn("Entered no-fly zone: Remote", classifier.classify(lat=31.9502, lng=35.9102))
+
+
+class GeofenceIndexUnitTests(SimpleTestCase):
+    def _brute_force(self, zones, lat, lng):
+        return [z["name"] for z in zones if haversine_km(lat, lng, z["lat"], z["lng"]) <= z["radius_km"]]
+
+    def test_matches_same_zones_as_linear_scan(self):
+        import random
+        from drones.geofence_index import GeofenceIndex
+
+        rng = random.Random(7)
+        zones = [
+            {"name": f"Z{i}", "lat": rng.uniform(30, 33), "lng": rng.uniform(34, 37), "radius_km": rng.uniform(0.2, 15)}
+            for i in range(300)
+        ]
+        index = GeofenceIndex(zones, cell_deg=0.1)
+
+        for _ in range(500):
+            lat, lng = rng.uniform(29.8, 33.2), rng.uniform(33.8, 37.2)
+            self.assertEqual([z.name for z in index.matches(lat, lng)], self._brute_force(zones, lat, lng))
+
+    def test_candidates_are_local(self):
+        from drones.geofence_index import GeofenceIndex
+
+        zones = [{"name": f"Z{i}", "lat": 10.0 + i, "lng": 10.0, "radius_km": 1.0} for i in range(50)]
+        index = GeofenceIndex(zones, cell_deg=0.1)
+
+        self.assertEqual([z.name for z in index.candidates(10.0, 10.0)], ["Z0"])
+
+    def test_zone_crossing_antimeridian(self):
+        from drones.geofence_index import GeofenceIndex
+
+        zones = [{"name": "Dateline", "lat": 0.0, "lng": 179.99, "radius_km": 5.0}]
+        index = GeofenceIndex(zones, cell_deg=0.1)
+
+        self.assertEqual(len(index.matches(0.0, -179.99)), 1)
+
+    def test_huge_and_polar_zones_are_always_checked(self):
+        from drones.geofence_index import GeofenceIndex
+
+        zones = [
+            {"name": "Continent", "lat": 0.0, "lng": 0.0, "radius_km": 3000.0},
+            {"name": "Pole", "lat": 89.99, "lng": 0.0, "radius_km": 10.0},
+        ]
+        index = GeofenceIndex(zones, cell_deg=0.1)
+
+        self.assertEqual([z.name for z in index.matches(10.0, 10.0)], ["Continent"])
+        self.assertEqual([z.name for z in index.matches(89.995, 120.0)], ["Pole"])
+
+    def test_polygon_zone_uses_point_in_polygon(self):
+        from drones.geofence_index import GeofenceIndex
+
+        # L-shaped polygon, [lng, lat]; (35.15, 31.15) is inside the bbox but in the notch
+        l_shape = [[35.0, 31.0], [35.2, 31.0], [35.2, 31.1], [35.1, 31.1], [35.1, 31.2], [35.0, 31.2]]
+        index = GeofenceIndex([{"name": "L", "shape": "polygon", "polygon": l_shape}], cell_deg=0.1)
+
+        self.assertEqual([z.name for z in index.matches(31.05, 35.15)], ["L"])
+        self.assertEqual([z.name for z in index.matches(31.15, 35.05)], ["L"])
+        self.assertEqual(index.matches(31.15, 35.15), [])
+        self.assertEqual(index.matches(31.5, 35.5), [])
+
+
+class PolygonGeofenceFeatureTests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+
+    def tearDown(self):
+        geofence_zone_cache.invalidate()
+        super().tearDown()
+
+    def test_staff_can_create_polygon_zone_and_it_flags_drones(self):
+        square = [[35.90, 31.94], [35.92, 31.94], [35.92, 31.96], [35.90, 31.96]]
+        res = self.client.post(
+            reverse("geofence-zone-list-create"),
+            {"name": "Stadium", "shape": "polygon", "polygon": square},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.json())
+        self.assertEqual(res.json()["polygon"], square)
+
+        res = self.client.post(reverse("telemetry-ingest"), {"serial": "POLY1", "lat": 31.95, "lng": 35.91}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn("Entered no-fly zone: Stadium", Drone.objects.get(serial="POLY1").danger_reasons)
+
+    def test_polygon_zone_needs_three_vertices(self):
+        res = self.client.post(
+            reverse("geofence-zone-list-create"),
+            {"name": "Bad", "shape": "polygon", "polygon": [[35.0, 31.0], [35.1, 31.0]]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("polygon", res.json())
+
+    def test_circle_zone_still_requires_center(self):
+        res = self.client.post(reverse("geofence-zone-list-create"), {"name": "NoCenter", "radius_km": 1.0}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("lat", res.json())
+
+
+class ClassifierRegistryTests(SimpleTestCase):
+    def test_default_classifier_is_reused(self):
+        self.assertIs(default_classifier(), default_classifier())
+
+    @override_settings(DRONE_HEIGHT_THRESHOLD_M=100.0, DRONE_SPEED_THRESHOLD_MPS=3.0)
+    def test_thresholds_come_from_settings(self):
+        reasons = default_classifier().classify(height_m=150, horizontal_speed_mps=4)
+        self.assertIn("Altitude greater than 100 meters", reasons)
+        self.assertIn("Horizontal speed greater than 3 m/s", reasons)
+
+    def test_rebuilt_only_when_settings_change(self):
+        before = default_classifier()
+        with override_settings(DRONE_DANGER_RULES=["speed"]):
+            changed = default_classifier()
+            self.assertIsNot(changed, before)
+            self.assertIsNone(changed.geofence)
+            self.assertEqual(changed.classify(height_m=9000, horizontal_speed_mps=1), [])
+            self.assertIs(default_classifier(), changed)
+        self.assertEqual(default_classifier().classify(height_m=9000), ["Altitude greater than 500 meters"])
+
+    def test_reload_builds_new_instance(self):
+        from drones.danger_strategies import classifier_registry
+
+        before = default_classifier()
+        self.assertIsNot(classifier_registry.reload(), before)
+
+    @override_settings(DRONE_DANGER_RULES=["height", "wind"])
+    def test_unknown_rule_is_rejected(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        with self.assertRaises(ImproperlyConfigured):
+            default_classifier()
+
+
+class BatchClassificationTests(TestCase):
+    def setUp(self):
+        import random
+
+        self.rng = random.Random(3)
+        GeofenceZone.objects.bulk_create(
+            [GeofenceZone(name=f"C{i}", lat=self.rng.uniform(31, 32), lng=self.rng.uniform(35, 36), radius_km=3.0) for i in range(40)]
+            + [GeofenceZone(
+                name="Poly",
+                shape="polygon",
+                polygon=[[35.2, 31.2], [35.6, 31.2], [35.6, 31.4], [35.4, 31.3], [35.2, 31.4]],
+            )]
+        )
+        geofence_zone_cache.invalidate()
+
+    def tearDown(self):
+        geofence_zone_cache.invalidate()
+        super().tearDown()
+
+    def _columns(self, n):
+        def maybe(value):
+            return None if self.rng.random() < 0.1 else value
+
+        return {
+            "height_m": [maybe(self.rng.uniform(0, 1000)) for _ in range(n)],
+            "horizontal_speed_mps": [maybe(self.rng.uniform(0, 20)) for _ in range(n)],
+            "lat": [maybe(self.rng.uniform(30.9, 32.1)) for _ in range(n)],
+            "lng": [maybe(self.rng.uniform(34.9, 36.1)) for _ in range(n)],
+        }
+
+    def _assert_matches_scalar_path(self, columns):
+        classifier = default_classifier()
+        expected = [
+            classifier.classify(
+                height_m=columns["height_m"][i],
+                horizontal_speed_mps=columns["horizontal_speed_mps"][i],
+                lat=columns["lat"][i],
+                lng=columns["lng"][i],
+            )
+            for i in range(len(columns["lat"]))
+        ]
+        self.assertEqual(classifier.classify_batch(**columns), expected)
+
+    def test_batch_matches_scalar_classify(self):
+        self._assert_matches_scalar_path(self._columns(2000))
+
+    def test_batch_accepts_float_arrays_with_nan(self):
+        from array import array
+
+        columns = self._columns(500)
+        nan = float("nan")
+        arrays = {k: array("d", (nan if v is None else v for v in col)) for k, col in columns.items()}
+        expected = default_classifier().classify_batch(**columns)
+        self.assertEqual(default_classifier().classify_batch(**arrays), expected)
+
+    def test_batch_without_numpy_matches_scalar_classify(self):
+        with patch("drones.danger_strategies.np", None), patch("drones.geofence_index.np", None):
+            self._assert_matches_scalar_path(self._columns(300))
+
+    def test_rule_without_batch_kernel_falls_back_to_check(self):
+        from drones.danger_strategies import DangerClassifier
+
+        class OddHeightRule:
+            def check(self, *, height_m, horizontal_speed_mps):
+                return "odd" if height_m is not None and int(height_m) % 2 else None
+
+        reasons = DangerClassifier([OddHeightRule()]).classify_batch(
+            height_m=[1, 2, None], horizontal_speed_mps=[0, 0, 0]
+        )
+        self.assertEqual(reasons, [["odd"], [], []])
+
+
+class ReclassifyDronesCommandTests(TestCase):
+    def _drone_with_point(self, serial, *, height_m, last_seen=None, flagged=False):
+        last_seen = last_seen or timezone.now()
+        drone = Drone.objects.create(
+            serial=serial,
+            last_seen=last_seen,
+            last_lat=31.0,
+            last_lng=35.0,
+            is_dangerous=flagged,
+            danger_reasons=["Altitude greater than 500 meters"] if flagged else [],
+        )
+        DroneTelemetry.objects.create(drone=drone, timestamp=last_seen - timedelta(minutes=1), lat=31.0, lng=35.0, height_m=9000)
+        DroneTelemetry.objects.create(drone=drone, timestamp=last_seen, lat=31.0, lng=35.0, height_m=height_m)
+        return drone
+
+    def _call(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("reclassify_drones", *args, stdout=out)
+        return out.getvalue()
+
+    @override_settings(DRONE_HEIGHT_THRESHOLD_M=100.0)
+    def test_new_threshold_is_applied_from_latest_point(self):
+        self._drone_with_point("RC1", height_m=150)
+        self._drone_with_point("RC2", height_m=50, flagged=True)
+        Drone.objects.create(serial="RC-NO-TELEMETRY")
+
+        out = self._call()
+
+        rc1, rc2 = Drone.objects.get(serial="RC1"), Drone.objects.get(serial="RC2")
+        self.assertTrue(rc1.is_dangerous)
+        self.assertEqual(rc1.danger_reasons, ["Altitude greater than 100 meters"])
+        self.assertFalse(rc2.is_dangerous)
+        self.assertEqual(rc2.danger_reasons, [])
+        self.assertIn("checked=2 updated=2", out)
+
+    def test_serial_and_since_filters(self):
+        old = timezone.now() - timedelta(days=3)
+        self._drone_with_point("RC-OLD", height_m=900, last_seen=old)
+        self._drone_with_point("RC-NEW", height_m=900)
+        self._drone_with_point("RC-OTHER", height_m=900)
+
+        self._call("--since", (timezone.now() - timedelta(days=1)).isoformat(), "--serial", "RC-NEW", "--serial", "RC-OLD")
+
+        self.assertFalse(Drone.objects.get(serial="RC-OLD").is_dangerous)
+        self.assertTrue(Drone.objects.get(serial="RC-NEW").is_dangerous)
+        self.assertFalse(Drone.objects.get(serial="RC-OTHER").is_dangerous)
+
+    def test_unchanged_drones_are_not_rewritten(self):
+        self._drone_with_point("RC-SAME", height_m=900, flagged=True)
+        self.assertIn("checked=1 updated=0", self._call())
+
+    def test_invalid_since_is_rejected(self):
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            self._call("--since", "yesterday")
+
+    def test_since_accepts_what_the_api_accepts(self):
+        # an unencoded '+' offset arrives as a space; ?from= takes it, so --since does too
+        self._drone_with_point("RC-SPACE", height_m=900)
+        since = (timezone.now() - timedelta(days=1)).astimezone(dt_timezone(timedelta(hours=2)))
+
+        self._call("--since", since.isoformat().replace("+", " "))
+
+        self.assertTrue(Drone.objects.get(serial="RC-SPACE").is_dangerous)
+
+
+class NearbyBoundingBoxTests(AuthenticatedAPITestCase):
+    def test_far_drones_are_filtered_in_sql(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        Drone.objects.create(serial="BB-NEAR", last_seen=timezone.now(), last_lat=31.01, last_lng=35.0)
+        Drone.objects.bulk_create(
+            [Drone(serial=f"BB-FAR{i}", last_seen=timezone.now(), last_lat=40.0 + i * 0.01, last_lng=35.0) for i in range(20)]
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(reverse("nearby-drone-list") + "?lat=31.0&lng=35.0")
+
+        self.assertEqual([d["serial"] for d in res.json()], ["BB-NEAR"])
+        drone_query = [q["sql"] for q in ctx.captured_queries if 'FROM "drones_drone"' in q["sql"]][-1]
+        self.assertIn('"last_lat" >=', drone_query)
+
+    def test_nearby_across_antimeridian(self):
+        Drone.objects.create(serial="BB-EAST", last_seen=timezone.now(), last_lat=0.0, last_lng=179.99)
+        Drone.objects.create(serial="BB-WEST", last_seen=timezone.now(), last_lat=0.0, last_lng=-179.99)
+
+        res = self.client.get(reverse("nearby-drone-list") + "?lat=0.0&lng=-179.995")
+        self.assertEqual(sorted(d["serial"] for d in res.json()), ["BB-EAST", "BB-WEST"])
+
+    def test_bounding_box_contains_circle(self):
+        from drones.utils import bounding_box
+
+        min_lat, max_lat, min_lng, max_lng = bounding_box(31.0, 35.0, 5)
+        # points exactly 5 km north/east must be inside the box
+        self.assertLessEqual(max_lat - 31.0, 0.0451)
+        self.assertGreaterEqual(max_lat - 31.0, 0.0449)
+        self.assertAlmostEqual(haversine_km(31.0, 35.0, 31.0, max_lng), 5.0, delta=0.2)
+        self.assertIsNone(bounding_box(89.99, 0.0, 5)[2])
+
+
+class NearbyQueryOptionsTests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # roughly 1.1 km, 3.3 km and 11 km north of (31.0, 35.0)
+        for serial, lat in [("NQ-MID", 31.03), ("NQ-NEAR", 31.01), ("NQ-FAR", 31.1)]:
+            Drone.objects.create(serial=serial, last_seen=now, last_lat=lat, last_lng=35.0)
+        self.url = reverse("nearby-drone-list")
+
+    def _get(self, query):
+        return self.client.get(self.url + "?lat=31.0&lng=35.0" + query)
+
+    def test_results_are_sorted_by_distance_and_include_it(self):
+        data = self._get("").json()
+        self.assertEqual([d["serial"] for d in data], ["NQ-NEAR", "NQ-MID"])
+        self.assertAlmostEqual(data[0]["distance_km"], 1.11, delta=0.01)
+        self.assertLess(data[0]["distance_km"], data[1]["distance_km"])
+
+    def test_radius_km(self):
+        self.assertEqual([d["serial"] for d in self._get("&radius_km=2").json()], ["NQ-NEAR"])
+        self.assertEqual(len(self._get("&radius_km=20").json()), 3)
+
+    def test_k_nearest_ignores_default_radius(self):
+        data = self._get("&k=3").json()
+        self.assertEqual([d["serial"] for d in data], ["NQ-NEAR", "NQ-MID", "NQ-FAR"])
+        self.assertEqual([d["serial"] for d in self._get("&k=1").json()], ["NQ-NEAR"])
+
+    def test_k_nearest_respects_explicit_radius(self):
+        self.assertEqual(len(self._get("&k=3&radius_km=5").json()), 2)
+
+    def test_limit(self):
+        self.assertEqual([d["serial"] for d in self._get("&limit=1").json()], ["NQ-NEAR"])
+
+    def test_invalid_options_return_400(self):
+        for query in ["&radius_km=abc", "&radius_km=0", "&k=0", "&k=1.5", "&limit=-1"]:
+            self.assertEqual(self._get(query).status_code, status.HTTP_400_BAD_REQUEST, query)
+
+
+class TelemetryKeysetPaginationTests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.drone = Drone.objects.create(serial="PG-1")
+        self.t0 = timezone.now().replace(microsecond=0) - timedelta(hours=1)
+        # two points share every timestamp so the id tie-break matters
+        DroneTelemetry.objects.bulk_create(
+            [
+                DroneTelemetry(drone=self.drone, timestamp=self.t0 + timedelta(seconds=i // 2), lat=31.0, lng=35.0)
+                for i in range(10)
+            ]
+        )
+        self.url = reverse("drone-telemetry", kwargs={"serial": "PG-1"})
+
+    def _walk(self, url):
+        ids = []
+        pages = 0
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids += [row["id"] for row in res.json()]
+            pages += 1
+            link = res.get("Link")
+            url = link[1:link.index(">")] if link else None
+        return ids, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        ids, pages = self._walk(self.url + "?limit=3")
+        expected = list(DroneTelemetry.objects.filter(drone=self.drone).order_by("timestamp", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_single_page_has_no_link(self):
+        res = self.client.get(self.url)
+        self.assertEqual(len(res.json()), 10)
+        self.assertNotIn("Link", res)
+
+    def test_from_to_filters(self):
+        start = (self.t0 + timedelta(seconds=1)).isoformat()
+        end = (self.t0 + timedelta(seconds=3)).isoformat()
+        res = self.client.get(self.url, {"from": start, "to": end})
+        self.assertEqual(len(res.json()), 4)
+
+        # the range is kept on the next-page link
+        ids, pages = self._walk(self.url + "?" + urlencode({"from": start, "to": end, "limit": 3}))
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(pages, 2)
+
+    def test_limit_is_capped(self):
+        from drones.pagination import MAX_PAGE_SIZE, parse_page_size
+
+        self.assertEqual(parse_page_size(str(MAX_PAGE_SIZE * 10)), MAX_PAGE_SIZE)
+
+    def test_invalid_params_return_400(self):
+        for params in [{"cursor": "garbage"}, {"from": "yesterday"}, {"limit": "0"}, {"limit": "x"}]:
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+@override_settings(DRONE_STREAM_CHUNK_SIZE=3)
+class StreamingResponseTests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.drone = Drone.objects.create(serial="ST-1")
+        t0 = timezone.now() - timedelta(minutes=10)
+        DroneTelemetry.objects.bulk_create(
+            [
+                DroneTelemetry(drone=self.drone, timestamp=t0 + timedelta(seconds=i), lat=31.0 + i / 1000, lng=35.0,
+                               height_m=None if i == 0 else 10.0 * i, horizontal_speed_mps=1.5)
+                for i in range(7)
+            ]
+        )
+
+    def _body(self, res):
+        import json
+
+        self.assertTrue(res.streaming)
+        return json.loads(b"".join(res.streaming_content))
+
+    def test_streamed_telemetry_matches_regular_response(self):
+        url = reverse("drone-telemetry", kwargs={"serial": "ST-1"})
+        regular = self.client.get(url).json()
+        streamed = self._body(self.client.get(url, {"stream": "1"}))
+        self.assertEqual(streamed, regular)
+        self.assertEqual(len(streamed), 7)
+
+    def test_streamed_telemetry_honours_time_range(self):
+        url = reverse("drone-telemetry", kwargs={"serial": "ST-1"})
+        start = DroneTelemetry.objects.order_by("timestamp")[2].timestamp.isoformat()
+        self.assertEqual(len(self._body(self.client.get(url, {"stream": "true", "from": start}))), 5)
+
+    def test_streamed_path_matches_regular_response(self):
+        url = reverse("drone-path-geojson", kwargs={"serial": "ST-1"})
+        regular = self.client.get(url).json()
+        streamed = self._body(self.client.get(url, {"stream": "1"}))
+        self.assertEqual(streamed, regular)
+        self.assertEqual(streamed["properties"]["count"], 7)
+
+    def test_empty_stream_is_valid_json(self):
+        Drone.objects.create(serial="ST-EMPTY")
+        url = reverse("drone-path-geojson", kwargs={"serial": "ST-EMPTY"})
+        body = self._body(self.client.get(url, {"stream": "1"}))
+        self.assertEqual(body["geometry"]["coordinates"], [])
+        self.assertEqual(body["properties"]["count"], 0)
+
+
+class PathSimplificationUnitTests(SimpleTestCase):
+    def _zigzag(self, n=200):
+        # ~110 m north per step with a ~50 m sideways wobble every point
+        return [(35.0 + (0.0005 if i % 2 else 0.0), 31.0 + i * 0.001) for i in range(n)]
+
+    def test_straight_line_collapses_to_endpoints(self):
+        from drones.simplify import simplify_path
+
+        line = [(35.0, 31.0 + i * 0.001) for i in range(50)]
+        self.assertEqual(simplify_path(line, tolerance_m=1), [line[0], line[-1]])
+
+    def test_tolerance_keeps_wobbles_larger_than_it(self):
+        from drones.simplify import simplify_path
+
+        line = self._zigzag()
+        self.assertEqual(len(simplify_path(line, tolerance_m=10)), len(line))
+        self.assertEqual(simplify_path(line, tolerance_m=100), [line[0], line[-1]])
+
+    def test_max_points_caps_and_keeps_endpoints(self):
+        from drones.simplify import simplify_path
+
+        line = self._zigzag()
+        out = simplify_path(line, max_points=10)
+        self.assertEqual(len(out), 10)
+        self.assertEqual((out[0], out[-1]), (line[0], line[-1]))
+
+    def test_python_fallback_matches_numpy(self):
+        from drones import simplify
+
+        line = [(35.0 + 0.001 * math.sin(i / 7), 31.0 + i * 0.0003) for i in range(300)]
+        fast = simplify.simplify_path(line, tolerance_m=3, max_points=40)
+        with patch.object(simplify, "np", None):
+            slow = simplify.simplify_path(line, tolerance_m=3, max_points=40)
+        self.assertEqual(fast, slow)
+
+
+class PathSimplificationAPITests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        drone = Drone.objects.create(serial="SIMP-1")
+        t0 = timezone.now() - timedelta(minutes=10)
+        DroneTelemetry.objects.bulk_create(
+            [DroneTelemetry(drone=drone, timestamp=t0 + timedelta(seconds=i), lat=31.0 + i * 0.0001, lng=35.0) for i in range(100)]
+        )
+        self.url = reverse("drone-path-geojson", kwargs={"serial": "SIMP-1"})
+
+    def test_counts_are_reported(self):
+        body = self.client.get(self.url, {"tolerance_m": "1"}).json()
+        self.assertEqual(len(body["geometry"]["coordinates"]), 2)
+        self.assertEqual(body["properties"]["original_count"], 100)
+        self.assertEqual(body["properties"]["simplified_count"], 2)
+        self.assertEqual(body["properties"]["count"], 2)
+
+    def test_plain_request_is_unchanged(self):
+        body = self.client.get(self.url).json()
+        self.assertEqual(body["properties"], {"serial": "SIMP-1", "count": 100})
+
+    def test_invalid_params_return_400(self):
+        for params in [{"tolerance_m": "x"}, {"tolerance_m": "-1"}, {"max_points": "1"}, {"max_points": "2.5"}]:
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class TelemetryAggregateTests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.drone = Drone.objects.create(serial="AGG-1")
+        self.t0 = timezone.now().replace(second=0, microsecond=0) - timedelta(hours=1)
+        # 90 points one second apart: 60 in the first minute, 30 in the second
+        DroneTelemetry.objects.bulk_create(
+            [
+                DroneTelemetry(drone=self.drone, timestamp=self.t0 + timedelta(seconds=i, microseconds=500),
+                               lat=31.0 + i / 1000, lng=35.0, height_m=float(i), horizontal_speed_mps=2.0)
+                for i in range(90)
+            ]
+        )
+        self.url = reverse("drone-telemetry-aggregate", kwargs={"serial": "AGG-1"})
+
+    def test_minute_buckets(self):
+        data = self.client.get(self.url, {"bucket": "1m"}).json()
+        self.assertEqual([b["count"] for b in data], [60, 30])
+
+        first, second = data
+        self.assertEqual((first["min_height_m"], first["max_height_m"]), (0.0, 59.0))
+        self.assertAlmostEqual(first["avg_height_m"], 29.5)
+        self.assertEqual(first["avg_speed_mps"], 2.0)
+        self.assertAlmostEqual(first["last_lat"], 31.059)
+        self.assertAlmostEqual(second["last_lat"], 31.089)
+        self.assertEqual(first["bucket_start"][:19], self.t0.astimezone(dt_timezone.utc).isoformat()[:19])
+
+    def test_ten_second_buckets_with_range_and_limit(self):
+        data = self.client.get(self.url, {"bucket": "10s"}).json()
+        self.assertEqual(len(data), 9)
+        self.assertTrue(all(b["count"] == 10 for b in data))
+
+        start = (self.t0 + timedelta(seconds=30)).isoformat()
+        data = self.client.get(self.url, {"bucket": "10s", "from": start, "limit": 2}).json()
+        self.assertEqual([b["min_height_m"] for b in data], [30.0, 40.0])
+
+    def test_invalid_bucket_returns_400(self):
+        self.assertEqual(self.client.get(self.url, {"bucket": "7s"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TelemetryRollupTests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.drone = Drone.objects.create(serial="ROLL-1")
+        self.t0 = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+        # one point every 30 s for 90 minutes; heights 0..179, no height on the very first point
+        DroneTelemetry.objects.bulk_create(
+            [
+                DroneTelemetry(drone=self.drone, timestamp=self.t0 + timedelta(seconds=30 * i),
+                               lat=31.0 + i / 1000, lng=35.0, height_m=None if i == 0 else float(i),
+                               horizontal_speed_mps=3.0)
+                for i in range(180)
+            ]
+        )
+        self.url = reverse("drone-telemetry-aggregate", kwargs={"serial": "ROLL-1"})
+
+    def _call(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("rollup_telemetry", *args, stdout=out)
+        return out.getvalue()
+
+    def test_rollups_match_raw_aggregates(self):
+        from drones.models import TelemetryRollup
+
+        self._call()
+        self.assertEqual(TelemetryRollup.objects.filter(resolution="1m").count(), 90)
+        self.assertEqual(TelemetryRollup.objects.filter(resolution="1h").count(), 2)
+
+        for bucket in ("1m", "1h"):
+            raw = self.client.get(self.url, {"bucket": bucket}).json()
+            rolled = self.client.get(self.url, {"bucket": bucket, "source": "rollup"}).json()
+            self.assertEqual(len(rolled), len(raw))
+            for a, b in zip(raw, rolled):
+                for key in ("bucket_start", "count", "min_height_m", "max_height_m", "max_speed_mps", "last_timestamp", "last_lat"):
+                    self.assertEqual(a[key], b[key], (bucket, key))
+                if a["avg_height_m"] is None:
+                    self.assertIsNone(b["avg_height_m"])
+                else:
+                    self.assertAlmostEqual(a["avg_height_m"], b["avg_height_m"])
+
+    def test_incremental_run_picks_up_new_points(self):
+        from drones.models import TelemetryRollup
+
+        self._call()
+        last = DroneTelemetry.objects.order_by("-timestamp").first()
+        DroneTelemetry.objects.create(drone=self.drone, timestamp=last.timestamp + timedelta(seconds=10),
+                                      lat=40.0, lng=35.0, height_m=999.0)
+        self._call()
+
+        hour = TelemetryRollup.objects.get(resolution="1h", bucket_start=self.t0 + timedelta(hours=1))
+        self.assertEqual(hour.count, 61)
+        self.assertEqual(hour.max_height_m, 999.0)
+        self.assertEqual(hour.last_lat, 40.0)
+        # re-running does not duplicate rows
+        self.assertEqual(TelemetryRollup.objects.filter(resolution="1m").count(), 90)
+
+    def test_rollup_source_rejects_other_buckets(self):
+        res = self.client.get(self.url, {"bucket": "10s", "source": "rollup"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TelemetryPartitionPlanningTests(SimpleTestCase):
+    def test_monthly_plan_rolls_over_the_year(self):
+        from datetime import date
+        from drones.partitions import planned_partitions
+
+        plan = planned_partitions(date(2026, 11, 17), 2, "month")
+        self.assertEqual(
+            [(name[-8:], start, end) for name, start, end in plan],
+            [
+                ("p2026_11", date(2026, 11, 1), date(2026, 12, 1)),
+                ("p2026_12", date(2026, 12, 1), date(2027, 1, 1)),
+                ("p2027_01", date(2027, 1, 1), date(2027, 2, 1)),
+            ],
+        )
+
+    def test_daily_names_round_trip(self):
+        from datetime import date
+        from drones.partitions import parse_partition_name, partition_name
+
+        name = partition_name(date(2026, 2, 28), "day")
+        self.assertEqual(name, "drones_dronetelemetry_p2026_02_28")
+        self.assertEqual(parse_partition_name(name), (date(2026, 2, 28), date(2026, 3, 1)))
+        self.assertIsNone(parse_partition_name("drones_dronetelemetry_default"))
+
+    def test_only_fully_expired_partitions_are_dropped(self):
+        from datetime import datetime
+        from drones.partitions import expired_partitions
+
+        names = [
+            "drones_dronetelemetry_default",
+            "drones_dronetelemetry_p2026_08",
+            "drones_dronetelemetry_p2026_09",
+            "drones_dronetelemetry_p2026_10",
+        ]
+        cutoff = datetime(2026, 10, 1, 12, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            expired_partitions(names, cutoff),
+            ["drones_dronetelemetry_p2026_08", "drones_dronetelemetry_p2026_09"],
+        )
+
+    def test_command_requires_partitioned_postgres(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        with patch("drones.management.commands.manage_partitions.is_partitioned", return_value=False):
+            with self.assertRaises(CommandError):
+                call_command("manage_partitions")
+
+
+class TelemetryPartitionMigrationWindowTests(SimpleTestCase):
+    def _first_period(self, *args):
+        import importlib
+
+        migration = importlib.import_module("drones.migrations.0006_partition_dronetelemetry")
+        return migration.first_period(*args)
+
+    def test_old_outliers_do_not_widen_the_window(self):
+        from datetime import date
+
+        today = date(2026, 3, 17)
+        self.assertEqual(self._first_period(date(1970, 1, 1), today, "month", 12), date(2025, 3, 1))
+        self.assertEqual(self._first_period(date(1970, 1, 1), today, "day", 30), date(2026, 2, 15))
+
+    def test_recent_oldest_row_starts_the_window(self):
+        from datetime import date
+
+        today = date(2026, 3, 17)
+        self.assertEqual(self._first_period(date(2025, 11, 20), today, "month", 12), date(2025, 11, 1))
+        self.assertEqual(self._first_period(None, today, "month", 12), date(2026, 3, 1))
+
+
+@skipUnless(connection.vendor == "postgresql", "partitioning and COPY are PostgreSQL only")
+class PostgresTelemetryPartitionTests(TestCase):
+    def _partition_of(self, telemetry_id):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM "drones_dronetelemetry" WHERE id = %s', [telemetry_id])
+            return cursor.fetchone()[0]
+
+    def test_migration_partitioned_the_table(self):
+        from drones.partitions import DEFAULT_PARTITION, existing_partitions, is_partitioned
+
+        self.assertTrue(is_partitioned())
+        self.assertIn(DEFAULT_PARTITION, existing_partitions())
+
+    def test_create_partitions_moves_rows_out_of_default(self):
+        from datetime import date, datetime
+        from drones.partitions import DEFAULT_PARTITION, create_partitions, planned_partitions
+
+        drone = Drone.objects.create(serial="PART-1")
+        far = datetime(2099, 5, 10, 12, tzinfo=dt_timezone.utc)
+        point = DroneTelemetry.objects.create(drone=drone, timestamp=far, lat=1.0, lng=2.0)
+        self.assertEqual(self._partition_of(point.id), DEFAULT_PARTITION)
+
+        planned = planned_partitions(date(2099, 5, 1), 0, "month")
+        self.assertEqual(create_partitions(planned), ["drones_dronetelemetry_p2099_05"])
+
+        self.assertEqual(self._partition_of(point.id), "drones_dronetelemetry_p2099_05")
+        self.assertEqual(DroneTelemetry.objects.get(id=point.id).lat, 1.0)
+        # DEFAULT is attached again and still catches out-of-range rows
+        later = DroneTelemetry.objects.create(drone=drone, timestamp=far.replace(year=2098), lat=3.0, lng=4.0)
+        self.assertEqual(self._partition_of(later.id), DEFAULT_PARTITION)
+        self.assertEqual(create_partitions(planned), [])
+
+
+@skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL only")
+class PostgresTelemetryCopyTests(TestCase):
+    def test_copy_writes_rows_and_never_moves_a_drone_backwards(self):
+        from drones.telemetry_copy import copy_telemetry_batch
+
+        t0 = timezone.now() - timedelta(minutes=5)
+        written = copy_telemetry_batch([
+            {"serial": "PGC-1", "lat": 31.0, "lng": 35.0, "height_m": 900.0, "timestamp": t0},
+            {"serial": "PGC-1", "lat": 31.5, "lng": 35.5, "timestamp": t0 + timedelta(seconds=1)},
+        ])
+        self.assertEqual(written, 2)
+        drone = Drone.objects.get(serial="PGC-1")
+        self.assertEqual(DroneTelemetry.objects.filter(drone=drone).count(), 2)
+        self.assertEqual((drone.last_lat, drone.is_dangerous), (31.5, False))
+
+        copy_telemetry_batch([{"serial": "PGC-1", "lat": 10.0, "lng": 10.0, "height_m": 900.0, "timestamp": t0 - timedelta(hours=1)}])
+        drone.refresh_from_db()
+        self.assertEqual(DroneTelemetry.objects.filter(drone=drone).count(), 3)
+        self.assertEqual((drone.last_lat, drone.last_seen, drone.is_dangerous), (31.5, t0 + timedelta(seconds=1), False))
+
+
+class TelemetryCopyWriterTests(TestCase):
+    def _items(self):
+        t0 = timezone.now() - timedelta(minutes=1)
+        return [
+            {"serial": "CP-A", "lat": 31.0, "lng": 35.0, "height_m": 10.0, "timestamp": t0},
+            {"serial": "CP-B", "lat": 32.0, "lng": 36.0, "height_m": 900.0, "timestamp": t0},
+            {"serial": "CP-A", "lat": 31.5, "lng": 35.5, "timestamp": t0 + timedelta(seconds=1)},
+        ]
+
+    @override_settings(DRONE_TELEMETRY_COPY=True)
+    def test_falls_back_to_orm_off_postgres(self):
+        from drones.services import write_telemetry_batch
+
+        self.assertEqual(write_telemetry_batch(self._items()), 3)
+        self.assertEqual(DroneTelemetry.objects.count(), 3)
+        self.assertEqual(Drone.objects.get(serial="CP-A").last_lat, 31.5)
+
+    def test_copy_statement_and_rows(self):
+        from drones import telemetry_copy
+
+        copy = MagicMock()
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(7, "CP-A"), (8, "CP-B")]
+        cursor.cursor.copy.return_value.__enter__.return_value = copy
+        fake_connection = MagicMock()
+        fake_connection.ops.quote_name = lambda name: f'"{name}"'
+        fake_connection.cursor.return_value.__enter__.return_value = cursor
+
+        with patch.object(telemetry_copy, "connection", fake_connection):
+            written = telemetry_copy.copy_telemetry_batch(self._items())
+
+        self.assertEqual(written, 3)
+        upsert_sql, params = cursor.execute.call_args[0]
+        self.assertIn("ON CONFLICT (serial) DO UPDATE", upsert_sql)
+        # one entry per drone, newest point wins, danger flags from the classifier
+        self.assertEqual(params[2], ["CP-A", "CP-B"])
+        self.assertEqual(params[4], [31.5, 32.0])
+        self.assertEqual(params[6], [False, True])
+
+        self.assertIn("FROM STDIN (FORMAT BINARY)", cursor.cursor.copy.call_args[0][0])
+        rows = [c.args[0] for c in copy.write_row.call_args_list]
+        self.assertEqual([(r[0], r[2]) for r in rows], [(7, 31.0), (8, 32.0), (7, 31.5)])
+
+
+class TelemetryValidatorParityTests(SimpleTestCase):
+    CASES = [
+        {"serial": " DR-1 ", "lat": "31.5", "lng": 35, "height": 12, "speed": "3.5", "timestamp": "2026-01-01T12:00:00Z"},
+        {"serial": "DR-1", "lat": 31.5, "lng": 35.0, "height_m": 1.0, "height": 2.0, "timestamp": "2026-01-01 12:00"},
+        {"serial": "", "lat": None},
+        {"serial": "x" * 65, "lat": "abc", "lng": True, "timestamp": "yesterday"},
+        {"serial": ["DR"], "lat": 1, "lng": 1, "horizontal_speed_mps": "1e999"},
+        {"serial": "   ", "lat": "", "lng": "x" * 1001},
+        {"serial": "DR\x00" + "x" * 70, "lat": "nan", "lng": "-inf", "speed": None},
+        {"serial": "DR-1", "lat": 1, "lng": 1, "timestamp": "0001-01-01T00:00:00+05:00"},
+        ["not", "a", "dict"],
+    ]
+
+    def test_same_validated_data_and_errors_as_serializer(self):
+        from drones.telemetry_in_serializer import TelemetryInSerializer
+        from drones.telemetry_validation import TelemetryValidationError, validate_telemetry
+
+        for case in self.CASES:
+            serializer = TelemetryInSerializer(data=case)
+            if serializer.is_valid():
+                self.assertEqual(validate_telemetry(case), dict(serializer.validated_data), case)
+            else:
+                with self.assertRaises(TelemetryValidationError, msg=case) as ctx:
+                    validate_telemetry(case)
+                self.assertEqual(ctx.exception.errors, serializer.errors, case)
+
+
+class ImportTelemetryCommandTests(TestCase):
+    def _write(self, name, text, compress=False):
+        import gzip
+
+        path = os.path.join(self.tmp.name, name)
+        data = text.encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(gzip.compress(data) if compress else data)
+        return path
+
+    def setUp(self):
+        import tempfile
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _call(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out, err = StringIO(), StringIO()
+        call_command("import_telemetry", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_ndjson_gzip_with_invalid_rows(self):
+        path = self._write(
+            "flight.ndjson.gz",
+            '{"serial": "IM-1", "lat": 31.0, "lng": 35.0, "timestamp": "2026-01-01T00:00:00Z"}\n'
+            "\n"
+            "{not json\n"
+            '{"serial": "IM-1", "lat": 31.1, "lng": 35.1, "height": 700, "timestamp": "2026-01-01T00:00:01Z"}\n'
+            '{"serial": "IM-2", "lng": 35.0}\n',
+            compress=True,
+        )
+        out, err = self._call(path, "--batch-size", "1")
+
+        self.assertIn("rows=2 rejected=2", out)
+        self.assertIn("line 3", err)
+        self.assertIn("line 5", err)
+        drone = Drone.objects.get(serial="IM-1")
+        self.assertEqual(drone.telemetry.count(), 2)
+        self.assertEqual(drone.last_lat, 31.1)
+        self.assertTrue(drone.is_dangerous)
+
+    def test_csv_with_empty_optional_cells(self):
+        path = self._write(
+            "flight.csv",
+            "serial,lat,lng,timestamp,height_m,horizontal_speed_mps\n"
+            "IM-CSV,31.0,35.0,2026-01-01T00:00:00Z,,\n"
+            "IM-CSV,31.2,35.2,2026-01-01T00:00:05Z,120.5,4\n",
+        )
+        out, _ = self._call(path)
+
+        self.assertIn("rows=2 rejected=0", out)
+        heights = list(DroneTelemetry.objects.order_by("timestamp").values_list("height_m", flat=True))
+        self.assertEqual(heights, [None, 120.5])
+
+    def test_dry_run_and_max_errors(self):
+        from django.core.management.base import CommandError
+
+        path = self._write("bad.jsonl", '{"serial": "IM-3"}\n{"serial": "IM-3"}\n')
+        out, _ = self._call(path, "--dry-run")
+        self.assertIn("Validated telemetry: rows=0 rejected=2", out)
+
+        with self.assertRaises(CommandError):
+            self._call(path, "--max-errors", "1")
+        self.assertFalse(Drone.objects.exists())
+
+    def test_unreadable_input_is_a_command_error_with_its_line(self):
+        import gzip
+        from django.core.management.base import CommandError
+
+        rows = "".join(f'{{"serial": "IM-T", "lat": 31.0, "lng": 35.{i}}}\n' for i in range(200))
+        truncated = os.path.join(self.tmp.name, "cut.ndjson.gz")
+        with open(truncated, "wb") as f:
+            f.write(gzip.compress(rows.encode("utf-8"))[:-20])
+        with self.assertRaisesMessage(CommandError, "cut.ndjson.gz line "):
+            self._call(truncated, "--dry-run")
+
+        latin1 = os.path.join(self.tmp.name, "latin1.ndjson")
+        with open(latin1, "wb") as f:
+            f.write('{"serial": "IM-T", "lat": 31.0, "lng": 35.0}\n{"serial": "IM-\xe9"}\n'.encode("latin-1"))
+        with self.assertRaisesMessage(CommandError, "latin1.ndjson line 2: not valid UTF-8"):
+            self._call(latin1, "--dry-run")
+
+    def test_history_does_not_move_the_drone_backwards(self):
+        newest = timezone.now() - timedelta(minutes=1)
+        Drone.objects.create(serial="IM-OLD", last_seen=newest, last_lat=1.0, last_lng=2.0)
+        path = self._write(
+            "history.ndjson",
+            '{"serial": "IM-OLD", "lat": 31.0, "lng": 35.0, "height": 900, "timestamp": "2025-01-01T00:00:00Z"}\n',
+        )
+        self._call(path, "--writer", "orm")
+
+        drone = Drone.objects.get(serial="IM-OLD")
+        self.assertEqual(drone.telemetry.count(), 1)
+        self.assertEqual((drone.last_seen, drone.last_lat, drone.last_lng), (newest, 1.0, 2.0))
+        self.assertFalse(drone.is_dangerous)
+
+    def test_copy_writer_is_not_silently_replaced(self):
+        from django.core.management.base import CommandError
+
+        path = self._write("flight.ndjson", '{"serial": "IM-C", "lat": 31.0, "lng": 35.0}\n')
+        with patch("drones.management.commands.import_telemetry.copy_supported", return_value=False):
+            with self.assertRaises(CommandError):
+                self._call(path, "--writer", "copy")
+        self.assertFalse(Drone.objects.exists())
+
+    def test_gzip_input_file_is_closed(self):
+        import builtins
+
+        path = self._write("flight.ndjson.gz", '{"serial": "IM-Z", "lat": 31.0, "lng": 35.0}\n', compress=True)
+        opened = []
+
+        def tracking_open(*args, **kwargs):
+            opened.append(builtins.open(*args, **kwargs))
+            return opened[-1]
+
+        with patch("drones.management.commands.import_telemetry.open", tracking_open, create=True):
+            self._call(path)
+        self.assertEqual(len(opened), 1)
+        self.assertTrue(opened[0].closed)
+
+
+class TelemetryExportTests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.t0 = timezone.now().replace(microsecond=0) - timedelta(hours=1)
+        for serial in ("EX-A", "EX-B"):
+            drone = Drone.objects.create(serial=serial)
+            DroneTelemetry.objects.bulk_create(
+                [
+                    DroneTelemetry(drone=drone, timestamp=self.t0 + timedelta(seconds=i), lat=31.0 + i, lng=35.0,
+                                   height_m=None if i == 0 else 10.0 * i)
+                    for i in range(5)
+                ]
+            )
+
+    def _export(self, **params):
+        res = self.client.get(reverse("telemetry-export"), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, getattr(res, "data", None))
+        return b"".join(res.streaming_content)
+
+    def test_dtel_round_trip_with_filters(self):
+        from io import BytesIO
+        from drones.telemetry_export import read_dtel
+
+        start = (self.t0 + timedelta(seconds=1)).isoformat()
+        columns = read_dtel(BytesIO(self._export(format="dtel", serial="EX-B", **{"from": start})))
+
+        self.assertEqual(columns["serial"], ["EX-B"] * 4)
+        self.assertEqual(columns["lat"], [32.0, 33.0, 34.0, 35.0])
+        self.assertEqual(columns["height_m"], [10.0, 20.0, 30.0, 40.0])
+        self.assertEqual(columns["timestamp"][0], int((self.t0 + timedelta(seconds=1)).timestamp() * 1_000_000))
+
+    def test_dtel_chunks_and_missing_values(self):
+        from io import BytesIO
+        from drones.models import DroneTelemetry as T
+        from drones.telemetry_export import export_chunks, read_dtel
+
+        columns = read_dtel(BytesIO(b"".join(export_chunks(T.objects.all(), "dtel", chunk_size=3))))
+        self.assertEqual(columns["serial"], ["EX-A"] * 5 + ["EX-B"] * 5)
+        self.assertIsNone(columns["height_m"][0])
+
+    def test_requires_authentication_and_valid_format(self):
+        self.assertEqual(self.client.get(reverse("telemetry-export"), {"format": "xlsx"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse("telemetry-export")).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_parquet_and_arrow(self):
+        from io import BytesIO
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+
+        table = pq.read_table(BytesIO(self._export(format="parquet")))
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(table.column("height_m").null_count, 2)
+
+        table = pa.ipc.open_stream(BytesIO(self._export(format="arrow"))).read_all()
+        self.assertEqual(table.column("serial").to_pylist()[:1], ["EX-A"])
+
+    def test_command_writes_file(self):
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from drones.telemetry_export import read_dtel
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.dtel")
+            out = StringIO()
+            call_command("export_telemetry", path, "--format", "dtel", "--serial", "EX-A", stdout=out)
+            with open(path, "rb") as f:
+                self.assertEqual(len(read_dtel(f)["serial"]), 5)
+        self.assertIn("format=dtel", out.getvalue())
+
+    def test_openapi_schema_documents_the_endpoint(self):
+        from drf_spectacular.generators import SchemaGenerator
+
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        operation = schema["paths"]["/api/telemetry/export/"]["get"]
+        self.assertEqual({p["name"] for p in operation["parameters"]}, {"serial", "from", "to", "format"})
+        content = operation["responses"]["200"]["content"]
+        self.assertIn("application/vnd.apache.parquet", content)
+        self.assertEqual(content["application/octet-stream"]["schema"], {"type": "string", "format": "binary"})
+
+
+class TelemetryBatchEndpointTests(AuthenticatedAPITestCase):
+    url = "/api/telemetry/batch/"
+
+    def test_json_array_all_valid(self):
+        items = [{"serial": "BT-1", "lat": 31.0 + i / 100, "lng": 35.0, "height": 10 * i} for i in range(5)]
+        res = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json(), {"accepted": 5, "rejected": 0, "errors": []})
+        self.assertEqual(DroneTelemetry.objects.filter(drone__serial="BT-1").count(), 5)
+
+    def test_ndjson_with_item_errors(self):
+        body = "\n".join([
+            '{"serial": "BT-2", "lat": 31.0, "lng": 35.0}',
+            "",
+            "{oops",
+            '{"serial": "BT-2", "lng": 35.0}',
+            '{"serial": "BT-2", "lat": 31.5, "lng": 35.5, "height_m": 900}',
+        ])
+        res = self.client.post(self.url, body, content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        data = res.json()
+        self.assertEqual((data["accepted"], data["rejected"]), (2, 2))
+        self.assertEqual([e["index"] for e in data["errors"]], [1, 2])
+        self.assertEqual(data["errors"][1]["errors"], {"lat": ["This field is required."]})
+        self.assertTrue(Drone.objects.get(serial="BT-2").is_dangerous)
+
+    def test_ndjson_lines_end_only_at_newline(self):
+        # U+2028 and U+0085 are legal unescaped inside JSON strings; CRLF line endings are fine
+        body = (
+            '{"serial": "BT-\u2028A", "lat": 31.0, "lng": 35.0}\r\n'
+            '{"serial": "BT-\u0085B", "lat": 31.0, "lng": 35.0}\r\n'
+        ).encode("utf-8")
+        res = self.client.post(self.url, body, content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED, res.json())
+        self.assertEqual(res.json()["accepted"], 2)
+        self.assertEqual(set(Drone.objects.values_list("serial", flat=True)), {"BT-\u2028A", "BT-\u0085B"})
+
+    def test_out_of_range_timestamp_is_an_item_error(self):
+        item = {"serial": "BT-4", "lat": 31.0, "lng": 35.0, "timestamp": "0001-01-01T00:00:00+05:00"}
+        res = self.client.post(self.url, [item], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.json()["errors"][0]["errors"], {"timestamp": ["Datetime value out of range."]})
+
+    def test_nothing_valid_is_400(self):
+        res = self.client.post(self.url, [{"lat": 1}], format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.json()["accepted"], 0)
+
+    def test_body_must_be_a_list(self):
+        res = self.client.post(self.url, {"serial": "BT-3", "lat": 1, "lng": 1}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(DRONE_TELEMETRY_BATCH_MAX_ITEMS=2)
+    def test_too_many_items(self):
+        res = self.client.post(self.url, [{"serial": "BT-4", "lat": 1, "lng": 1}] * 3, format="json")
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(Drone.objects.filter(serial="BT-4").exists())
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        res = self.client.post(self.url, [], format="json")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class FastValidatorDefinitionTests(SimpleTestCase):
+    def test_rules_follow_the_serializer(self):
+        from rest_framework import serializers
+        from drones.telemetry_in_serializer import TelemetryInSerializer
+        from drones.telemetry_validation import compile_fields
+
+        class Stricter(TelemetryInSerializer):
+            serial = serializers.CharField(max_length=8)
+            lat = serializers.FloatField(min_value=-90, max_value=90)
+
+        fields = {name: (parse, validators) for name, parse, validators, *_ in compile_fields(Stricter)}
+        self.assertEqual(list(fields)[:3], ["serial", "lat", "lng"])
+
+        from rest_framework.exceptions import ValidationError
+
+        with self.assertRaises(ValidationError):
+            fields["serial"][1](fields["serial"][0]("TOO-LONG-SERIAL"))
+        with self.assertRaises(ValidationError):
+            fields["lat"][1](fields["lat"][0]("91"))
+
+    def test_unsupported_field_types_fail_loudly(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from rest_framework import serializers
+        from drones.telemetry_in_serializer import TelemetryInSerializer
+        from drones.telemetry_validation import compile_fields
+
+        class WithList(TelemetryInSerializer):
+            tags = serializers.ListField(required=False)
+
+        with self.assertRaises(ImproperlyConfigured):
+            compile_fields(WithList)
+
+    def test_blank_follows_trim_whitespace(self):
+        from rest_framework import serializers
+        from drones.telemetry_in_serializer import TelemetryInSerializer
+        from drones.telemetry_validation import compile_fields
+
+        class Untrimmed(TelemetryInSerializer):
+            serial = serializers.CharField(max_length=64, trim_whitespace=False)
+
+        parse = next(parse for name, parse, *_ in compile_fields(Untrimmed) if name == "serial")
+        self.assertEqual(parse("   "), "   ")
+        self.assertEqual(Untrimmed(data={"serial": "   ", "lat": 1, "lng": 1}).is_valid(), True)
+        with self.assertRaisesMessage(ValueError, "This field may not be blank."):
+            parse("")
+
+    def test_validates_without_running_drf_fields(self):
+        from rest_framework import fields as drf_fields
+        from drones.telemetry_in_serializer import TelemetryInSerializer
+        from drones.telemetry_validation import validate_telemetry
+
+        payload = {"serial": " DR-1 ", "lat": "31.5", "lng": 35, "height": 12.0, "speed": 3.5, "timestamp": "2026-01-01T12:00:00Z"}
+        serializer = TelemetryInSerializer(data=payload)
+        self.assertTrue(serializer.is_valid())
+        validate_telemetry(payload)  # compile the rules first
+
+        # the fast path must not fall back to DRF's per-field validation
+        used = AssertionError("DRF field used")
+        with patch.object(drf_fields.Field, "run_validation", side_effect=used), \
+                patch.object(drf_fields.CharField, "run_validation", side_effect=used):
+            self.assertEqual(validate_telemetry(payload), dict(serializer.validated_data))
+
+
+class JSONBackendTests(AuthenticatedAPITestCase):
+    def test_backends_agree(self):
+        from decimal import Decimal
+        from drones.json_backend import BACKENDS, orjson
+        from rest_framework.utils.encoders import JSONEncoder
+
+        value = {"serial": "DR-ü", "lat": 31.5, 7: [1, None, True], "at": timezone.now(), "d": Decimal("1.5")}
+        names = ["json"] + (["orjson"] if orjson is not None else [])
+        encoded = {name: BACKENDS[name]().dumps(value, default=JSONEncoder().default) for name in names}
+        self.assertEqual(len(set(encoded.values())), 1)
+        for name in names:
+            self.assertEqual(BACKENDS[name]().loads(b'{"a":[1,2.5,"\xc3\xbc"]}'), {"a": [1, 2.5, "ü"]})
+            with self.assertRaises(ValueError):
+                BACKENDS[name]().loads(b"{not json")
+
+    def test_renderer_matches_drf(self):
+        from rest_framework.renderers import JSONRenderer
+        from drones.renderers import FastJSONRenderer
+
+        data = {"serial": "DR-1", "at": timezone.now(), "reasons": ("a", "b"), "note": "line break"}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        with override_settings(DRONE_JSON_BACKEND="json"):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_unknown_backend_is_rejected(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from drones import json_backend
+
+        with override_settings(DRONE_JSON_BACKEND="simdjson"):
+            with self.assertRaises(ImproperlyConfigured):
+                json_backend.loads(b"{}")
+
+    def test_api_round_trip_with_both_backends(self):
+        for backend in ("auto", "json"):
+            with self.subTest(backend=backend), override_settings(DRONE_JSON_BACKEND=backend):
+                payload = {"serial": f"JSON-{backend}", "lat": 31.5, "lng": 35.0}
+                res = self.client.post("/api/telemetry/", payload, format="json")
+                self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+                self.assertEqual(res.json()["detail"], "Telemetry ingested")
+                self.assertTrue(Drone.objects.filter(serial=f"JSON-{backend}").exists())
+
+                res = self.client.post("/api/telemetry/", b"{broken", content_type="application/json")
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("JSON parse error", res.json()["detail"])
+
+    def test_mqtt_payload_decoded_from_bytes(self):
+        from drones.management.commands.run_mqtt import decode_message
+
+        for backend in ("auto", "json"):
+            with override_settings(DRONE_JSON_BACKEND=backend):
+                data = decode_message("thing/product/DR-9/osd", b'{"lat": 1.0, "lng": 2.0}')
+                self.assertEqual(data, {"lat": 1.0, "lng": 2.0, "serial": "DR-9"})
+
+
+class TelemetryFrameTests(TestCase):
+    def _samples(self, n=3):
+        start = timezone.now().replace(microsecond=0)
+        return [
+            {"lat": 31.95 + i / 1000, "lng": 35.91, "height_m": 120.5, "horizontal_speed_mps": None if i else 4.25,
+             "timestamp": start + timedelta(milliseconds=250 * i)}
+            for i in range(n)
+        ]
+
+    def test_round_trip(self):
+        from drones.telemetry_frames import HEADER, SAMPLE, decode_frame, encode_frame
+
+        samples = self._samples()
+        frame = encode_frame(samples, serial="DR-BIN")
+        self.assertEqual(len(frame), HEADER.size + len("DR-BIN") + 3 * SAMPLE.size)
+
+        decoded = decode_frame(frame)
+        self.assertEqual([d["timestamp"] for d in decoded], [s["timestamp"] for s in samples])
+        self.assertEqual({d["serial"] for d in decoded}, {"DR-BIN"})
+        self.assertAlmostEqual(decoded[2]["lat"], 31.952, places=7)
+        self.assertEqual(decoded[0]["horizontal_speed_mps"], 4.25)
+        self.assertNotIn("horizontal_speed_mps", decoded[1])
+
+        # no serial in the frame, no timestamps: serial comes from the caller, time from the server
+        decoded = decode_frame(encode_frame([{"lat": 1.0, "lng": 2.0}]), serial="DR-TOPIC")
+        self.assertEqual(decoded, [{"lat": 1.0, "lng": 2.0, "serial": "DR-TOPIC"}])
+
+    def test_malformed_frames_are_rejected(self):
+        from drones.telemetry_frames import FrameError, decode_frame, encode_frame
+
+        frame = encode_frame(self._samples(2), serial="DR-BIN")
+        for bad in (b"", b"XX" + frame[2:], frame[:-1], frame + b"\0"):
+            with self.assertRaises(FrameError):
+                decode_frame(bad)
+        with self.assertRaises(FrameError):
+            encode_frame([{"lat": 400.0, "lng": 0.0}])
+
+    def test_selected_by_topic_suffix_or_content_type(self):
+        from drones.telemetry_frames import CONTENT_TYPE, is_frame
+
+        self.assertTrue(is_frame("thing/product/DR-1/osd/bin"))
+        self.assertFalse(is_frame("thing/product/DR-1/osd"))
+        self.assertTrue(is_frame("thing/product/DR-1/osd", CONTENT_TYPE))
+        self.assertFalse(is_frame("thing/product/DR-1/osd/bin", "application/json"))
+
+    def test_batch_ingest_counts_samples(self):
+        from drones.management.commands.run_mqtt import ingest_mqtt_batch
+        from drones.telemetry_frames import CONTENT_TYPE, encode_frame
+
+        samples = self._samples(3)
+        messages = [
+            ("thing/product/DR-FRAME/osd/bin", encode_frame(samples)),
+            ("thing/product/DR-CT/osd", encode_frame(self._samples(2)), CONTENT_TYPE),
+            ("thing/product/DR-JSON/osd", b'{"lat": "north", "lng": 2.0}'),
+            ("thing/product/DR-BROKEN/osd/bin", b"DT"),
+        ]
+        self.assertEqual(ingest_mqtt_batch(messages), (5, 2))
+        self.assertEqual(DroneTelemetry.objects.filter(drone__serial="DR-FRAME").count(), 3)
+        self.assertEqual(DroneTelemetry.objects.filter(drone__serial="DR-CT").count(), 2)
+        self.assertEqual(Drone.objects.get(serial="DR-FRAME").last_seen, samples[2]["timestamp"])
+
+    @patch("drones.management.commands.run_mqtt.mqtt.Client")
+    def test_inline_mode_ingests_whole_frame(self, MockClient):
+        from drones.management.commands.run_mqtt import Command as RunMQTTCommand
+        from drones.telemetry_frames import encode_frame
+
+        mock_client = MagicMock()
+        MockClient.return_value = mock_client
+        mock_client.loop_forever.side_effect = SystemExit
+        with self.assertRaises(SystemExit):
+            RunMQTTCommand().handle(host="mosquitto", port=1883, topic="thing/product/+/osd/#", username=None, password=None)
+
+        class Msg:
+            topic = "thing/product/DR-INLINE/osd/bin"
+            payload = encode_frame(self._samples(4))
+            properties = None
+
+        mock_client.on_message(mock_client, None, Msg())
+        self.assertEqual(DroneTelemetry.objects.filter(drone__serial="DR-INLINE").count(), 4)
+
+
+@override_settings(DRONE_STATE_STORE=True, DRONE_HEIGHT_THRESHOLD_M=500)
+class DroneStateStoreTests(AuthenticatedAPITestCase):
+    def setUp(self):
+        super().setUp()
+        from django.core.cache import cache
+        from drones.drone_state import drone_state_store
+
+        cache.clear()
+        drone_state_store.reset()
+        self.store = drone_state_store
+
+    def _ingest(self, **data):
+        from drones.services import ingest_telemetry
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return ingest_telemetry({"timestamp": timezone.now(), **data})
+
+    def _fleet(self):
+        self._ingest(serial="ST-A", lat=31.95, lng=35.91)
+        self._ingest(serial="ST-B", lat=31.96, lng=35.92, height_m=900.0)
+        self._ingest(serial="st-c", lat=31.50, lng=35.50)
+        self._ingest(serial="ST-OLD", lat=31.951, lng=35.911, timestamp=timezone.now() - timedelta(hours=1))
+        Drone.objects.create(serial="ST-NOPOS")
+
+    def _drone_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.json(), [q["sql"] for q in ctx.captured_queries if "drones_drone" in q["sql"]]
+
+    def test_endpoints_match_database_without_querying_it(self):
+        self._fleet()
+        self.store.states()  # warm up (first read loads from the DB)
+
+        urls = [
+            "/api/drones/",
+            "/api/drones/?serial=st-",
+            "/api/drones/online/",
+            "/api/drones/dangerous/",
+            "/api/drones/nearby/?lat=31.95&lng=35.91",
+            "/api/drones/nearby/?lat=31.95&lng=35.91&radius_km=100&limit=3",
+            "/api/drones/nearby/?lat=31.95&lng=35.91&k=2",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                from_store, queries = self._drone_queries(url)
+                self.assertEqual(queries, [])
+                # not override_settings: toggling the setting resets the store
+                with patch("drones.views.state_store_enabled", return_value=False):
+                    from_db = self.client.get(url).json()
+                self.assertEqual(from_store, from_db)
+                self.assertTrue(from_store)
+
+    def test_mark_safe_updates_store(self):
+        self._fleet()
+        self.assertEqual([d["serial"] for d in self.client.get("/api/drones/dangerous/").json()], ["ST-B"])
+
+        self.user.is_staff = True
+        self.user.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(reverse("drone-mark-safe", args=["ST-B"]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        body, queries = self._drone_queries("/api/drones/dangerous/")
+        self.assertEqual(body, [])
+        self.assertEqual(queries, [])
+
+    def test_batch_writes_and_deletes_are_published(self):
+        from drones.services import write_telemetry_batch
+
+        self._fleet()
+        self.store.states()
+        with self.captureOnCommitCallbacks(execute=True):
+            write_telemetry_batch([
+                {"serial": "ST-A", "lat": 32.0, "lng": 36.0, "timestamp": timezone.now()},
+                {"serial": "ST-NEW", "lat": 1.0, "lng": 2.0, "timestamp": timezone.now()},
+            ])
+        by_serial = {s.serial: s for s in self.store.states()}
+        self.assertEqual((by_serial["ST-A"].last_lat, by_serial["ST-A"].last_lng), (32.0, 36.0))
+        self.assertIn("ST-NEW", by_serial)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Drone.objects.get(serial="ST-NEW").delete()
+        self.assertNotIn("ST-NEW", {s.serial for s in self.store.states()})
+
+    def test_other_processes_read_the_shared_copy(self):
+        from django.core.cache import cache
+        from drones.drone_state import STATE_KEY, DroneStateStore
+
+        self._fleet()
+        self.store.states()  # builds the shared copy
+        self._ingest(serial="ST-LATE", lat=10.0, lng=10.0, height_m=900.0)
+
+        # a fresh store stands in for another worker process
+        other = DroneStateStore()
+        with self.assertNumQueries(0):
+            states = other.states()
+        self.assertEqual([s.serial for s in states], list(Drone.objects.order_by("id").values_list("serial", flat=True)))
+        late = next(s for s in states if s.serial == "ST-LATE")
+        self.assertEqual(late.last_seen, Drone.objects.get(serial="ST-LATE").last_seen)
+        self.assertEqual(late.danger_reasons, tuple(Drone.objects.get(serial="ST-LATE").danger_reasons))
+
+        # an evicted entry makes the next reader rebuild from the database
+        cache.delete(STATE_KEY % 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(DroneStateStore().states()), len(states))
+
+    def test_out_of_order_publishes_keep_the_newer_state(self):
+        from drones.drone_state import DroneState, DroneStateStore
+
+        self._fleet()
+        self.store.states()
+        drone = Drone.objects.get(serial="ST-A")
+        newer = DroneState.from_drone(drone)
+        older = DroneState(drone.id, drone.serial, drone.last_seen - timedelta(minutes=5), 1.0, 2.0, True, ["old"])
+
+        # the commit with the older point publishes last
+        self.store.publish([older])
+        for store in (self.store, DroneStateStore()):
+            state = next(s for s in store.states() if s.id == drone.id)
+            self.assertEqual((state.last_seen, state.last_lat, state.is_dangerous), (newer.last_seen, newer.last_lat, False))
+
+        # same last_seen still replaces the state (mark-safe, admin edits)
+        safe = DroneState(drone.id, drone.serial, drone.last_seen, 5.0, 6.0, False, [])
+        self.store.publish([safe])
+        self.assertEqual(next(s for s in DroneStateStore().states() if s.id == drone.id).last_lat, 5.0)
+
+    def test_flag_only_save_is_published_after_ingest_moved_on(self):
+        from drones.drone_state import DroneStateStore
+
+        self._fleet()
+        self.store.states()
+        loaded = Drone.objects.get(serial="ST-B")  # e.g. MarkDroneSafeView
+        newer = self._ingest(serial="ST-B", lat=33.0, lng=36.0, height_m=900.0)[0]
+
+        loaded.is_dangerous = False
+        loaded.danger_reasons = []
+        with self.captureOnCommitCallbacks(execute=True):
+            loaded.save(update_fields=["is_dangerous", "danger_reasons"])
+
+        for store in (self.store, DroneStateStore()):
+            state = next(s for s in store.states() if s.serial == "ST-B")
+            self.assertEqual((state.is_dangerous, state.last_seen, state.last_lat), (False, newer.last_seen, 33.0))
+
+    @override_settings(DRONE_STATE_CHECK_SECONDS=0)
+    def test_losing_the_rebuild_race_retries_until_a_version_exists(self):
+        from django.core.cache import cache
+        from drones.drone_state import STATE_REBUILD_KEY, STATE_VERSION_KEY
+
+        self._fleet()
+        cache.delete(STATE_VERSION_KEY)
+        # another process took the rebuild lock and died before sharing anything
+        cache.set(STATE_REBUILD_KEY, 1)
+        self.assertEqual(len(self.store.states()), 5)
+        self.assertIsNone(cache.get(STATE_VERSION_KEY))
+
+        cache.delete(STATE_REBUILD_KEY)  # the lock expires
+        self.store.states()
+        self.assertIsNotNone(cache.get(STATE_VERSION_KEY))
+        self.assertEqual(self.store._version, cache.get(STATE_VERSION_KEY))
+
+    @override_settings(DRONE_STATE_CHECK_SECONDS=0)
+    def test_readers_fetch_only_changed_slots(self):
+        from django.core.cache import cache
+        from drones.drone_state import STATE_KEY, DroneState, DroneStateStore
+
+        self._fleet()
+        self.store.states()
+        other = DroneStateStore()
+        before = {state.serial: state for state in other.states()}
+
+        moved = Drone.objects.get(serial="ST-A")
+        moved.last_seen += timedelta(seconds=5)
+        self.store.publish([DroneState.from_drone(moved)])
+        self.store.remove(Drone.objects.get(serial="ST-NOPOS").id)
+
+        with patch("drones.drone_state.cache", MagicMock(wraps=cache)) as spy, self.assertNumQueries(0):
+            after = {state.serial: state for state in other.states()}
+        fetched = [
+            key for call in spy.get_many.call_args_list for key in call.args[0]
+            if key.removeprefix(STATE_KEY % "").isdigit()
+        ]
+        self.assertEqual(len(fetched), 2)
+        self.assertNotIn("ST-NOPOS", after)
+        self.assertEqual(after["ST-A"].last_seen, moved.last_seen)
+        # unchanged drones keep their state (and its cached row)
+        self.assertIs(after["ST-B"], before["ST-B"])
+
+    @override_settings(DRONE_STATE_CHECK_SECONDS=0)
+    def test_a_lost_change_list_falls_back_to_a_full_read(self):
+        from django.core.cache import cache
+        from drones.drone_state import STATE_VERSION_KEY, DroneStateStore
+
+        self._fleet()
+        self.store.states()
+        other = DroneStateStore()
+        other.states()
+        loaded = other._version
+        # a writer bumped the version and died before recording its change list
+        cache.incr(STATE_VERSION_KEY)
+
+        other.states()  # may still be on its way: wait one check
+        self.assertEqual(other._version, loaded)
+        other.states()
+        self.assertEqual(other._version, loaded + 1)
+
+    def test_check_rejects_a_process_local_cache(self):
+        from drones.checks import check_state_store_cache
+
+        with patch("drones.checks.state_store_enabled", return_value=True):
+            self.assertEqual([e.id for e in check_state_store_cache()], ["drones.E001"])
+            with patch("drones.checks.caches", {"default": MagicMock()}):
+                self.assertEqual(check_state_store_cache(), [])
+        with patch("drones.checks.state_store_enabled", return_value=False):
+            self.assertEqual(check_state_store_cache(), [])
+
+
+class TelemetryWorkerPoolStopTests(SimpleTestCase):
+    def test_stop_does_not_hang_on_a_stuck_worker_with_full_queue(self):
+        import time
+        from drones.telemetry_workers import TelemetryWorkerPool
+
+        pool = TelemetryWorkerPool(lambda batch: None, workers=2, max_queue=1)
+        pool._queues[0].put(("thing/product/X/osd", b"{}"))
+        stuck = MagicMock(name="stuck")
+        stuck.is_alive.return_value = True
+        dead = MagicMock(name="dead")
+        dead.is_alive.return_value = False
+        pool._processes = [stuck, dead]
+
+        started = time.monotonic()
+        pool.stop(timeout=0.2)
+        self.assertLess(time.monotonic() - started, 3)
+        stuck.terminate.assert_called_once()
+        dead.terminate.assert_not_called()
+
+
+class GeofenceInvalidationCacheFailureTests(TestCase):
+    def test_check_warns_about_a_process_local_cache(self):
+        from drones.checks import check_geofence_cache
+
+        self.assertEqual([w.id for w in check_geofence_cache()], ["drones.W001"])
+        with patch("drones.checks.caches", {"default": MagicMock()}):
+            self.assertEqual(check_geofence_cache(), [])
+        with override_settings(DRONE_DANGER_RULES=["height", "speed"]):
+            self.assertEqual(check_geofence_cache(), [])
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_zone_save_survives_a_cache_without_counters(self):
+        zone = GeofenceZone.objects.create(name="Dummy", lat=31.0, lng=35.0, radius_km=1.0)
+        zone.radius_km = 2.0
+        zone.save()
+        zone.delete()
+        self.assertFalse(GeofenceZone.objects.exists())
+
+
+class InvalidGeofenceZoneTests(TestCase):
+    def test_invalid_zones_are_skipped_not_fatal(self):
+        from drones.geofence_index import GeofenceIndex
+
+        zones = [
+            {"name": "NoCenter", "shape": "circle", "lat": None, "lng": None, "radius_km": 1.0, "polygon": []},
+            {"name": "Line", "shape": "polygon", "lat": None, "lng": None, "radius_km": 1.0, "polygon": [[35.0, 31.0], [35.1, 31.1]]},
+            {"name": "Good", "shape": "circle", "lat": 31.0, "lng": 35.0, "radius_km": 1.0, "polygon": []},
+        ]
+        with self.assertLogs("drones.geofence_index", level="WARNING"):
+            index = GeofenceIndex(zones)
+        self.assertEqual([z.name for z in index.matches(31.0, 35.0)], ["Good"])
+
+    def test_ingest_still_classifies_with_a_bad_zone_stored(self):
+        from drones.services import ingest_telemetry
+
+        GeofenceZone.objects.create(name="Broken", shape="circle", lat=None, lng=None, radius_km=1.0)
+        GeofenceZone.objects.create(name="Real", lat=31.0, lng=35.0, radius_km=1.0)
+        with self.assertLogs("drones.geofence_index", level="WARNING"):
+            drone, _ = ingest_telemetry({"serial": "BADZONE-1", "lat": 31.0, "lng": 35.0})
+        self.assertTrue(drone.is_dangerous)
+
+
+class GeofenceCellCacheTests(SimpleTestCase):
+    def test_cell_cache_is_bounded(self):
+        from drones import geofence_index
+        from drones.geofence_index import GeofenceIndex
+
+        if geofence_index.np is None:
+            self.skipTest("numpy not installed")
+        index = GeofenceIndex([{"name": "Z", "lat": 0.0, "lng": 0.0, "radius_km": 1.0}])
+        with patch.object(geofence_index, "MAX_CACHED_CELLS", 10):
+            index.matches_batch([i * 0.5 for i in range(50)], [0.0] * 50)
+            self.assertLessEqual(len(index._cell_cache), 10)
+            self.assertEqual([z.name for z in index.matches_batch([0.0], [0.0])[0]], ["Z"])
+
+    def test_eviction_by_another_thread_mid_lookup(self):
+        import threading
+        from collections import OrderedDict
+        from drones import geofence_index
+        from drones.geofence_index import GeofenceIndex
+
+        if geofence_index.np is None:
+            self.skipTest("numpy not installed")
+        index = GeofenceIndex([{"name": "Z", "lat": 0.0, "lng": 0.0, "radius_km": 1.0}])
+        paused, evicted = threading.Event(), threading.Event()
+        errors = []
+
+        class PausingCache(OrderedDict):
+            # stop the reader between get() and move_to_end() so the other thread can evict the cell
+            def get(self, key, default=None):
+                value = super().get(key, default)
+                if threading.current_thread().name == "reader" and value is not None:
+                    paused.set()
+                    evicted.wait(0.5)
+                return value
+
+        def run(target):
+            try:
+                target()
+            except Exception as e:
+                errors.append(e)
+
+        def evict():
+            paused.wait(1)
+            index.matches_batch([5.0], [5.0])
+            evicted.set()
+
+        with patch.object(geofence_index, "MAX_CACHED_CELLS", 1):
+            index._cell_cache = PausingCache()
+            index.matches_batch([0.0], [0.0])
+            threads = [
+                threading.Thread(target=run, args=(lambda: index.matches_batch([0.0], [0.0]),), name="reader"),
+                threading.Thread(target=run, args=(evict,)),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(index._cell_cache), 1)
+
+
+class TelemetryRollupLateDataTests(TestCase):
+    def setUp(self):
+        self.drone = Drone.objects.create(serial="ROLL-LATE")
+        self.t0 = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=5)
+        DroneTelemetry.objects.bulk_create([
+            DroneTelemetry(drone=self.drone, timestamp=self.t0 + timedelta(minutes=i), lat=31.0, lng=35.0, height_m=10.0)
+            for i in range(240)
+        ])
+
+    def _call(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command("rollup_telemetry", *args, stdout=StringIO())
+
+    def test_backfilled_points_in_old_buckets_are_rolled_up(self):
+        from drones.models import TelemetryRollup
+
+        self._call()
+        # a backfill (import_telemetry) landing hours behind the watermark
+        DroneTelemetry.objects.create(drone=self.drone, timestamp=self.t0 + timedelta(minutes=5, seconds=30),
+                                      lat=32.0, lng=36.0, height_m=999.0)
+        self._call()
+
+        minute = TelemetryRollup.objects.get(resolution="1m", bucket_start=self.t0 + timedelta(minutes=5))
+        self.assertEqual((minute.count, minute.max_height_m, minute.last_lat), (2, 999.0, 32.0))
+        hour = TelemetryRollup.objects.get(resolution="1h", bucket_start=self.t0)
+        self.assertEqual((hour.count, hour.max_height_m), (61, 999.0))
+
+    def test_rows_arriving_between_passes_reach_the_hour_rollup(self):
+        from drones.management.commands import rollup_telemetry
+        from drones.models import TelemetryRollup
+        from drones.rollups import save_rollup_cursor
+
+        self._call()
+
+        def save_then_backfill(resolution, last_telemetry_id):
+            save_rollup_cursor(resolution, last_telemetry_id)
+            if resolution == "1m":
+                # lands after the minute pass, before the hour pass
+                DroneTelemetry.objects.create(drone=self.drone, timestamp=self.t0 + timedelta(minutes=7, seconds=30),
+                                              lat=32.0, lng=36.0, height_m=999.0)
+
+        with patch.object(rollup_telemetry, "save_rollup_cursor", side_effect=save_then_backfill):
+            self._call()
+        self._call()
+
+        hour = TelemetryRollup.objects.get(resolution="1h", bucket_start=self.t0)
+        self.assertEqual((hour.count, hour.max_height_m), (61, 999.0))
+
+    def test_lag_window_is_recomputed_behind_the_watermark(self):
+        from drones.models import TelemetryRollup
+        from drones.rollups import save_rollup_cursor
+
+        self._call()
+        late = DroneTelemetry.objects.create(drone=self.drone, timestamp=self.t0 + timedelta(minutes=230, seconds=1),
+                                             lat=31.0, lng=35.0, height_m=500.0)
+        # even when the id cursor already covers it (e.g. a row committed out of id order)
+        save_rollup_cursor("1m", late.id)
+        self._call("--resolution", "1m", "--lag-minutes", "300")
+        minute = TelemetryRollup.objects.get(resolution="1m", bucket_start=self.t0 + timedelta(minutes=230))
+        self.assertEqual(minute.max_height_m, 500.0)
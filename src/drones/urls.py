@@ -5,7 +5,10 @@ from .views import (
     OnlineDroneListView,
     NearbyDroneListView,
     TelemetryIngestView,
+    TelemetryExportView,
+    TelemetryBatchIngestView,
     DroneTelemetryListView,
+    DroneTelemetryAggregateView,
     DronePathGeoJSONView,
     DangerousDroneListView,
     GeofenceZoneListCreateView,
@@ -18,7 +21,10 @@ urlpatterns = [
     path("drones/online/", OnlineDroneListView.as_view(), name="online-drone-list"),
     path("drones/nearby/", NearbyDroneListView.as_view(), name="nearby-drone-list"),
     path("telemetry/", TelemetryIngestView.as_view(), name="telemetry-ingest"),
+    path("telemetry/batch/", TelemetryBatchIngestView.as_view(), name="telemetry-batch-ingest"),
+    path("telemetry/export/", TelemetryExportView.as_view(), name="telemetry-export"),
     path("drones/<str:serial>/telemetry/", DroneTelemetryListView.as_view(), name="drone-telemetry"),
+    path("drones/<str:serial>/telemetry/aggregate/", DroneTelemetryAggregateView.as_view(), name="drone-telemetry-aggregate"),
     path("drones/<str:serial>/path/", DronePathGeoJSONView.as_view(), name="drone-path-geojson"),
     path("drones/dangerous/", DangerousDroneListView.as_view(), name="dangerous-drone-list"),
     path("drones/<str:serial>/mark-safe/", MarkDroneSafeView.as_view(), name="drone-mark-safe"),
@@ -17,3 +17,41 @@ def haversine_km(lat1, lng1, lat2, lng2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
     return R * c
+
+
+#same formula over NumPy arrays (broadcasts, so any argument may be a scalar)
+def haversine_km_array(lat1, lng1, lat2, lng2):
+    import numpy as np
+
+    R = 6371.0
+
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    d_phi = np.radians(np.subtract(lat2, lat1))
+    d_lambda = np.radians(np.subtract(lng2, lng1))
+
+    a = (np.sin(d_phi / 2) ** 2) + (np.cos(phi1) * np.cos(phi2) * (np.sin(d_lambda / 2) ** 2))
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return R * c
+
+
+#km per degree of latitude (same Earth radius as haversine_km)
+KM_PER_DEG = 6371.0 * math.pi / 180
+
+
+#lat/lng box that fully contains a circle of radius_km around (lat, lng)
+#returns (min_lat, max_lat, min_lng, max_lng); lng bounds may go past ±180 when the
+#circle crosses the antimeridian, and are None when the box would wrap the whole globe (poles / huge radius)
+def bounding_box(lat, lng, radius_km):
+    d_lat = radius_km / KM_PER_DEG
+    min_lat = max(lat - d_lat, -90.0)
+    max_lat = min(lat + d_lat, 90.0)
+
+    # widest longitude span is at the latitude closest to a pole
+    cos_lat = math.cos(math.radians(min(abs(lat) + d_lat, 90.0)))
+    d_lng = radius_km / (KM_PER_DEG * cos_lat) if cos_lat > 1e-9 else 360.0
+    if d_lng >= 180:
+        return min_lat, max_lat, None, None
+
+    return min_lat, max_lat, lng - d_lng, lng + d_lng
@@ -1,5 +1,7 @@
 from datetime import timedelta
 
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
@@ -8,15 +10,38 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 
-from .models import Drone, DroneTelemetry, GeofenceZone
-from .serializers import DroneSerializer, GeofenceZoneSerializer
+from .models import Drone, DroneTelemetry, GeofenceZone, TelemetryRollup
+from .serializers import DroneSerializer, GeofenceZoneSerializer, NearbyDroneSerializer, TelemetryBucketSerializer
 from .telemetry_in_serializer import TelemetryInSerializer
 from .telemetry_out_serializer import DroneTelemetrySerializer
-from .utils import haversine_km
-from .telemetry_response_serializer import TelemetryIngestResponseSerializer
-from .services import ingest_telemetry
+from .aggregates import BUCKETS, aggregate_telemetry, rollup_buckets
+from .parsers import FastJSONParser, MalformedLine, NDJSONParser
+from .nearby import drones_within, nearest_drones
+from .drone_state import drone_state_store, state_store_enabled
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    after_cursor,
+    next_page_link,
+    parse_page_size,
+    parse_time_param,
+)
+from .telemetry_response_serializer import TelemetryBatchResponseSerializer, TelemetryIngestResponseSerializer
+from .simplify import simplify_path
+from .telemetry_export import (
+    CONTENT_TYPES as EXPORT_CONTENT_TYPES,
+    EXTENSIONS as EXPORT_EXTENSIONS,
+    FORMATS as EXPORT_FORMATS,
+    available_formats as available_export_formats,
+    default_format as default_export_format,
+    export_chunks,
+)
+from .streaming import stream_chunk_size, stream_path, stream_telemetry, wants_stream
+from .services import ingest_telemetry, write_telemetry_batch
+from .telemetry_validation import TelemetryValidationError, validate_telemetry
 
 # Alias for backward compatibility
 TelemetryOutSerializer = DroneTelemetrySerializer
@@ -57,6 +82,10 @@ class DroneListView(APIView):
         
         #drones is now a list-like object of drone instances
         serial = request.query_params.get("serial")
+        #with DRONE_STATE_STORE on, answer from the in-memory latest-state store instead of the DB
+        if state_store_enabled():
+            states = drone_state_store.search(serial) if serial else drone_state_store.states()
+            return Response([state.row for state in states])
         #serial filtering example: /api/drones/?serial=abc123 would return drones with "abc123" in their serial number
         if serial:
             drones = Drone.objects.filter(serial__icontains=serial)
@@ -86,6 +115,8 @@ class OnlineDroneListView(APIView):
         #define "online" as seen in the last 30 seconds
         #cutoff means the latest time a drone could have been seen to be considered online
         cutoff = timezone.now() - timedelta(seconds=30)
+        if state_store_enabled():
+            return Response([state.row for state in drone_state_store.online(cutoff)])
         #asks the DB for drones whose last_seen is greater than or equal to the cutoff
         drones = Drone.objects.filter(last_seen__gte=cutoff)
         #convert the queryset of drone instances into a list of dictionaries using the serializer
@@ -98,16 +129,22 @@ class NearbyDroneListView(APIView):
     # read query params
     # validate presence
     # validate numeric
-    # fetch drones with coordinates
+    # fetch candidate drones (SQL bounding box / expanding kNN search)
     # compute distance
-    # filter within 5 km
+    # filter within radius_km (default 5 km), nearest first
     # return JSON
     @extend_schema(
     parameters=[
         OpenApiParameter("lat", float, OpenApiParameter.QUERY, required=True),
         OpenApiParameter("lng", float, OpenApiParameter.QUERY, required=True),
+        OpenApiParameter("radius_km", float, OpenApiParameter.QUERY, required=False,
+                         description="Search radius (default 5, or unlimited when k is given)."),
+        OpenApiParameter("k", int, OpenApiParameter.QUERY, required=False,
+                         description="Return only the k nearest drones."),
+        OpenApiParameter("limit", int, OpenApiParameter.QUERY, required=False,
+                         description="Max number of results."),
     ],
-    responses=DroneSerializer(many=True),
+    responses=NearbyDroneSerializer(many=True),
     tags=["drones"],
     )
     
@@ -125,17 +162,42 @@ class NearbyDroneListView(APIView):
         except (TypeError, ValueError):
             return Response({"detail": "Query parameters 'lat' and 'lng' must be valid numbers."},
             status=status.HTTP_400_BAD_REQUEST,)
-        #fetch drones with known coordinates
-        drones = Drone.objects.exclude(last_lat__isnull=True).exclude(last_lng__isnull=True)
-        
-        #calculate distance from each drone to the provided lat/lng and filter to those within 5 km
+
+        #optional radius_km (float > 0), k and limit (ints > 0)
+        try:
+            radius_km = request.query_params.get("radius_km")
+            radius_km = float(radius_km) if radius_km is not None else None
+            k = request.query_params.get("k")
+            k = int(k) if k is not None else None
+            limit = request.query_params.get("limit")
+            limit = int(limit) if limit is not None else None
+        except (TypeError, ValueError):
+            return Response({"detail": "Query parameters 'radius_km', 'k' and 'limit' must be valid numbers."},
+            status=status.HTTP_400_BAD_REQUEST,)
+        if (radius_km is not None and not radius_km > 0) or (k is not None and k < 1) or (limit is not None and limit < 1):
+            return Response({"detail": "Query parameters 'radius_km', 'k' and 'limit' must be positive."},
+            status=status.HTTP_400_BAD_REQUEST,)
+
+        #k-nearest: expanding indexed search, no radius unless one was given;
+        #otherwise every drone within radius_km (5 km by default), nearest first.
+        #With DRONE_STATE_STORE on, the same searches run over the in-memory latest-state store.
+        store = drone_state_store if state_store_enabled() else None
+        if k is not None:
+            found = store.nearest(lat, lng, k, radius_km=radius_km) if store else nearest_drones(lat, lng, k, radius_km=radius_km)
+        else:
+            radius_km = radius_km if radius_km is not None else 5
+            found = store.within(lat, lng, radius_km) if store else drones_within(lat, lng, radius_km)
+        if limit is not None:
+            found = found[:limit]
+        if store is not None:
+            return Response([{**state.row, "distance_km": round(distance, 4)} for distance, state in found])
+
         nearby = []
-        for drone in drones:
-            distance = haversine_km(lat, lng, drone.last_lat, drone.last_lng)
-            if distance <= 5:
-                nearby.append(drone)
+        for distance, drone in found:
+            drone.distance_km = round(distance, 4)
+            nearby.append(drone)
         #serialize the nearby drones and return as JSON
-        serializer = DroneSerializer(nearby, many=True)
+        serializer = NearbyDroneSerializer(nearby, many=True)
         return Response(serializer.data)
             
 
@@ -179,23 +241,224 @@ class TelemetryIngestView(APIView):
 
 
 
+class TelemetryBatchIngestView(APIView):
+    # Accepts many points per request: a JSON array or an NDJSON body (one object per line)
+    # Every item is validated in one pass with the lightweight validator,
+    # the valid ones are written with one bulk ingest, invalid ones are reported by index
+    parser_classes = [FastJSONParser, NDJSONParser]
+
+    @extend_schema(
+        request=TelemetryInSerializer(many=True),
+        responses={
+            201: TelemetryBatchResponseSerializer,
+            207: TelemetryBatchResponseSerializer,
+            400: TelemetryBatchResponseSerializer,
+        },
+        tags=["telemetry"],
+    )
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"detail": "Expected a JSON array or an NDJSON body."},
+            status=status.HTTP_400_BAD_REQUEST,)
+        max_items = getattr(settings, "DRONE_TELEMETRY_BATCH_MAX_ITEMS", 10000)
+        if len(items) > max_items:
+            return Response({"detail": f"At most {max_items} items per request."},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,)
+
+        valid = []
+        errors = []
+        for index, item in enumerate(items):
+            if isinstance(item, MalformedLine):
+                errors.append({"index": index, "errors": {"non_field_errors": [item.error]}})
+                continue
+            try:
+                valid.append(validate_telemetry(item))
+            except TelemetryValidationError as e:
+                errors.append({"index": index, "errors": e.errors})
+
+        accepted = write_telemetry_batch(valid) if valid else 0
+
+        #201 all stored, 207 some stored, 400 nothing stored
+        if not errors:
+            code = status.HTTP_201_CREATED
+        elif accepted:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({"accepted": accepted, "rejected": len(errors), "errors": errors}, status=code)
+
+
 class DroneTelemetryListView(APIView):
     #404 if serial doesn’t exist
-    #returns telemetry points ordered by timestamp for a given drone serial number
+    #returns telemetry points ordered by (timestamp, id) for a given drone serial number, one page at a time
+    #the next page is linked from the Link header (rel="next"); no header means this was the last page
     @extend_schema(
+    parameters=[
+        OpenApiParameter("from", str, OpenApiParameter.QUERY, required=False,
+                         description="Only points at/after this ISO-8601 datetime."),
+        OpenApiParameter("to", str, OpenApiParameter.QUERY, required=False,
+                         description="Only points before this ISO-8601 datetime."),
+        OpenApiParameter("cursor", str, OpenApiParameter.QUERY, required=False,
+                         description="Opaque cursor taken from the previous page's Link header."),
+        OpenApiParameter("limit", int, OpenApiParameter.QUERY, required=False,
+                         description=f"Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})."),
+        OpenApiParameter("stream", bool, OpenApiParameter.QUERY, required=False,
+                         description="Stream every matching point as one JSON array (limit is ignored)."),
+    ],
     responses=DroneTelemetrySerializer(many=True),
     tags=["telemetry"],
     )
     def get(self, request, serial):
         drone = get_object_or_404(Drone, serial=serial)
-        #query the database for telemetry records associated with the drone, ordered by timestamp
-        qs = DroneTelemetry.objects.filter(drone=drone).order_by("timestamp")
-        #serialize the queryset of telemetry records into a list of dictionaries and return as JSON
-        serializer = DroneTelemetrySerializer(qs, many=True)
-        return Response(serializer.data)
+        try:
+            start = parse_time_param(request.query_params.get("from"), "from")
+            end = parse_time_param(request.query_params.get("to"), "to")
+            page_size = parse_page_size(request.query_params.get("limit"))
+            #query the database for telemetry records associated with the drone, in keyset order
+            qs = DroneTelemetry.objects.filter(drone=drone).order_by("timestamp", "id")
+            qs = after_cursor(qs, request.query_params.get("cursor"))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if start is not None:
+            qs = qs.filter(timestamp__gte=start)
+        if end is not None:
+            qs = qs.filter(timestamp__lt=end)
+
+        #streaming mode: the whole range, read and written chunk by chunk
+        if wants_stream(request):
+            return stream_telemetry(qs)
+
+        #fetch one extra row to know whether another page exists
+        rows = list(qs[: page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+        #serialize the page of telemetry records into a list of dictionaries and return as JSON
+        serializer = DroneTelemetrySerializer(rows, many=True)
+        response = Response(serializer.data)
+        if has_next:
+            response["Link"] = f'<{next_page_link(request, rows[-1])}>; rel="next"'
+        return response
     
 
 
+class DroneTelemetryAggregateView(APIView):
+    #404 if serial doesn’t exist
+    #returns telemetry downsampled into fixed time buckets (min/max/avg height and speed + last position),
+    #oldest bucket first; grouping happens in SQL so only one row per bucket leaves the database
+    @extend_schema(
+    parameters=[
+        OpenApiParameter("bucket", str, OpenApiParameter.QUERY, required=False,
+                         enum=list(BUCKETS), description="Bucket width (default 1m)."),
+        OpenApiParameter("from", str, OpenApiParameter.QUERY, required=False,
+                         description="Only points at/after this ISO-8601 datetime."),
+        OpenApiParameter("to", str, OpenApiParameter.QUERY, required=False,
+                         description="Only points before this ISO-8601 datetime."),
+        OpenApiParameter("limit", int, OpenApiParameter.QUERY, required=False,
+                         description=f"Max buckets (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})."),
+        OpenApiParameter("source", str, OpenApiParameter.QUERY, required=False, enum=["raw", "rollup"],
+                         description="'rollup' reads the precomputed 1m/1h rollup tables instead of raw telemetry."),
+    ],
+    responses=TelemetryBucketSerializer(many=True),
+    tags=["telemetry"],
+    )
+    def get(self, request, serial):
+        drone = get_object_or_404(Drone, serial=serial)
+        bucket = request.query_params.get("bucket", "1m")
+        if bucket not in BUCKETS:
+            return Response({"detail": f"Query parameter 'bucket' must be one of: {', '.join(BUCKETS)}."},
+            status=status.HTTP_400_BAD_REQUEST,)
+        try:
+            start = parse_time_param(request.query_params.get("from"), "from")
+            end = parse_time_param(request.query_params.get("to"), "to")
+            limit = parse_page_size(request.query_params.get("limit"))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        source = request.query_params.get("source", "raw")
+        if source not in ("raw", "rollup"):
+            return Response({"detail": "Query parameter 'source' must be 'raw' or 'rollup'."},
+            status=status.HTTP_400_BAD_REQUEST,)
+
+        #rollups: thousands of precomputed rows instead of scanning raw points (kept fresh by rollup_telemetry)
+        if source == "rollup":
+            if bucket not in dict(TelemetryRollup.RESOLUTION_CHOICES):
+                return Response({"detail": "Rollups exist only for bucket=1m and bucket=1h."},
+                status=status.HTTP_400_BAD_REQUEST,)
+            qs = TelemetryRollup.objects.filter(drone=drone, resolution=bucket)
+            if start is not None:
+                qs = qs.filter(bucket_start__gte=start)
+            if end is not None:
+                qs = qs.filter(bucket_start__lt=end)
+            serializer = TelemetryBucketSerializer(rollup_buckets(qs, limit), many=True)
+            return Response(serializer.data)
+
+        qs = DroneTelemetry.objects.filter(drone=drone)
+        if start is not None:
+            qs = qs.filter(timestamp__gte=start)
+        if end is not None:
+            qs = qs.filter(timestamp__lt=end)
+
+        serializer = TelemetryBucketSerializer(aggregate_telemetry(qs, BUCKETS[bucket], limit), many=True)
+        return Response(serializer.data)
+
+
+class TelemetryExportView(APIView):
+    #streams telemetry for a set of drones and a time range as a columnar file
+    #(Parquet / Arrow IPC when pyarrow is installed, the documented dtel layout otherwise)
+    def perform_content_negotiation(self, request, force=False):
+        #?format= names the file format here, not a DRF renderer; don't 404 on it
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+    parameters=[
+        OpenApiParameter("serial", str, OpenApiParameter.QUERY, required=False, many=True,
+                         description="Only these drones (repeat the parameter); default all."),
+        OpenApiParameter("from", str, OpenApiParameter.QUERY, required=False,
+                         description="Only points at/after this ISO-8601 datetime."),
+        OpenApiParameter("to", str, OpenApiParameter.QUERY, required=False,
+                         description="Only points before this ISO-8601 datetime."),
+        OpenApiParameter("format", str, OpenApiParameter.QUERY, required=False, enum=list(EXPORT_FORMATS),
+                         description="parquet (default when available), arrow or dtel."),
+    ],
+    #one binary body per format, under its own media type
+    responses={
+        **{
+            (200, content_type): OpenApiResponse(response=OpenApiTypes.BINARY, description="Columnar telemetry file")
+            for content_type in EXPORT_CONTENT_TYPES.values()
+        },
+        (400, "application/json"): OpenApiResponse(description="Unknown format or bad from/to"),
+    },
+    tags=["telemetry"],
+    )
+    def get(self, request):
+        #'format' is DRF's format-suffix override, so read it from the raw GET params
+        fmt = request.GET.get("format") or default_export_format()
+        if fmt not in available_export_formats():
+            return Response({"detail": f"Format must be one of: {', '.join(available_export_formats())}."},
+            status=status.HTTP_400_BAD_REQUEST,)
+        try:
+            start = parse_time_param(request.query_params.get("from"), "from")
+            end = parse_time_param(request.query_params.get("to"), "to")
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = DroneTelemetry.objects.all()
+        serials = request.query_params.getlist("serial")
+        if serials:
+            qs = qs.filter(drone__serial__in=serials)
+        if start is not None:
+            qs = qs.filter(timestamp__gte=start)
+        if end is not None:
+            qs = qs.filter(timestamp__lt=end)
+
+        response = StreamingHttpResponse(export_chunks(qs, fmt), content_type=EXPORT_CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="telemetry.{EXPORT_EXTENSIONS[fmt]}"'
+        return response
+
+
     #the GeoJSON format is a standard for representing geographic data structures, 
     # and in this case, we are creating a LineString geometry that represents the path of the drone 
     # based on its recorded latitude and longitude coordinates over time.
@@ -204,6 +467,14 @@ class DronePathGeoJSONView(APIView):
     #returns a GeoJSON representation of the drone's path based on its telemetry data, which
     #can be used for mapping applications or spatial analysis
     @extend_schema(
+    parameters=[
+        OpenApiParameter("stream", bool, OpenApiParameter.QUERY, required=False,
+                         description="Write the GeoJSON incrementally instead of building it in memory."),
+        OpenApiParameter("tolerance_m", float, OpenApiParameter.QUERY, required=False,
+                         description="Simplify the line: drop vertices deviating less than this many metres."),
+        OpenApiParameter("max_points", int, OpenApiParameter.QUERY, required=False,
+                         description="Simplify the line down to at most this many vertices (>= 2)."),
+    ],
     responses={
         200: OpenApiResponse(
             response=dict,
@@ -216,16 +487,44 @@ class DronePathGeoJSONView(APIView):
         drone = get_object_or_404(Drone, serial=serial)
         #query the database for telemetry records associated with the drone, ordered by timestamp
         qs = DroneTelemetry.objects.filter(drone=drone).order_by("timestamp").values_list("lng", "lat")
+
+        #optional simplification: tolerance_m (float >= 0) and/or max_points (int >= 2)
+        try:
+            tolerance_m = request.query_params.get("tolerance_m")
+            tolerance_m = float(tolerance_m) if tolerance_m is not None else None
+            max_points = request.query_params.get("max_points")
+            max_points = int(max_points) if max_points is not None else None
+        except (TypeError, ValueError):
+            return Response({"detail": "Query parameters 'tolerance_m' and 'max_points' must be valid numbers."},
+            status=status.HTTP_400_BAD_REQUEST,)
+        if (tolerance_m is not None and not tolerance_m >= 0) or (max_points is not None and max_points < 2):
+            return Response({"detail": "'tolerance_m' must be >= 0 and 'max_points' must be >= 2."},
+            status=status.HTTP_400_BAD_REQUEST,)
+        simplify = tolerance_m is not None or max_points is not None
+
+        #streaming mode keeps memory flat for long flights (a simplified line is small, so it is never streamed)
+        if wants_stream(request) and not simplify:
+            return stream_path(drone.serial, qs)
         #values_list with "lng" and "lat" will return a list of tuples like [(lng1, lat1), (lng2, lat2), ...]
         #we convert this queryset into a list of [lng, lat] pairs to fit the GeoJSON format, 
         # which expects coordinates in the form of [longitude, latitude]
-        coordinates = list(qs)
+        coordinates = list(qs.iterator(chunk_size=stream_chunk_size()) if simplify else qs)
+        properties = {"serial": drone.serial, "count": len(coordinates)}
+
+        if simplify:
+            original_count = len(coordinates)
+            coordinates = simplify_path(coordinates, tolerance_m=tolerance_m, max_points=max_points)
+            properties.update(
+                count=len(coordinates),
+                original_count=original_count,
+                simplified_count=len(coordinates),
+            )
 
         return Response(
             {
                 "type": "Feature",
                 "geometry": {"type": "LineString", "coordinates": coordinates},
-                "properties": {"serial": drone.serial, "count": len(coordinates)},
+                "properties": properties,
             }
         )
 
@@ -243,6 +542,8 @@ class DangerousDroneListView(APIView):
 
     def get(self, request):
         #query the database for drones that are classified as dangerous, ordered by serial number
+        if state_store_enabled():
+            return Response([state.row for state in drone_state_store.dangerous()])
         qs = Drone.objects.filter(is_dangerous=True).order_by("serial")
         serializer = DroneSerializer(qs, many=True)
         return Response(serializer.data)